@@ -0,0 +1,234 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+#
+#  bench_hot_paths.py - Benchmarki gorących ścieżek Kontrolera Redshift
+#
+#  Copyright (C) 2025  Wasz Informatyk
+#
+#  Ten program jest wolnym oprogramowaniem; możesz go rozprowadzać dalej i/lub
+#  modyfikować na warunkach Powszechnej Licencji Publicznej GNU, wydanej przez
+#  Fundację Wolnego Oprogramowania; według wersji 3 tej Licencji lub (według
+#  twojego wyboru) którejkolwiek późniejszej wersji.
+
+"""
+Mierzy gorące ścieżki programu z atrapami redshift/pgrep/killall w PATH
+(rejestrują wywołania i symulują opóźnienie) i wypisuje wyniki w formacie JSON.
+
+Ścieżki on_apply_manual i on_set_location mierzone są na poziomie wywołań
+RedshiftLogic wykonywanych przez te handlery, więc nie wymagają ekranu ani GTK.
+"""
+
+import argparse
+import json
+import os
+import platform
+import shutil
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+import redshift_control as rc  # noqa: E402
+
+STUB = """#!/bin/sh
+echo "$(basename "$0") $*" >> "$BENCH_LOG"
+sleep "$BENCH_LATENCY"
+case " $* " in
+    *" -l "*) trap 'exit 0' TERM; while :; do sleep 1; done ;;
+esac
+"""
+
+def install_stubs(directory):
+    """
+    Tworzy atrapy redshift, pgrep i killall w podanym katalogu.
+    """
+    for name in ("redshift", "pgrep", "killall"):
+        path = os.path.join(directory, name)
+        with open(path, "w", encoding="utf-8") as f:
+            f.write(STUB)
+        os.chmod(path, 0o755)
+
+def summarize(samples):
+    """
+    Statystyki próbek (w ms).
+    """
+    ordered = sorted(samples)
+    def pct(p):
+        return ordered[min(len(ordered) - 1, int(round(p / 100.0 * (len(ordered) - 1))))]
+    return {
+        "n": len(ordered),
+        "mean_ms": statistics.fmean(ordered),
+        "p50_ms": pct(50),
+        "p95_ms": pct(95),
+        "min_ms": ordered[0],
+        "max_ms": ordered[-1],
+    }
+
+def run_until(start_func, timeout=10.0):
+    """
+    Uruchamia start_func(done) w pętli GLib i zwraca czas (ms) do wywołania done().
+    """
+    loop = rc.GLib.MainLoop()
+    finished = []
+
+    def done(*args):
+        finished.append(time.perf_counter())
+        loop.quit()
+
+    timer = rc.GLib.timeout_add(int(timeout * 1000), loop.quit)
+    start = time.perf_counter()
+    start_func(done)
+    if not finished:
+        loop.run()
+    if finished:
+        rc.GLib.source_remove(timer)
+        return (finished[0] - start) * 1000.0
+    raise RuntimeError("Przekroczono czas oczekiwania")
+
+def bench_apply_manual(logic, runs):
+    samples = []
+    for i in range(runs):
+        temp = 4000 + (i % 20) * 100
+        samples.append(run_until(lambda done: logic.kill_redshift_async(
+            lambda: logic.apply_manual_async(temp, 0.9, (1.0, 1.0, 1.0), done))))
+    return summarize(samples)
+
+def bench_set_location(logic, runs):
+    samples = []
+    for _ in range(runs):
+        def start(done):
+            def start_auto():
+                logic.start_auto_mode("52.23", "21.01", "6500", "4500", "1.0", "0.9")
+                logic.status_monitor.refresh()
+                done()
+            logic.kill_redshift_async(start_auto)
+        samples.append(run_until(start))
+    logic.kill_redshift()
+    return summarize(samples)
+
+def bench_status(logic, runs, processes):
+    children = [subprocess.Popen(["redshift", "-l", "52:21", "-t", "6500:4500", "-b", "1.0:0.9"])
+                for _ in range(processes)]
+    try:
+        time.sleep(0.2)
+        samples = []
+        for _ in range(runs):
+            start = time.perf_counter()
+            logic.status_monitor.refresh()
+            samples.append((time.perf_counter() - start) * 1000.0)
+        found = len(logic.status_monitor.processes)
+    finally:
+        for child in children:
+            child.terminate()
+            child.wait()
+    result = summarize(samples)
+    result["processes_found"] = found
+    return result
+
+def bench_config(logic, runs):
+    changed, unchanged, loads = [], [], []
+    for i in range(runs):
+        data = ({"temp-day": str(6000 + i), "temp-night": "4500"}, {"lat": "52.23", "lon": "21.01"})
+        start = time.perf_counter()
+        logic.save_config(*data)
+        changed.append((time.perf_counter() - start) * 1000.0)
+        start = time.perf_counter()
+        logic.save_config(*data)
+        unchanged.append((time.perf_counter() - start) * 1000.0)
+        start = time.perf_counter()
+        logic.load_config()
+        loads.append((time.perf_counter() - start) * 1000.0)
+    return {"save_changed": summarize(changed), "save_unchanged": summarize(unchanged),
+            "load_cached": summarize(loads)}
+
+def bench_validation(iterations):
+    values = ["52.23", "-181", "abc", "6500", "0.5", "25001"]
+    start = time.perf_counter()
+    for i in range(iterations):
+        rc.RedshiftLogic.validate_float(values[i % 6], -180, 180)
+    float_rate = iterations / (time.perf_counter() - start)
+    start = time.perf_counter()
+    for i in range(iterations):
+        rc.RedshiftLogic.validate_int(values[i % 6], 1000, 25000)
+    int_rate = iterations / (time.perf_counter() - start)
+    return {"validate_float_per_s": float_rate, "validate_int_per_s": int_rate}
+
+def bench_cold_start(runs):
+    samples = []
+    for _ in range(runs):
+        start = time.perf_counter()
+        subprocess.run([sys.executable, os.path.join(ROOT, "redshift_control.py"), "status"],
+                       capture_output=True, check=True)
+        samples.append((time.perf_counter() - start) * 1000.0)
+    return summarize(samples)
+
+def count_invocations(log_path):
+    counts = {}
+    if os.path.exists(log_path):
+        with open(log_path, encoding="utf-8") as f:
+            for line in f:
+                name = line.split(" ", 1)[0]
+                counts[name] = counts.get(name, 0) + 1
+    return counts
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("-n", "--runs", type=int, default=20)
+    parser.add_argument("--latency", type=float, default=0.01, help="opóźnienie atrap w sekundach")
+    parser.add_argument("--processes", type=int, default=3, help="liczba procesów redshift dla pomiaru statusu")
+    parser.add_argument("-o", "--output", help="plik wynikowy JSON (domyślnie stdout)")
+    args = parser.parse_args()
+
+    workdir = tempfile.mkdtemp(prefix="redshift-bench-")
+    try:
+        bindir = os.path.join(workdir, "bin")
+        os.mkdir(bindir)
+        install_stubs(bindir)
+        log_path = os.path.join(workdir, "invocations.log")
+        os.environ.update({
+            "PATH": bindir + os.pathsep + os.environ.get("PATH", ""),
+            "BENCH_LOG": log_path,
+            "BENCH_LATENCY": str(args.latency),
+        })
+        config_path = os.path.join(workdir, "redshift.conf")
+        # migawka stanu w katalogu tymczasowym - pomiar nie nadpisuje stanu użytkownika
+        state_path = os.path.join(workdir, "state.json")
+        forked = rc.RedshiftLogic(config_path=config_path, gamma_backend=None, state_path=state_path)
+        in_process = rc.RedshiftLogic(config_path=config_path, gamma_backend=rc.NullGammaBackend(),
+                                      state_path=state_path, resident=True)
+
+        results = {
+            "apply_manual_subprocess": bench_apply_manual(forked, args.runs),
+            "apply_manual_in_process": bench_apply_manual(in_process, args.runs),
+            "set_location_subprocess": bench_set_location(forked, max(1, args.runs // 4)),
+            "set_location_in_process": bench_set_location(in_process, args.runs),
+            "status_refresh": bench_status(forked, args.runs, args.processes),
+            "config": bench_config(forked, args.runs),
+            "validation": bench_validation(100000),
+            "cold_start_status": bench_cold_start(max(1, args.runs // 4)),
+        }
+        report = {
+            "timestamp": time.time(),
+            "python": platform.python_version(),
+            "platform": platform.platform(),
+            "stub_latency_s": args.latency,
+            "invocations": count_invocations(log_path),
+            "results": results,
+        }
+    finally:
+        shutil.rmtree(workdir, ignore_errors=True)
+
+    output = json.dumps(report, indent=2, sort_keys=True)
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as f:
+            f.write(output + "\n")
+    else:
+        print(output)
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
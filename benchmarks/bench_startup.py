@@ -0,0 +1,79 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+#
+#  bench_startup.py - Pomiar czasu startu ścieżki CLI Kontrolera Redshift
+#
+#  Copyright (C) 2025  Wasz Informatyk
+#
+#  Ten program jest wolnym oprogramowaniem; możesz go rozprowadzać dalej i/lub
+#  modyfikować na warunkach Powszechnej Licencji Publicznej GNU, wydanej przez
+#  Fundację Wolnego Oprogramowania; według wersji 3 tej Licencji lub (według
+#  twojego wyboru) którejkolwiek późniejszej wersji.
+
+"""
+Sprawdza, że import modułu i polecenie `status` mieszczą się w budżecie czasu
+oraz że ścieżka CLI nie importuje gi (GTK/GLib) ani NumPy.
+"""
+
+import argparse
+import os
+import statistics
+import subprocess
+import sys
+import time
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+SCRIPT = os.path.join(ROOT, "redshift_control.py")
+
+CHECK_MODULES = (
+    "import sys, redshift_control\n"
+    "redshift_control.main(['status'])\n"
+    "heavy = [m for m in ('gi', 'numpy') if m in sys.modules]\n"
+    "sys.exit(f'zaimportowano: {heavy}' if heavy else 0)\n"
+)
+
+def import_time_ms():
+    """
+    Skumulowany czas importu redshift_control (ms) według python -X importtime.
+    """
+    result = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", "import redshift_control"],
+        cwd=ROOT, capture_output=True, text=True, check=True
+    )
+    for line in result.stderr.splitlines():
+        parts = [p.strip() for p in line.split("|")]
+        if len(parts) == 3 and parts[2] == "redshift_control":
+            return int(parts[1]) / 1000.0
+    raise RuntimeError("Brak redshift_control w wyniku -X importtime")
+
+def status_wall_ms():
+    """
+    Czas całkowity (ms) uruchomienia `redshift_control.py status`.
+    """
+    start = time.perf_counter()
+    subprocess.run([sys.executable, SCRIPT, "status"], cwd=ROOT, capture_output=True, check=True)
+    return (time.perf_counter() - start) * 1000.0
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("-n", "--runs", type=int, default=10)
+    parser.add_argument("--import-budget-ms", type=float, default=150.0)
+    parser.add_argument("--status-budget-ms", type=float, default=500.0)
+    args = parser.parse_args()
+
+    check = subprocess.run([sys.executable, "-c", CHECK_MODULES], cwd=ROOT, capture_output=True, text=True)
+    if check.returncode != 0:
+        print(f"BŁĄD: ścieżka CLI importuje ciężkie moduły ({check.stderr.strip()})")
+        return 1
+
+    imports = statistics.median(import_time_ms() for _ in range(args.runs))
+    status = statistics.median(status_wall_ms() for _ in range(args.runs))
+    print(f"import redshift_control: {imports:.1f} ms (budżet {args.import_budget_ms:.0f} ms)")
+    print(f"redshift_control.py status: {status:.1f} ms (budżet {args.status_budget_ms:.0f} ms)")
+    if imports > args.import_budget_ms or status > args.status_budget_ms:
+        print("BŁĄD: przekroczono budżet czasu startu")
+        return 1
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -18,15 +18,60 @@
 #  Powinieneś otrzymać kopię Powszechnej Licencji Publicznej GNU wraz z tym
 #  programem; jeśli nie – zobacz <https://www.gnu.org/licenses/>.
 
-import gi
-gi.require_version('Gtk', '3.0')
-from gi.repository import Gtk
 import subprocess
+import io
+import os
 import re
+import sys
+import stat
+import errno
+import tempfile
 import time
-import os
+import math
+import heapq
+import json
+import mmap
+import select
+import signal
+import socket
+import struct
+import array
+import ctypes
+import ctypes.util
+import argparse
+import functools
+import importlib
+import importlib.util
+import datetime
+import collections
+import unicodedata
 import configparser
 
+class _LazyModule:
+    """
+    Moduł importowany dopiero przy pierwszym użyciu - ścieżka CLI nie ładuje gi.
+    """
+    def __init__(self, name):
+        self._name = name
+        self._module = None
+
+    def __getattr__(self, attr):
+        if self._module is None:
+            self._module = importlib.import_module(self._name)
+        return getattr(self._module, attr)
+
+GLib = _LazyModule("gi.repository.GLib")
+Gio = _LazyModule("gi.repository.Gio")
+
+@functools.lru_cache(maxsize=1)
+def _numpy():
+    """
+    Zwraca moduł NumPy (opcjonalny - wektoryzacja obliczeń) albo None, gdy jest niedostępny.
+    """
+    if importlib.util.find_spec("numpy") is None:
+        return None
+    return importlib.import_module("numpy")
+
 POLISH_CITIES = {
     "Białystok": ("53.13", "23.16"), "Bydgoszcz": ("53.12", "18.00"),
     "Gdańsk": ("54.35", "18.64"), "Gorzów Wielkopolski": ("52.73", "15.24"),
@@ -39,440 +84,3809 @@ POLISH_CITIES = {
     "Wrocław": ("51.10", "17.03"), "Zielona Góra": ("51.93", "15.50")
 }
 CONFIG_PATH = os.path.expanduser("~/.config/redshift/redshift.conf")
+CONTROLLER_SECTION = "controller"  # sekcja ustawień programu w pliku konfiguracyjnym
+STATE_SNAPSHOT_PATH = os.path.join(
+    os.environ.get("XDG_STATE_HOME") or os.path.expanduser("~/.local/state"), "redshift-control", "state.json"
+)
+STATE_SNAPSHOT_VERSION = 2
+DAEMON_SOCKET_PATH = os.path.join(
+    os.environ.get("XDG_RUNTIME_DIR") or "/tmp", f"redshift-control-{os.getuid()}.sock"
+)
 
-class RedshiftLogic:
+# --- Silnik rampy gamma (bez uruchamiania procesu redshift) ---
+
+TEMP_MIN, TEMP_MAX, TEMP_STEP = 1000, 25000, 100
+TEMP_QUANTUM = 10  # kwantyzacja temperatury dla pamięci podręcznej ramp
+
+class GammaBackendError(Exception):
     """
-    Klasa odpowiedzialna za logikę działania programu: obsługa konfiguracji, uruchamianie i resetowanie Redshift.
+    Błąd ustawiania rampy gamma przez backend wyjściowy.
     """
-    def __init__(self, config_path=CONFIG_PATH):
-        self.config_path = config_path
 
-    def load_config(self):
+# Punkty bieli co 100 K (1000-25000 K) tą samą metodą co tablica blackbody_color w colorramp.c
+# redshift: widmo ciała doskonale czarnego z obserwatorem CIE 1931 2°, przeliczone na liniowe sRGB,
+# ujemne składowe odsycone do zera, maksimum znormalizowane do 1, na końcu krzywa przejścia sRGB.
+# Dzięki temu rampy z silnika w procesie i z `redshift -O` dają ten sam kolor.
+BLACKBODY_COLOR = (
+    (1.00000000, 0.18171147, 0.00000000),  # 1000 K
+    (1.00000000, 0.25502045, 0.00000000),
+    (1.00000000, 0.30941172, 0.00000000),
+    (1.00000000, 0.35357374, 0.00000000),
+    (1.00000000, 0.39092522, 0.00000000),
+    (1.00000000, 0.42324854, 0.00000000),
+    (1.00000000, 0.45162986, 0.00000000),
+    (1.00000000, 0.47680104, 0.00000000),
+    (1.00000000, 0.49929045, 0.00000000),
+    (1.00000000, 0.51949862, 0.00000000),
+    (1.00000000, 0.54368352, 0.08688178),  # 2000 K
+    (1.00000000, 0.56627420, 0.14067115),
+    (1.00000000, 0.58744054, 0.18360617),
+    (1.00000000, 0.60733949, 0.22133309),
+    (1.00000000, 0.62610069, 0.25585105),
+    (1.00000000, 0.64383286, 0.28810931),
+    (1.00000000, 0.66062842, 0.31863388),
+    (1.00000000, 0.67656685, 0.34774681),
+    (1.00000000, 0.69171714, 0.37566001),
+    (1.00000000, 0.70613976, 0.40252104),
+    (1.00000000, 0.71988803, 0.42843752),  # 3000 K
+    (1.00000000, 0.73300935, 0.45349113),
+    (1.00000000, 0.74554609, 0.47774602),
+    (1.00000000, 0.75753632, 0.50125414),
+    (1.00000000, 0.76901442, 0.52405870),
+    (1.00000000, 0.78001158, 0.54619644),
+    (1.00000000, 0.79055623, 0.56769928),
+    (1.00000000, 0.80067434, 0.58859542),
+    (1.00000000, 0.81038976, 0.60891016),
+    (1.00000000, 0.81972442, 0.62866643),
+    (1.00000000, 0.82869859, 0.64788533),  # 4000 K
+    (1.00000000, 0.83733104, 0.66658636),
+    (1.00000000, 0.84563916, 0.68478772),
+    (1.00000000, 0.85363917, 0.70250650),
+    (1.00000000, 0.86134616, 0.71975883),
+    (1.00000000, 0.86877425, 0.73655999),
+    (1.00000000, 0.87593665, 0.75292453),
+    (1.00000000, 0.88284576, 0.76886631),
+    (1.00000000, 0.88951320, 0.78439862),
+    (1.00000000, 0.89594994, 0.79953418),
+    (1.00000000, 0.90216627, 0.81428520),  # 5000 K
+    (1.00000000, 0.90817194, 0.82866344),
+    (1.00000000, 0.91397613, 0.84268023),
+    (1.00000000, 0.91958752, 0.85634648),
+    (1.00000000, 0.92501434, 0.86967272),
+    (1.00000000, 0.93026437, 0.88266911),
+    (1.00000000, 0.93534499, 0.89534547),
+    (1.00000000, 0.94026321, 0.90771131),
+    (1.00000000, 0.94502568, 0.91977581),
+    (1.00000000, 0.94963873, 0.93154784),
+    (1.00000000, 0.95410837, 0.94303601),  # 6000 K
+    (1.00000000, 0.95844031, 0.95424863),
+    (1.00000000, 0.96264001, 0.96519376),
+    (1.00000000, 0.96671265, 0.97587919),
+    (1.00000000, 0.97066318, 0.98631247),
+    (1.00000000, 0.97449630, 0.99650091),
+    (0.99358762, 0.97193655, 1.00000000),
+    (0.98407277, 0.96617525, 1.00000000),
+    (0.97494272, 0.96062628, 1.00000000),
+    (0.96617577, 0.95527848, 1.00000000),
+    (0.95775177, 0.95012149, 1.00000000),  # 7000 K
+    (0.94965199, 0.94514561, 1.00000000),
+    (0.94185902, 0.94034181, 1.00000000),
+    (0.93435666, 0.93570162, 1.00000000),
+    (0.92712977, 0.93121715, 1.00000000),
+    (0.92016425, 0.92688097, 1.00000000),
+    (0.91344690, 0.92268614, 1.00000000),
+    (0.90696538, 0.91862611, 1.00000000),
+    (0.90070814, 0.91469476, 1.00000000),
+    (0.89466434, 0.91088631, 1.00000000),
+    (0.88882382, 0.90719531, 1.00000000),  # 8000 K
+    (0.88317702, 0.90361664, 1.00000000),
+    (0.87771497, 0.90014546, 1.00000000),
+    (0.87242922, 0.89677721, 1.00000000),
+    (0.86731183, 0.89350756, 1.00000000),
+    (0.86235529, 0.89033243, 1.00000000),
+    (0.85755253, 0.88724797, 1.00000000),
+    (0.85289687, 0.88425050, 1.00000000),
+    (0.84838202, 0.88133656, 1.00000000),
+    (0.84400201, 0.87850286, 1.00000000),
+    (0.83975120, 0.87574628, 1.00000000),  # 9000 K
+    (0.83562426, 0.87306384, 1.00000000),
+    (0.83161612, 0.87045274, 1.00000000),
+    (0.82772199, 0.86791027, 1.00000000),
+    (0.82393732, 0.86543391, 1.00000000),
+    (0.82025779, 0.86302121, 1.00000000),
+    (0.81667932, 0.86066985, 1.00000000),
+    (0.81319799, 0.85837765, 1.00000000),
+    (0.80981010, 0.85614248, 1.00000000),
+    (0.80651214, 0.85396234, 1.00000000),
+    (0.80330074, 0.85183532, 1.00000000),  # 10000 K
+    (0.80017271, 0.84975958, 1.00000000),
+    (0.79712500, 0.84773338, 1.00000000),
+    (0.79415471, 0.84575503, 1.00000000),
+    (0.79125907, 0.84382295, 1.00000000),
+    (0.78843544, 0.84193559, 1.00000000),
+    (0.78568130, 0.84009149, 1.00000000),
+    (0.78299422, 0.83828925, 1.00000000),
+    (0.78037192, 0.83652752, 1.00000000),
+    (0.77781218, 0.83480501, 1.00000000),
+    (0.77531289, 0.83312047, 1.00000000),  # 11000 K
+    (0.77287205, 0.83147273, 1.00000000),
+    (0.77048772, 0.82986065, 1.00000000),
+    (0.76815805, 0.82828312, 1.00000000),
+    (0.76588127, 0.82673910, 1.00000000),
+    (0.76365567, 0.82522757, 1.00000000),
+    (0.76147964, 0.82374757, 1.00000000),
+    (0.75935160, 0.82229817, 1.00000000),
+    (0.75727006, 0.82087845, 1.00000000),
+    (0.75523357, 0.81948757, 1.00000000),
+    (0.75324076, 0.81812468, 1.00000000),  # 12000 K
+    (0.75129030, 0.81678898, 1.00000000),
+    (0.74938090, 0.81547971, 1.00000000),
+    (0.74751135, 0.81419612, 1.00000000),
+    (0.74568046, 0.81293748, 1.00000000),
+    (0.74388709, 0.81170312, 1.00000000),
+    (0.74213015, 0.81049237, 1.00000000),
+    (0.74040859, 0.80930457, 1.00000000),
+    (0.73872140, 0.80813912, 1.00000000),
+    (0.73706759, 0.80699541, 1.00000000),
+    (0.73544623, 0.80587286, 1.00000000),  # 13000 K
+    (0.73385642, 0.80477092, 1.00000000),
+    (0.73229727, 0.80368904, 1.00000000),
+    (0.73076794, 0.80262671, 1.00000000),
+    (0.72926763, 0.80158341, 1.00000000),
+    (0.72779554, 0.80055867, 1.00000000),
+    (0.72635092, 0.79955201, 1.00000000),
+    (0.72493304, 0.79856298, 1.00000000),
+    (0.72354118, 0.79759113, 1.00000000),
+    (0.72217467, 0.79663604, 1.00000000),
+    (0.72083285, 0.79569729, 1.00000000),  # 14000 K
+    (0.71951508, 0.79477448, 1.00000000),
+    (0.71822074, 0.79386724, 1.00000000),
+    (0.71694924, 0.79297517, 1.00000000),
+    (0.71569999, 0.79209792, 1.00000000),
+    (0.71447245, 0.79123514, 1.00000000),
+    (0.71326608, 0.79038647, 1.00000000),
+    (0.71208034, 0.78955161, 1.00000000),
+    (0.71091473, 0.78873021, 1.00000000),
+    (0.70976877, 0.78792197, 1.00000000),
+    (0.70864198, 0.78712658, 1.00000000),  # 15000 K
+    (0.70753389, 0.78634376, 1.00000000),
+    (0.70644407, 0.78557322, 1.00000000),
+    (0.70537208, 0.78481468, 1.00000000),
+    (0.70431750, 0.78406788, 1.00000000),
+    (0.70327993, 0.78333254, 1.00000000),
+    (0.70225896, 0.78260843, 1.00000000),
+    (0.70125423, 0.78189529, 1.00000000),
+    (0.70026536, 0.78119288, 1.00000000),
+    (0.69929198, 0.78050098, 1.00000000),
+    (0.69833375, 0.77981935, 1.00000000),  # 16000 K
+    (0.69739034, 0.77914778, 1.00000000),
+    (0.69646140, 0.77848605, 1.00000000),
+    (0.69554662, 0.77783396, 1.00000000),
+    (0.69464569, 0.77719130, 1.00000000),
+    (0.69375831, 0.77655788, 1.00000000),
+    (0.69288418, 0.77593351, 1.00000000),
+    (0.69202302, 0.77531799, 1.00000000),
+    (0.69117455, 0.77471115, 1.00000000),
+    (0.69033850, 0.77411282, 1.00000000),
+    (0.68951461, 0.77352281, 1.00000000),  # 17000 K
+    (0.68870262, 0.77294097, 1.00000000),
+    (0.68790229, 0.77236712, 1.00000000),
+    (0.68711337, 0.77180112, 1.00000000),
+    (0.68633563, 0.77124281, 1.00000000),
+    (0.68556884, 0.77069203, 1.00000000),
+    (0.68481277, 0.77014864, 1.00000000),
+    (0.68406722, 0.76961250, 1.00000000),
+    (0.68333196, 0.76908346, 1.00000000),
+    (0.68260680, 0.76856139, 1.00000000),
+    (0.68189153, 0.76804616, 1.00000000),  # 18000 K
+    (0.68118596, 0.76753764, 1.00000000),
+    (0.68048989, 0.76703570, 1.00000000),
+    (0.67980314, 0.76654021, 1.00000000),
+    (0.67912554, 0.76605107, 1.00000000),
+    (0.67845690, 0.76556815, 1.00000000),
+    (0.67779705, 0.76509133, 1.00000000),
+    (0.67714583, 0.76462051, 1.00000000),
+    (0.67650307, 0.76415557, 1.00000000),
+    (0.67586861, 0.76369641, 1.00000000),
+    (0.67524229, 0.76324293, 1.00000000),  # 19000 K
+    (0.67462398, 0.76279502, 1.00000000),
+    (0.67401351, 0.76235258, 1.00000000),
+    (0.67341074, 0.76191552, 1.00000000),
+    (0.67281553, 0.76148374, 1.00000000),
+    (0.67222775, 0.76105716, 1.00000000),
+    (0.67164726, 0.76063567, 1.00000000),
+    (0.67107392, 0.76021919, 1.00000000),
+    (0.67050761, 0.75980764, 1.00000000),
+    (0.66994821, 0.75940092, 1.00000000),
+    (0.66939559, 0.75899897, 1.00000000),  # 20000 K
+    (0.66884964, 0.75860169, 1.00000000),
+    (0.66831023, 0.75820900, 1.00000000),
+    (0.66777725, 0.75782084, 1.00000000),
+    (0.66725059, 0.75743712, 1.00000000),
+    (0.66673014, 0.75705778, 1.00000000),
+    (0.66621580, 0.75668273, 1.00000000),
+    (0.66570746, 0.75631190, 1.00000000),
+    (0.66520501, 0.75594524, 1.00000000),
+    (0.66470837, 0.75558267, 1.00000000),
+    (0.66421742, 0.75522412, 1.00000000),  # 21000 K
+    (0.66373209, 0.75486953, 1.00000000),
+    (0.66325226, 0.75451883, 1.00000000),
+    (0.66277786, 0.75417197, 1.00000000),
+    (0.66230879, 0.75382888, 1.00000000),
+    (0.66184496, 0.75348950, 1.00000000),
+    (0.66138630, 0.75315378, 1.00000000),
+    (0.66093271, 0.75282165, 1.00000000),
+    (0.66048411, 0.75249306, 1.00000000),
+    (0.66004043, 0.75216796, 1.00000000),
+    (0.65960158, 0.75184629, 1.00000000),  # 22000 K
+    (0.65916749, 0.75152800, 1.00000000),
+    (0.65873809, 0.75121304, 1.00000000),
+    (0.65831329, 0.75090135, 1.00000000),
+    (0.65789303, 0.75059289, 1.00000000),
+    (0.65747724, 0.75028761, 1.00000000),
+    (0.65706584, 0.74998546, 1.00000000),
+    (0.65665878, 0.74968639, 1.00000000),
+    (0.65625597, 0.74939036, 1.00000000),
+    (0.65585737, 0.74909733, 1.00000000),
+    (0.65546289, 0.74880724, 1.00000000),  # 23000 K
+    (0.65507249, 0.74852005, 1.00000000),
+    (0.65468610, 0.74823573, 1.00000000),
+    (0.65430366, 0.74795423, 1.00000000),
+    (0.65392510, 0.74767551, 1.00000000),
+    (0.65355038, 0.74739953, 1.00000000),
+    (0.65317944, 0.74712625, 1.00000000),
+    (0.65281221, 0.74685564, 1.00000000),
+    (0.65244865, 0.74658764, 1.00000000),
+    (0.65208870, 0.74632224, 1.00000000),
+    (0.65173232, 0.74605938, 1.00000000),  # 24000 K
+    (0.65137944, 0.74579904, 1.00000000),
+    (0.65103001, 0.74554118, 1.00000000),
+    (0.65068400, 0.74528576, 1.00000000),
+    (0.65034134, 0.74503276, 1.00000000),
+    (0.65000200, 0.74478213, 1.00000000),
+    (0.64966592, 0.74453385, 1.00000000),
+    (0.64933306, 0.74428788, 1.00000000),
+    (0.64900337, 0.74404419, 1.00000000),
+    (0.64867681, 0.74380276, 1.00000000),
+    (0.64835334, 0.74356354, 1.00000000),  # 25000 K
+)
+
+def whitepoint(temp):
+    """
+    Zwraca punkt bieli (R, G, B) interpolowany liniowo z tablicy.
+    """
+    pos = (max(TEMP_MIN, min(TEMP_MAX, temp)) - TEMP_MIN) / TEMP_STEP
+    idx = min(int(pos), len(BLACKBODY_COLOR) - 2)
+    alpha = pos - idx
+    return tuple(a * (1 - alpha) + b * alpha for a, b in zip(BLACKBODY_COLOR[idx], BLACKBODY_COLOR[idx + 1]))
+
+def nearest_temperature(white):
+    """
+    Temperatura z tablicy, której punkt bieli jest najbliższy podanemu - dla poleceń redshift,
+    które przyjmują tylko temperaturę.
+    """
+    best = min(range(len(BLACKBODY_COLOR)),
+               key=lambda i: sum((a - b) ** 2 for a, b in zip(BLACKBODY_COLOR[i], white)))
+    return TEMP_MIN + best * TEMP_STEP
+
+@functools.lru_cache(maxsize=256)
+def _cached_ramps(temp_q, brightness, gamma, size):
+    # jak colorramp_fill w redshift: (x * jasność * biel) ** (1 / gamma), x = i / rozmiar;
+    # temp_q None - neutralny punkt bieli (1, 1, 1), czyli rampa tożsamościowa jak redshift -x;
+    # krotka - gotowy punkt bieli (klatki płynnego przejścia do kolorów neutralnych)
+    if temp_q is None:
+        white = (1.0, 1.0, 1.0)
+    elif isinstance(temp_q, tuple):
+        white = temp_q
+    else:
+        white = whitepoint(temp_q)
+    np = _numpy()
+    if np is not None:
+        base = np.arange(size, dtype=np.float64) / size
+        ramps = []
+        for w, g in zip(white, gamma):
+            ramp = (np.power(base * (brightness * w), 1.0 / g) * 65536).astype(np.uint16)
+            ramp.flags.writeable = False
+            ramps.append(ramp)
+        return tuple(ramps)
+    return tuple(
+        array.array('H', (int((i / size * brightness * w) ** (1.0 / g) * 65536) for i in range(size)))
+        for w, g in zip(white, gamma)
+    )
+
+def compute_gamma_ramps(temp, brightness, gamma, size=256):
+    """
+    Oblicza rampy R/G/B (wartości 16-bitowe) dla temperatury, jasności i trójki gamma.
+    temp None - bez korekty temperatury (neutralny punkt bieli), krotka (R, G, B) - podany
+    punkt bieli. Wyniki są zapamiętywane dla skwantyzowanych parametrów.
+    """
+    if temp is None:
+        temp_q = None
+    elif isinstance(temp, tuple):
+        temp_q = tuple(round(float(w), 4) for w in temp)
+    else:
+        temp_q = int(round(temp / TEMP_QUANTUM)) * TEMP_QUANTUM
+    brightness = round(max(0.1, min(1.0, float(brightness))), 2)
+    gamma = tuple(round(max(0.1, float(g)), 2) for g in gamma)
+    return _cached_ramps(temp_q, brightness, gamma, size)
+
+def _buffer_address(ramp):
+    np = _numpy()
+    if np is not None and isinstance(ramp, np.ndarray):
+        return ramp.ctypes.data
+    return ramp.buffer_info()[0]
+
+class NullGammaBackend:
+    """
+    Backend bez wyjścia - zapamiętuje ostatnie rampy (testy, tryb headless).
+    """
+    def __init__(self, crtcs=((0, 256),)):
+        self._crtcs = list(crtcs)
+        self.ramps = {}
+
+    def crtcs(self):
+        return self._crtcs
+
+    def set_ramps(self, crtc, red, green, blue):
+        self.ramps[crtc] = (red, green, blue)
+
+    def flush(self):
+        pass
+
+class FileGammaBackend(NullGammaBackend):
+    """
+    Backend zapisujący rampy do pliku tekstowego (po jednej linii na kanał).
+    """
+    def __init__(self, path, crtcs=((0, 256),)):
+        super().__init__(crtcs)
+        self.path = path
+
+    def flush(self):
+        try:
+            with open(self.path, "w", encoding="utf-8") as f:
+                for crtc, ramps in sorted(self.ramps.items()):
+                    for name, ramp in zip("RGB", ramps):
+                        f.write(f"{crtc} {name} {' '.join(map(str, ramp))}\n")
+        except OSError as e:
+            raise GammaBackendError(str(e))
+
+class _XRRScreenResources(ctypes.Structure):
+    _fields_ = [
+        ("timestamp", ctypes.c_ulong), ("configTimestamp", ctypes.c_ulong),
+        ("ncrtc", ctypes.c_int), ("crtcs", ctypes.POINTER(ctypes.c_ulong)),
+        ("noutput", ctypes.c_int), ("outputs", ctypes.POINTER(ctypes.c_ulong)),
+        ("nmode", ctypes.c_int), ("modes", ctypes.c_void_p),
+    ]
+
+class _XRRCrtcGamma(ctypes.Structure):
+    _fields_ = [
+        ("size", ctypes.c_int), ("red", ctypes.POINTER(ctypes.c_ushort)),
+        ("green", ctypes.POINTER(ctypes.c_ushort)), ("blue", ctypes.POINTER(ctypes.c_ushort)),
+    ]
+
+class XRandRGammaBackend:
+    """
+    Backend ustawiający rampy bezpośrednio przez Xlib/XRandR (ctypes).
+    """
+    def __init__(self, display_name=None):
+        x11_path = ctypes.util.find_library("X11")
+        xrandr_path = ctypes.util.find_library("Xrandr")
+        if not x11_path or not xrandr_path:
+            raise GammaBackendError("Brak bibliotek libX11/libXrandr.")
+        self.x11 = ctypes.CDLL(x11_path)
+        self.xrandr = ctypes.CDLL(xrandr_path)
+        self.x11.XOpenDisplay.restype = ctypes.c_void_p
+        self.x11.XOpenDisplay.argtypes = [ctypes.c_char_p]
+        self.x11.XDefaultRootWindow.restype = ctypes.c_ulong
+        self.x11.XDefaultRootWindow.argtypes = [ctypes.c_void_p]
+        self.x11.XFlush.argtypes = [ctypes.c_void_p]
+        self.xrandr.XRRGetScreenResourcesCurrent.restype = ctypes.POINTER(_XRRScreenResources)
+        self.xrandr.XRRGetScreenResourcesCurrent.argtypes = [ctypes.c_void_p, ctypes.c_ulong]
+        self.xrandr.XRRFreeScreenResources.argtypes = [ctypes.POINTER(_XRRScreenResources)]
+        self.xrandr.XRRGetCrtcGammaSize.argtypes = [ctypes.c_void_p, ctypes.c_ulong]
+        self.xrandr.XRRAllocGamma.restype = ctypes.POINTER(_XRRCrtcGamma)
+        self.xrandr.XRRAllocGamma.argtypes = [ctypes.c_int]
+        self.xrandr.XRRSetCrtcGamma.argtypes = [ctypes.c_void_p, ctypes.c_ulong, ctypes.POINTER(_XRRCrtcGamma)]
+        self.xrandr.XRRFreeGamma.argtypes = [ctypes.POINTER(_XRRCrtcGamma)]
+        name = display_name.encode() if display_name else None
+        self.display = self.x11.XOpenDisplay(name)
+        if not self.display:
+            raise GammaBackendError("Nie można połączyć się z serwerem X.")
+        self._crtcs = None
+
+    def crtcs(self):
+        if self._crtcs is None:
+            root = self.x11.XDefaultRootWindow(self.display)
+            res = self.xrandr.XRRGetScreenResourcesCurrent(self.display, root)
+            if not res:
+                raise GammaBackendError("Nie można odczytać zasobów XRandR.")
+            try:
+                ids = [res.contents.crtcs[i] for i in range(res.contents.ncrtc)]
+            finally:
+                self.xrandr.XRRFreeScreenResources(res)
+            self._crtcs = [(crtc, self.xrandr.XRRGetCrtcGammaSize(self.display, crtc)) for crtc in ids]
+        return self._crtcs
+
+    def set_ramps(self, crtc, red, green, blue):
+        size = len(red)
+        gamma = self.xrandr.XRRAllocGamma(size)
+        if not gamma:
+            raise GammaBackendError("Nie można zaalokować rampy gamma.")
+        try:
+            for dst, ramp in ((gamma.contents.red, red), (gamma.contents.green, green), (gamma.contents.blue, blue)):
+                ctypes.memmove(dst, _buffer_address(ramp), size * 2)
+            self.xrandr.XRRSetCrtcGamma(self.display, crtc, gamma)
+        finally:
+            self.xrandr.XRRFreeGamma(gamma)
+
+    def flush(self):
+        self.x11.XFlush(self.display)
+
+class GammaEngine:
+    """
+    Ustawia rampy gamma w procesie, korzystając z wybranego backendu wyjściowego.
+    """
+    def __init__(self, backend):
+        self.backend = backend
+
+    def outputs(self):
         """
-        Wczytuje konfigurację z pliku.
+        Zwraca indeksy wyjść (CRTC) dostępnych w backendzie.
         """
-        config = configparser.ConfigParser()
-        if not os.path.exists(self.config_path):
-            return None
-        try:
-            with open(self.config_path, "r", encoding="utf-8") as f:
-                config.read_file(f)
-            return config
-        except (OSError, configparser.Error) as e:
-            print(f"Błąd podczas wczytywania konfiguracji: {e}")
-            return None
+        return list(range(len(self.backend.crtcs())))
 
-    def save_config(self, redshift_data, manual_data):
+    def apply(self, temp, brightness, gamma, outputs=None):
         """
-        Zapisuje konfigurację do pliku w kodowaniu UTF-8.
+        Ustawia rampy na wszystkich wyjściach albo tylko na podanych indeksach CRTC.
+        temp None - rampy tożsamościowe (neutralne kolory).
+        """
+        for index, (crtc, size) in enumerate(self.backend.crtcs()):
+            if outputs is not None and index not in outputs:
+                continue
+            if size > 1:
+                self.backend.set_ramps(crtc, *compute_gamma_ramps(temp, brightness, gamma, size))
+        self.backend.flush()
+
+# --- Położenie słońca i harmonogram trybu automatycznego ---
+
+ELEVATION_DAY = 3.0     # powyżej: pełne ustawienia dzienne (jak w redshift)
+ELEVATION_NIGHT = -6.0  # poniżej: pełne ustawienia nocne
+TEMP_PERCEPTIBLE = 25   # najmniejsza zauważalna zmiana temperatury (K)
+BRIGHT_PERCEPTIBLE = 0.01
+MINUTES_PER_DAY = 24 * 60
+
+def _local_midnight_timestamp(date):
+    """
+    Zwraca znacznik czasu (UTC) lokalnej północy dla podanej daty.
+    """
+    return datetime.datetime.combine(date, datetime.time()).astimezone().timestamp()
+
+def solar_elevation(timestamp, lat, lon):
+    """
+    Wysokość słońca nad horyzontem (stopnie) w danej chwili.
+    """
+    n = timestamp / 86400.0 + 2440587.5 - 2451545.0
+    mean_lon = math.radians((280.460 + 0.9856474 * n) % 360)
+    anomaly = math.radians((357.528 + 0.9856003 * n) % 360)
+    ecl_lon = mean_lon + math.radians(1.915 * math.sin(anomaly) + 0.020 * math.sin(2 * anomaly))
+    obliquity = math.radians(23.439 - 0.0000004 * n)
+    ra = math.atan2(math.cos(obliquity) * math.sin(ecl_lon), math.cos(ecl_lon))
+    dec = math.asin(math.sin(obliquity) * math.sin(ecl_lon))
+    sidereal = math.radians(((18.697374558 + 24.06570982441908 * n) % 24) * 15 + lon)
+    hour_angle = sidereal - ra
+    lat_r = math.radians(lat)
+    return math.degrees(math.asin(
+        math.sin(lat_r) * math.sin(dec) + math.cos(lat_r) * math.cos(dec) * math.cos(hour_angle)
+    ))
+
+def _solar_elevation_np(timestamps, lat, lon):
+    np = _numpy()
+    n = timestamps / 86400.0 + 2440587.5 - 2451545.0
+    mean_lon = np.radians((280.460 + 0.9856474 * n) % 360)
+    anomaly = np.radians((357.528 + 0.9856003 * n) % 360)
+    ecl_lon = mean_lon + np.radians(1.915 * np.sin(anomaly) + 0.020 * np.sin(2 * anomaly))
+    obliquity = np.radians(23.439 - 0.0000004 * n)
+    ra = np.arctan2(np.cos(obliquity) * np.sin(ecl_lon), np.cos(ecl_lon))
+    dec = np.arcsin(np.sin(obliquity) * np.sin(ecl_lon))
+    sidereal = np.radians(((18.697374558 + 24.06570982441908 * n) % 24) * 15 + lon)
+    lat_r = math.radians(lat)
+    return np.degrees(np.arcsin(
+        math.sin(lat_r) * np.sin(dec) + math.cos(lat_r) * np.cos(dec) * np.cos(sidereal - ra)
+    ))
+
+@functools.lru_cache(maxsize=16)
+def solar_elevation_day(lat, lon, date):
+    """
+    Wysokość słońca dla każdej minuty lokalnej doby - obliczana jednym przebiegiem
+    i zapamiętywana dla (lat, lon, data).
+    """
+    start = _local_midnight_timestamp(date)
+    np = _numpy()
+    if np is not None:
+        elevations = _solar_elevation_np(start + 60.0 * np.arange(MINUTES_PER_DAY), lat, lon)
+        elevations.flags.writeable = False
+        return elevations
+    return tuple(solar_elevation(start + 60.0 * i, lat, lon) for i in range(MINUTES_PER_DAY))
+
+def transition_curve(elevations, t_day, t_night, b_day, b_night):
+    """
+    Przelicza wysokości słońca na listę par (temperatura, jasność) - dzień, noc lub przejście.
+    """
+    curve = []
+    for elev in elevations:
+        alpha = (elev - ELEVATION_NIGHT) / (ELEVATION_DAY - ELEVATION_NIGHT)
+        alpha = max(0.0, min(1.0, alpha))
+        curve.append((
+            int(round(t_night + (t_day - t_night) * alpha)),
+            round(b_night + (b_day - b_night) * alpha, 2),
+        ))
+    return curve
+
+@functools.lru_cache(maxsize=8)
+def day_curve(lat, lon, date, t_day, t_night, b_day, b_night):
+    """
+    Temperatura i jasność dla każdej minuty doby jako dwie sekwencje (temps, brights).
+    Z NumPy liczone jednym wektorowym przebiegiem po wysokościach słońca.
+    """
+    elevations = solar_elevation_day(lat, lon, date)
+    np = _numpy()
+    if np is None:
+        curve = transition_curve(elevations, t_day, t_night, b_day, b_night)
+        return tuple(t for t, _ in curve), tuple(b for _, b in curve)
+    alpha = np.clip((elevations - ELEVATION_NIGHT) / (ELEVATION_DAY - ELEVATION_NIGHT), 0.0, 1.0)
+    temps = np.rint(t_night + (t_day - t_night) * alpha).astype(int)
+    brights = np.round(b_night + (b_day - b_night) * alpha, 2)
+    temps.flags.writeable = False
+    brights.flags.writeable = False
+    return temps, brights
+
+class AutoScheduler:
+    """
+    Tryb automatyczny w procesie: stosuje krzywą dnia przez GammaEngine i uzbraja
+    jeden budzik zegarowy (WallClockTimer) na chwilę, w której wartość zmieni się
+    o zauważalny krok - po uśpieniu lub przestawieniu zegara wartość jest liczona od nowa.
+    gamma - trójka z sekcji [redshift], tak jak w procesie redshift -l.
+    """
+    def __init__(self, engine, lat, lon, t_day, t_night, b_day, b_night, on_change=None,
+                 gamma=(1.0, 1.0, 1.0)):
+        self.engine = engine
+        self.lat, self.lon = float(lat), float(lon)
+        self.params = (int(t_day), int(t_night), float(b_day), float(b_night))
+        self.gamma = tuple(float(g) for g in gamma)
+        self.on_change = on_change
+        self.current = None
+        self.brightness_override = None  # jasność adaptacyjna zastępuje jasność z krzywej
+        self._timer = None
+        self._curve_date = None
+        self._curve = None
+
+    def curve_for(self, date):
+        """
+        Zwraca krzywą dnia (temperatury, jasności) - po jednej wartości na minutę doby.
+        """
+        if date != self._curve_date:
+            self._curve = day_curve(self.lat, self.lon, date, *self.params)
+            self._curve_date = date
+        return self._curve
+
+    def start(self):
+        self._timer = WallClockTimer(self._on_timer)
+        self._update()
+
+    def stop(self):
+        if self._timer is not None:
+            self._timer.close()
+            self._timer = None
+
+    def set_brightness_override(self, bright):
+        """
+        Ustala jasność niezależnie od krzywej (None - jasność z krzywej) i od razu ją stosuje.
+        """
+        self.brightness_override = bright
+        if self._timer is not None:
+            self._update()
+
+    def _on_timer(self, clock_changed):
+        self._update()
+
+    def _update(self):
+        now = datetime.datetime.now()
+        curve = self.curve_for(now.date())
+        idx = now.hour * 60 + now.minute
+        temps, brights = curve
+        value = (int(temps[idx]), float(brights[idx]))
+        if self.brightness_override is not None:
+            value = (value[0], self.brightness_override)
+        if value != self.current:
+            try:
+                self.engine.apply(value[0], value[1], self.gamma)
+            except GammaBackendError as e:
+                print(f"Błąd ustawiania rampy gamma: {e}")
+            self.current = value
+            if self.on_change:
+                self.on_change(*value)
+        self._arm_next(now, curve, idx)
+
+    def _arm_next(self, now, curve, idx):
+        temp, bright = self.current
+        temps, brights = curve
+        follow_brightness = self.brightness_override is None
+        next_idx = MINUTES_PER_DAY  # domyślnie: przeliczenie o północy
+        np = _numpy()
+        if np is not None and isinstance(temps, np.ndarray):
+            changed = np.abs(temps[idx + 1:] - temp) >= TEMP_PERCEPTIBLE
+            if follow_brightness:
+                changed |= np.abs(brights[idx + 1:] - bright) >= BRIGHT_PERCEPTIBLE
+            hits = np.flatnonzero(changed)
+            if hits.size:
+                next_idx = idx + 1 + int(hits[0])
+        else:
+            for i in range(idx + 1, MINUTES_PER_DAY):
+                if (abs(temps[i] - temp) >= TEMP_PERCEPTIBLE
+                        or follow_brightness and abs(brights[i] - bright) >= BRIGHT_PERCEPTIBLE):
+                    next_idx = i
+                    break
+        midnight = datetime.datetime.combine(now.date(), datetime.time())
+        deadline = midnight + datetime.timedelta(minutes=next_idx)
+        self._timer.arm(max(deadline.timestamp(), time.time() + 1))
+
+# --- Pomiary opóźnień ---
+
+LATENCY_BUCKETS_MS = (1, 2, 5, 10, 20, 50, 100, 200, 500, 1000, 2000, 5000)
+
+class LatencyMetrics:
+    """
+    Ograniczony bufor cykliczny pomiarów wywołań (redshift, zatrzymywanie, status, gamma)
+    z percentylami i histogramem dla każdego rodzaju polecenia.
+    """
+    def __init__(self, capacity=512):
+        self.records = collections.deque(maxlen=capacity)
+
+    def record(self, kind, started, duration_ms, returncode=None, stderr_bytes=0, cmd=None):
+        """
+        Zapisuje pomiar; started to czas rozpoczęcia (time.time()).
+        """
+        self.records.append({
+            "kind": kind,
+            "cmd": list(cmd) if cmd else None,
+            "spawned": started,
+            "exited": started + duration_ms / 1000.0,
+            "duration_ms": duration_ms,
+            "returncode": returncode,
+            "stderr_bytes": stderr_bytes,
+        })
+
+    def measure(self, kind, cmd=None):
+        """
+        Rozpoczyna pomiar; zwraca funkcję finish(returncode=None, stderr_bytes=0).
+        """
+        started, start = time.time(), time.perf_counter()
+
+        def finish(returncode=None, stderr_bytes=0):
+            self.record(kind, started, (time.perf_counter() - start) * 1000.0, returncode, stderr_bytes, cmd)
+
+        return finish
+
+    def wrap_handler(self, name, func):
+        """
+        Opakowuje callback (np. handler sygnału GTK), mierząc czas jego wykonania w pętli głównej.
+        """
+        @functools.wraps(func)
+        def wrapper(*args, **kwargs):
+            finish = self.measure(f"handler:{name}")
+            try:
+                return func(*args, **kwargs)
+            finally:
+                finish()
+        return wrapper
+
+    def summary(self):
+        """
+        Zwraca słownik rodzaj -> {n, p50, p95, p99, max, histogram} (czasy w ms).
+        """
+        by_kind = collections.defaultdict(list)
+        for rec in self.records:
+            by_kind[rec["kind"]].append(rec["duration_ms"])
+        result = {}
+        for kind, samples in sorted(by_kind.items()):
+            samples.sort()
+
+            def pct(p):
+                return samples[min(len(samples) - 1, int(math.ceil(p / 100.0 * len(samples))) - 1)]
+
+            histogram = collections.Counter()
+            for value in samples:
+                bucket = next((f"<{b}" for b in LATENCY_BUCKETS_MS if value < b), f">={LATENCY_BUCKETS_MS[-1]}")
+                histogram[bucket] += 1
+            result[kind] = {
+                "n": len(samples), "p50_ms": pct(50), "p95_ms": pct(95), "p99_ms": pct(99),
+                "max_ms": samples[-1], "histogram": dict(histogram),
+            }
+        return result
+
+    def to_json(self):
+        return json.dumps({"summary": self.summary(), "records": list(self.records)}, indent=2)
+
+    def dump(self, path):
+        """
+        Zapisuje pomiary do pliku JSON. Zwraca (success, error).
         """
-        config = configparser.ConfigParser()
-        config['redshift'] = redshift_data
-        config['manual'] = manual_data
         try:
-            os.makedirs(os.path.dirname(self.config_path), exist_ok=True)
-            with open(self.config_path, 'w', encoding='utf-8') as configfile:
-                configfile.write("; Konfiguracja wygenerowana przez Kontroler Redshift\n")
-                config.write(configfile)
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+            with open(path, "w", encoding="utf-8") as f:
+                f.write(self.to_json())
             return True, None
         except OSError as e:
             return False, str(e)
 
-    def run_redshift(self, cmd, background=False):
+# --- Status procesów redshift (skanowanie /proc) ---
+
+REDSHIFT_VALUE_OPTIONS = "bcglmOt"  # opcje redshift przyjmujące argument
+
+RedshiftProcess = collections.namedtuple(
+    "RedshiftProcess", "pid argv mode location temps brightness"
+)
+
+def parse_redshift_argv(pid, argv):
+    """
+    Jednorazowo parsuje argv procesu redshift do struktury RedshiftProcess.
+    """
+    opts = {}
+    i = 1
+    while i < len(argv):
+        arg = argv[i]
+        if len(arg) >= 2 and arg[0] == "-" and arg[1] in REDSHIFT_VALUE_OPTIONS:
+            if len(arg) > 2:
+                opts[arg[1]] = arg[2:]
+                i += 1
+            else:
+                opts[arg[1]] = argv[i + 1] if i + 1 < len(argv) else ""
+                i += 2
+        else:
+            if len(arg) >= 2 and arg[0] == "-":
+                for flag in arg[1:]:
+                    opts[flag] = True
+            i += 1
+    if "O" in opts:
+        mode = "manual"
+    elif "x" in opts:
+        mode = "reset"
+    elif "p" in opts:
+        mode = "print"
+    else:
+        mode = "auto"
+
+    def pair(key):
+        parts = str(opts.get(key, "")).split(":")
+        return tuple(parts) if len(parts) == 2 and all(parts) else None
+
+    return RedshiftProcess(pid, tuple(argv), mode, pair("l"), pair("t"), pair("b"))
+
+class ProcessStatusMonitor:
+    """
+    Śledzi procesy redshift użytkownika: skanuje /proc bez uruchamiania pgrep,
+    zapamiętuje sparsowane argv i obserwuje zakończenie procesów przez pidfd.
+    """
+    def __init__(self, proc_root="/proc", on_change=None, metrics=None):
+        self.proc_root = proc_root
+        self.on_change = on_change
+        self.metrics = metrics
+        self.processes = {}
+        self._cache = {}   # (pid, czas startu) -> RedshiftProcess lub None
+        self._watches = {}  # pid -> (fd, id źródła GLib)
+
+    def _read(self, pid, name, mode="rb"):
+        with open(os.path.join(self.proc_root, str(pid), name), mode) as f:
+            return f.read()
+
+    def _inspect(self, pid):
+        stat = self._read(pid, "stat")
+        # czas startu (pole 22) odróżnia ponownie użyty PID
+        key = (pid, stat[stat.rfind(b")") + 2:].split()[19])
+        if key not in self._cache:
+            record = None
+            if (self._read(pid, "comm").strip() == b"redshift"
+                    and os.stat(os.path.join(self.proc_root, str(pid))).st_uid == os.getuid()):
+                argv = [a.decode("utf-8", "replace") for a in self._read(pid, "cmdline").split(b"\0") if a]
+                # skrypty (np. atrapy redshift) mają w argv najpierw interpreter
+                names = [os.path.basename(a) for a in argv]
+                if "redshift" in names:
+                    record = parse_redshift_argv(pid, argv[names.index("redshift"):])
+            self._cache[key] = record
+        return key, self._cache[key]
+
+    def scan(self):
         """
-        Uruchamia polecenie redshift.
+        Zwraca słownik PID -> RedshiftProcess dla działających procesów redshift.
         """
-        try:
-            if background:
-                subprocess.Popen(cmd, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
-            else:
-                subprocess.run(cmd, check=True, capture_output=True, text=True)
-            return True, None
-        except (subprocess.CalledProcessError, FileNotFoundError) as e:
-            return False, str(e)
+        found = {}
+        seen = set()
+        for entry in os.listdir(self.proc_root):
+            if not entry.isdigit():
+                continue
+            pid = int(entry)
+            try:
+                key, record = self._inspect(pid)
+            except (OSError, IndexError):
+                continue
+            seen.add(key)
+            if record is not None:
+                found[pid] = record
+        self._cache = {k: v for k, v in self._cache.items() if k in seen}
+        return found
 
-    def kill_redshift(self):
+    def refresh(self):
         """
-        Zatrzymuje wszystkie procesy redshift.
+        Skanuje /proc, uzbraja obserwację zakończenia nowych procesów i zgłasza stan.
         """
+        finish = self.metrics.measure("status") if self.metrics else None
+        self.processes = self.scan()
+        if finish:
+            finish()
+        for pid in list(self._watches):
+            if pid not in self.processes:
+                self._unwatch(pid)
+        for pid in self.processes:
+            if pid not in self._watches:
+                self._watch(pid)
+        if self.on_change:
+            self.on_change(self.processes)
+        return self.processes
+
+    def _watch(self, pid):
         try:
-            subprocess.run(["killall", "redshift"], stderr=subprocess.DEVNULL)
-        except Exception:
-            pass  # Brak procesu nie jest błędem krytycznym
+            fd = os.pidfd_open(pid)
+        except (AttributeError, OSError):
+            return  # bez pidfd stan odświeżany jest tylko przy zdarzeniach programu
+        source_id = GLib.unix_fd_add_full(GLib.PRIORITY_DEFAULT, fd, GLib.IOCondition.IN,
+                                          self._on_process_exited, pid)
+        self._watches[pid] = (fd, source_id)
 
-    def kill_redshift_gtk(self):
+    def _unwatch(self, pid):
+        fd, source_id = self._watches.pop(pid)
+        GLib.source_remove(source_id)
+        os.close(fd)
+
+    def _on_process_exited(self, fd, condition, pid):
+        self._watches.pop(pid, None)
+        os.close(fd)
+        self.processes.pop(pid, None)
+        if self.on_change:
+            self.on_change(self.processes)
+        return False
+
+# --- Nadzór nad uruchomionymi procesami redshift ---
+
+SIGKILL_WAIT = 0.5  # czas oczekiwania (s) na zakończenie procesu po SIGKILL
+
+class _SupervisedProcess:
+    """
+    Proces redshift pod nadzorem: uchwyt Gio.Subprocess (własne dzieci) albo pidfd (przejęte).
+    """
+    def __init__(self, pid, cmd=None, proc=None, pidfd=None, restart=False, on_exit=None, backoff=1.0):
+        self.pid = pid
+        self.cmd = cmd
+        self.proc = proc
+        self.pidfd = pidfd
+        self.restart = restart
+        self.on_exit = on_exit
+        self.backoff = backoff
+        self.started = time.monotonic()
+        self.stopping = False
+        self.exited = False
+        self.waiters = []
+        self.kill_timer = 0
+        self.watch_id = 0
+
+    def send_signal(self, sig):
+        try:
+            if self.proc is not None:
+                self.proc.send_signal(sig)
+            else:
+                signal.pidfd_send_signal(self.pidfd, sig)
+        except (OSError, GLib.Error):
+            pass  # proces mógł się już zakończyć
+
+class RedshiftSupervisor:
+    """
+    Właściciel procesów redshift uruchomionych przez program: zatrzymuje je SIGTERM,
+    czeka na faktyczne zakończenie (po przekroczeniu czasu - SIGKILL) i wznawia
+    po awarii z wykładniczym opóźnieniem. Nie dotyka procesów, których nie nadzoruje.
+    """
+    def __init__(self, stop_timeout=2.0, backoff_initial=1.0, backoff_max=60.0, stable_time=30.0):
+        self.stop_timeout = stop_timeout
+        self.backoff_initial = backoff_initial
+        self.backoff_max = backoff_max
+        self.stable_time = stable_time
+        self.entries = {}
+        self._restart_timers = set()
+
+    def start(self, cmd, restart=False, on_exit=None, backoff=None):
         """
-        Zatrzymuje redshift-gtk (na starcie programu).
+        Uruchamia proces pod nadzorem. Zwraca (pid, error); pid 0 - proces zdążył się już
+        zakończyć (wynik i ewentualne wznowienie i tak obsługuje on_exit).
         """
+        flags = Gio.SubprocessFlags.STDOUT_SILENCE | Gio.SubprocessFlags.STDERR_SILENCE
         try:
-            subprocess.run(["killall", "redshift-gtk"], stderr=subprocess.DEVNULL)
-        except Exception:
-            pass
+            proc = Gio.Subprocess.new(cmd, flags)
+        except GLib.Error as e:
+            return None, e.message
+        identifier = proc.get_identifier()
+        pid = int(identifier) if identifier is not None else 0
+        entry = _SupervisedProcess(pid, cmd, proc=proc, restart=restart, on_exit=on_exit,
+                                   backoff=backoff or self.backoff_initial)
+        if pid:
+            self.entries[pid] = entry
+        proc.wait_async(None, self._on_child_exited, entry)
+        return pid, None
 
-    @staticmethod
-    def validate_float(value, min_val, max_val):
+    def adopt(self, pid):
         """
-        Waliduje wartość zmiennoprzecinkową.
+        Przejmuje nadzór nad istniejącym procesem (przez pidfd), bez wznawiania po awarii.
         """
-        try:
-            val = float(value)
-            if not (min_val <= val <= max_val):
-                return False
+        if pid in self.entries:
             return True
-        except ValueError:
+        try:
+            pidfd = os.pidfd_open(pid)
+        except (AttributeError, OSError):
             return False
+        entry = _SupervisedProcess(pid, pidfd=pidfd)
+        entry.watch_id = GLib.unix_fd_add_full(GLib.PRIORITY_DEFAULT, pidfd, GLib.IOCondition.IN,
+                                               self._on_pidfd_ready, entry)
+        self.entries[pid] = entry
+        return True
 
-    @staticmethod
-    def validate_int(value, min_val, max_val):
-        """
-        Waliduje wartość całkowitą.
-        """
+    def _on_child_exited(self, proc, result, entry):
         try:
-            val = int(value)
-            if not (min_val <= val <= max_val):
-                return False
-            return True
-        except ValueError:
+            proc.wait_finish(result)
+        except GLib.Error:
+            pass
+        self._on_exited(entry, proc.get_successful())
+
+    def _on_pidfd_ready(self, fd, condition, entry):
+        entry.watch_id = 0
+        self._on_exited(entry, False)
+        return False
+
+    def _on_exited(self, entry, success):
+        if entry.exited:
+            return  # zakończenie już obsłużone
+        entry.exited = True
+        if self.entries.get(entry.pid) is entry:
+            del self.entries[entry.pid]
+        if entry.kill_timer:
+            GLib.source_remove(entry.kill_timer)
+            entry.kill_timer = 0
+        if entry.pidfd is not None:
+            if entry.watch_id:
+                GLib.source_remove(entry.watch_id)
+            os.close(entry.pidfd)
+            entry.pidfd = None
+        for waiter in entry.waiters:
+            waiter()
+        # wznawiamy tylko po awarii - czyste zakończenie (np. po zewnętrznym SIGTERM) jest zamierzone
+        if entry.restart and not entry.stopping and not success:
+            # proces, który działał stabilnie, wznawiamy od najkrótszego opóźnienia
+            if time.monotonic() - entry.started >= self.stable_time:
+                entry.backoff = self.backoff_initial
+            self._schedule_restart(entry)
+        if entry.on_exit:
+            entry.on_exit(success, None)
+
+    def _schedule_restart(self, entry):
+        timer = [0]
+
+        def restart():
+            self._restart_timers.discard(timer[0])
+            self.start(entry.cmd, True, entry.on_exit, min(entry.backoff * 2, self.backoff_max))
             return False
 
-class RedshiftController(Gtk.Window):
-    """
-    Klasa odpowiedzialna za GUI i interakcję z użytkownikiem.
-    """
-    def __init__(self):
-        Gtk.Window.__init__(self, title="Kontroler Redshift")
-        self.set_border_width(15)
-        self.set_default_size(500, 750)
-        self.cities_data = POLISH_CITIES
-        self.logic = RedshiftLogic()
-
-        vbox = Gtk.Box(orientation=Gtk.Orientation.VERTICAL, spacing=15)
-        self.add(vbox)
-
-        # Tworzenie interfejsu
-        self._create_auto_mode_section(vbox)
-        self._create_manual_mode_section(vbox)
-        self._create_action_buttons_section(vbox)
-        self._create_status_section(vbox)
-        self._create_config_save_section(vbox)
-
-        self.load_config_on_startup()
-        self.check_and_update_status()
-
-    # --- Sekcja GUI ---
-
-    def _create_auto_mode_section(self, parent_box):
-        frame = Gtk.Frame(label=" Ustawienia Trybu Automatycznego ")
-        parent_box.pack_start(frame, False, True, 0)
-        grid = Gtk.Grid(column_spacing=6, row_spacing=10)
-        grid.set_border_width(10)
-        frame.add(grid)
-        grid.attach(Gtk.Label(label="Wybierz miasto:"), 0, 0, 1, 1)
-        self.combo_cities = Gtk.ComboBoxText()
-        self.combo_cities.append_text("Wybierz z listy...")
-        for city in sorted(self.cities_data.keys()):
-            self.combo_cities.append_text(city)
-        self.combo_cities.set_active(0)
-        self.combo_cities.connect("changed", self.on_city_changed)
-        grid.attach(self.combo_cities, 1, 0, 3, 1)
-        grid.attach(Gtk.Label(label="Szerokość (LAT):"), 0, 1, 1, 1)
-        self.entry_lat = Gtk.Entry()
-        grid.attach(self.entry_lat, 1, 1, 3, 1)
-        grid.attach(Gtk.Label(label="Długość (LON):"), 0, 2, 1, 1)
-        self.entry_lon = Gtk.Entry()
-        grid.attach(self.entry_lon, 1, 2, 3, 1)
-        grid.attach(Gtk.Separator(orientation=Gtk.Orientation.HORIZONTAL), 0, 3, 4, 1)
-        # Pola z przyciskami +/- (refaktoryzacja)
-        self.entry_temp_day = self._create_adjustable_entry(grid, "Temp. dzień (K):", 4, "6500", -100, 100, False)
-        self.entry_temp_night = self._create_adjustable_entry(grid, "Temp. noc (K):", 5, "4500", -100, 100, False)
-        self.entry_bright_day = self._create_adjustable_entry(grid, "Jasność dzień:", 6, "1.0", -0.05, 0.05, True)
-        self.entry_bright_night = self._create_adjustable_entry(grid, "Jasność noc:", 7, "1.0", -0.05, 0.05, True)
-        btn_set_loc = Gtk.Button(label="Uruchom tryb automatyczny")
-        btn_set_loc.connect("clicked", self.on_set_location)
-        grid.attach(btn_set_loc, 0, 8, 4, 1)
-
-    def _create_manual_mode_section(self, parent_box):
-        frame = Gtk.Frame(label=" Kontrola Ręczna (Jednorazowy Efekt) ")
-        parent_box.pack_start(frame, False, True, 0)
-        grid = Gtk.Grid(column_spacing=10, row_spacing=10)
-        grid.set_border_width(10)
-        frame.add(grid)
-        # Suwaki temperatury i jasności
-        self.scale_temp = self._create_scale(grid, "Temperatura (K):", 0, 6500, 1000, 9000, 100, 0)
-        self.scale_bright = self._create_scale(grid, "Jasność:", 1, 1.0, 0.1, 1.0, 0.05, 2)
-        # Suwaki gamma
-        self.scale_gamma_r = self._create_scale(grid, "Gamma Czerwony (R):", 2, 1.0, 0.1, 2.0, 0.01, 2)
-        self.scale_gamma_g = self._create_scale(grid, "Gamma Zielony (G):", 3, 1.0, 0.1, 2.0, 0.01, 2)
-        self.scale_gamma_b = self._create_scale(grid, "Gamma Niebieski (B):", 4, 1.0, 0.1, 2.0, 0.01, 2)
-
-    def _create_action_buttons_section(self, parent_box):
-        hbox = Gtk.Box(orientation=Gtk.Orientation.HORIZONTAL, spacing=10)
-        parent_box.pack_start(hbox, False, True, 0)
-        btn_reset = Gtk.Button(label="Resetuj / Wyłącz")
-        btn_reset.get_style_context().add_class("destructive-action")
-        btn_reset.connect("clicked", self.on_reset)
-        btn_apply = Gtk.Button(label="Zastosuj ustawienia ręczne")
-        btn_apply.connect("clicked", self.on_apply_manual)
-        hbox.pack_start(btn_reset, True, True, 0)
-        hbox.pack_start(btn_apply, True, True, 0)
-
-    def _create_status_section(self, parent_box):
-        frame = Gtk.Frame(label=" Aktualny Status Redshift ")
-        parent_box.pack_start(frame, True, True, 0)
-        self.status_label = Gtk.Label(label="Sprawdzanie statusu...")
-        self.status_label.set_margin_top(10)
-        self.status_label.set_margin_bottom(10)
-        frame.add(self.status_label)
-
-    def _create_config_save_section(self, parent_box):
-        btn_save = Gtk.Button(label=f"Zapisz ustawienia w pliku ~/.config/redshift/redshift.conf")
-        btn_save.connect("clicked", self.on_save_config_clicked)
-        parent_box.pack_start(btn_save, False, True, 0)
-
-    # --- Metody pomocnicze GUI ---
-
-    def _create_adjustable_entry(self, grid, label, row, default_text, step_minus, step_plus, is_float):
-        """
-        Tworzy pole tekstowe z przyciskami +/- do regulacji wartości.
-        """
-        entry = Gtk.Entry()
-        entry.set_text(default_text)
-        btn_m = Gtk.Button(label="-")
-        btn_p = Gtk.Button(label="+")
-        btn_m.connect("clicked", lambda w: self._on_adjust_button_clicked(entry, step_minus, is_float))
-        btn_p.connect("clicked", lambda w: self._on_adjust_button_clicked(entry, step_plus, is_float))
-        grid.attach(Gtk.Label(label=label), 0, row, 1, 1)
-        grid.attach(entry, 1, row, 1, 1)
-        grid.attach(btn_m, 2, row, 1, 1)
-        grid.attach(btn_p, 3, row, 1, 1)
-        return entry
-
-    def _create_scale(self, grid, label, row, value, lower, upper, step, digits):
-        """
-        Tworzy suwak do regulacji wartości liczbowych.
-        """
-        adj = Gtk.Adjustment(value=value, lower=lower, upper=upper, step_increment=step, page_increment=step*2, page_size=0)
-        scale = Gtk.Scale(orientation=Gtk.Orientation.HORIZONTAL, adjustment=adj)
-        scale.set_digits(digits)
-        scale.set_hexpand(True)
-        grid.attach(Gtk.Label(label=label), 0, row, 1, 1)
-        grid.attach(scale, 1, row, 1, 1)
-        return scale
-
-    def _on_adjust_button_clicked(self, entry_widget, step, is_float=False):
-        """
-        Obsługuje kliknięcia przycisków +/- przy polach tekstowych.
-        """
-        try:
-            val = float(entry_widget.get_text()) if is_float else int(entry_widget.get_text())
-            new_val = val + step
-            if is_float:
-                entry_widget.set_text(f"{max(0.1, min(1.0, new_val)):.2f}")
-            else:
-                entry_widget.set_text(str(max(1000, min(25000, new_val))))
-        except ValueError:
-            entry_widget.set_text("1.0" if is_float else "6500")
+        timer[0] = GLib.timeout_add(int(entry.backoff * 1000), restart)
+        self._restart_timers.add(timer[0])
 
-    # --- Logika aplikacji ---
+    def _escalate(self, entry):
+        entry.kill_timer = 0
+        entry.send_signal(signal.SIGKILL)
+        return False
 
-    def load_config_on_startup(self):
+    def stop_all(self, callback=None, sig=signal.SIGTERM):
         """
-        Wczytuje konfigurację przy starcie programu.
+        Zatrzymuje wszystkie nadzorowane procesy; callback() po ich faktycznym zakończeniu.
         """
-        config = self.logic.load_config()
-        if not config:
+        for timer in self._restart_timers:
+            GLib.source_remove(timer)
+        self._restart_timers.clear()
+        entries = list(self.entries.values())
+        if not entries:
+            if callback:
+                callback()
             return
-        if 'redshift' in config:
-            self.entry_temp_day.set_text(config.get('redshift', 'temp-day', fallback='6500'))
-            self.entry_temp_night.set_text(config.get('redshift', 'temp-night', fallback='4500'))
-            self.entry_bright_day.set_text(config.get('redshift', 'brightness-day', fallback='1.0'))
-            self.entry_bright_night.set_text(config.get('redshift', 'brightness-night', fallback='1.0'))
-            gamma_str = config.get('redshift', 'gamma', fallback='1.0:1.0:1.0')
+        remaining = [len(entries)]
+
+        def on_stopped():
+            remaining[0] -= 1
+            if remaining[0] == 0 and callback:
+                callback()
+
+        for entry in entries:
+            entry.waiters.append(on_stopped)
+            if not entry.stopping:
+                entry.stopping = True
+                entry.send_signal(sig)
+                if sig != signal.SIGKILL:
+                    entry.kill_timer = GLib.timeout_add(int(self.stop_timeout * 1000), self._escalate, entry)
+
+    def stop_all_sync(self):
+        """
+        Synchroniczna wersja stop_all() - dla kodu działającego bez pętli GLib.
+        """
+        for timer in self._restart_timers:
+            GLib.source_remove(timer)
+        self._restart_timers.clear()
+        for entry in list(self.entries.values()):
+            entry.stopping = True
             try:
-                r, g, b = map(float, gamma_str.split(':'))
-                self.scale_gamma_r.get_adjustment().set_value(r)
-                self.scale_gamma_g.get_adjustment().set_value(g)
-                self.scale_gamma_b.get_adjustment().set_value(b)
-            except (ValueError, IndexError):
-                print(f"Ostrzeżenie: nieprawidłowy format gamma w pliku konfiguracyjnym: {gamma_str}")
-        if 'manual' in config:
-            self.entry_lat.set_text(config.get('manual', 'lat', fallback=''))
-            self.entry_lon.set_text(config.get('manual', 'lon', fallback=''))
-
-    def on_save_config_clicked(self, widget):
-        """
-        Zapisuje konfigurację do pliku.
-        """
-        gamma_r = self.scale_gamma_r.get_value()
-        gamma_g = self.scale_gamma_g.get_value()
-        gamma_b = self.scale_gamma_b.get_value()
-        redshift_data = {
-            'temp-day': self.entry_temp_day.get_text(),
-            'temp-night': self.entry_temp_night.get_text(),
-            'brightness-day': self.entry_bright_day.get_text(),
-            'brightness-night': self.entry_bright_night.get_text(),
-            'gamma': f'{gamma_r:.2f}:{gamma_g:.2f}:{gamma_b:.2f}',
-            'location-provider': 'manual'
-        }
-        manual_data = {
-            'lat': self.entry_lat.get_text(),
-            'lon': self.entry_lon.get_text()
-        }
-        success, error = self.logic.save_config(redshift_data, manual_data)
-        if success:
-            self.show_info_dialog("Sukces!", f"Konfiguracja została zapisana w pliku:\n{CONFIG_PATH}")
-        else:
-            self.show_error_dialog(f"Nie udało się zapisać pliku konfiguracyjnego.\nBłąd: {error}")
-
-    def on_apply_manual(self, widget):
-        """
-        Zastosowanie ustawień ręcznych (jednorazowy efekt).
-        """
-        self.logic.kill_redshift()
-        time.sleep(0.2)
-        temp = int(self.scale_temp.get_value())
-        bright = round(self.scale_bright.get_value(), 2)
-        gamma_r = round(self.scale_gamma_r.get_value(), 2)
-        gamma_g = round(self.scale_gamma_g.get_value(), 2)
-        gamma_b = round(self.scale_gamma_b.get_value(), 2)
-        gamma_str = f"{gamma_r}:{gamma_g}:{gamma_b}"
-        command = ["redshift", "-P", "-O", str(temp), "-b", str(bright), "-g", gamma_str]
-        success, error = self.logic.run_redshift(command)
-        if success:
-            self.status_label.set_markup(
-                f"<b>Zastosowano ustawienia ręczne (jednorazowy efekt)</b>\n"
-                f"Temperatura: {temp}K, Jasność: {bright}\n"
-                f"Gamma (R:G:B): {gamma_str}"
-            )
-        else:
-            self.show_error_dialog(f"Błąd uruchamiania redshift: {error}")
-
-    def on_reset(self, widget):
-        """
-        Resetuje ustawienia i wyłącza redshift.
-        """
-        self.logic.kill_redshift()
-        self.logic.run_redshift(["redshift", "-x"])
-        self.scale_temp.get_adjustment().set_value(6500)
-        self.scale_bright.get_adjustment().set_value(1.0)
-        self.scale_gamma_r.get_adjustment().set_value(1.0)
-        self.scale_gamma_g.get_adjustment().set_value(1.0)
-        self.scale_gamma_b.get_adjustment().set_value(1.0)
-        self.check_and_update_status()
-
-    def check_and_update_status(self):
-        """
-        Sprawdza status działania redshift (niezmienione).
-        """
-        try:
-            result = subprocess.run(["pgrep", "-a", "redshift"], capture_output=True, text=True)
-            if result.returncode == 0:
-                cmd_line = result.stdout.strip()
-                pid = cmd_line.split()[0]
-                loc_match = re.search(r'-l\s+([\d.-]+):([\d.-]+)', cmd_line)
-                temp_match = re.search(r'-t\s+(\d+):(\d+)', cmd_line)
-                bright_match = re.search(r'-b\s+([\d.]+):([\d.]+)', cmd_line)
-                if loc_match and temp_match and bright_match:
-                    lat, lon = loc_match.groups()
-                    t_day, t_night = temp_match.groups()
-                    b_day, b_night = bright_match.groups()
-                    status_text = (
-                        f"<b>Tryb automatyczny aktywny (PID: {pid})</b>\n"
-                        f"Lokalizacja: {lat}, {lon}\n"
-                        f"Temp (Dzień/Noc): {t_day}K / {t_night}K\n"
-                        f"Jasność (Dzień/Noc): {b_day} / {b_night}"
-                    )
-                    self.entry_lat.set_text(lat)
-                    self.entry_lon.set_text(lon)
-                    self.entry_temp_day.set_text(t_day)
-                    self.entry_temp_night.set_text(t_night)
-                    self.entry_bright_day.set_text(b_day)
-                    self.entry_bright_night.set_text(b_night)
-                    self.status_label.set_markup(status_text)
-                    return
-                else:
-                    parts = cmd_line.split()
-                    arguments = " ".join(parts[2:]) if len(parts) > 2 else "tryb domyślny (geolokalizacja)"
-                    self.status_label.set_markup(f"<b>Redshift działa (PID: {pid})</b>\nUruchomiony z opcjami:\n<tt>{arguments}</tt>")
-            else:
-                self.status_label.set_text("Redshift nie jest uruchomiony.")
-        except Exception as e:
-            self.status_label.set_text(f"Błąd podczas sprawdzania statusu: {e}")
+                pidfd = entry.pidfd if entry.pidfd is not None else os.pidfd_open(entry.pid)
+            except OSError:
+                pidfd = None
+            entry.send_signal(signal.SIGTERM)
+            if pidfd is not None:
+                ready, _, _ = select.select([pidfd], [], [], self.stop_timeout)
+                if not ready:
+                    entry.send_signal(signal.SIGKILL)
+                    select.select([pidfd], [], [], SIGKILL_WAIT)
+                if entry.pidfd is None:
+                    os.close(pidfd)
+            if entry.proc is not None:
+                entry.proc.wait(None)
+            self._on_exited(entry, False)
+
+# --- Gazeter miejscowości (indeks binarny mapowany w pamięci) ---
+
+GAZETTEER_PATH = os.path.join(
+    os.environ.get("XDG_DATA_HOME") or os.path.expanduser("~/.local/share"),
+    "redshift-control", "gazetteer.idx"
+)
+GAZETTEER_MAGIC = b"RSGAZ\x00\x00\x02"
+GAZETTEER_HEADER = struct.Struct("<8sII7Q")  # magic, rekordy, klucze, przesunięcia sekcji
+GAZETTEER_RECORD = struct.Struct("<ffIIH2s")  # lat, lon, nazwa (offset), populacja, długość nazwy, kraj
+GAZETTEER_KEY = struct.Struct("<IIH")  # offset klucza, nr rekordu, długość klucza
+GAZETTEER_CELLS = 180 * 360  # siatka 1° x 1° dla wyszukiwania najbliższej miejscowości
+GAZETTEER_NEAREST_KM = 1000  # dalej od miejscowości punkt nie ma "najbliższej"
+GAZETTEER_NEAREST_START_KM = 50
+
+_PLACE_TRANSLIT = str.maketrans({
+    "ł": "l", "Ł": "L", "ø": "o", "Ø": "O", "đ": "d", "Đ": "D", "ı": "i",
+    "æ": "ae", "Æ": "AE", "œ": "oe", "Œ": "OE", "þ": "th", "Þ": "TH",
+})
+
+def normalize_place_name(name):
+    """
+    Klucz wyszukiwania: małe litery bez znaków diakrytycznych (np. "Łódź" -> "lodz").
+    """
+    decomposed = unicodedata.normalize("NFKD", name.translate(_PLACE_TRANSLIT))
+    return "".join(c for c in decomposed if not unicodedata.combining(c)).casefold()
+
+def _gazetteer_cell(lat, lon):
+    row = min(179, max(0, int(math.floor(lat)) + 90))
+    col = int(math.floor(lon)) % 360
+    return row * 360 + col
+
+def _distance_km(lat1, lon1, lat2, lon2):
+    p1, p2 = math.radians(lat1), math.radians(lat2)
+    dp, dl = p2 - p1, math.radians(lon2 - lon1)
+    a = math.sin(dp / 2) ** 2 + math.cos(p1) * math.cos(p2) * math.sin(dl / 2) ** 2
+    return 12742.0 * math.asin(math.sqrt(min(1.0, a)))
+
+def compile_gazetteer(source_path, index_path=GAZETTEER_PATH, min_population=0):
+    """
+    Kompiluje plik TSV w formacie GeoNames (nazwa w kol. 2, współrzędne w 5-6,
+    kraj w 9, populacja w 15) do zwartego indeksu binarnego. Zwraca liczbę miejscowości.
+    """
+    records = []
+    with open(source_path, encoding="utf-8") as f:
+        for line in f:
+            cols = line.rstrip("\n").split("\t")
+            if len(cols) < 9 or line.startswith("#"):
+                continue
+            try:
+                lat, lon = float(cols[4]), float(cols[5])
+                population = int(cols[14]) if len(cols) > 14 and cols[14] else 0
+            except ValueError:
+                continue
+            if population >= min_population:
+                records.append((cols[1], lat, lon, population, cols[8][:2]))
+    # kolejność rekordów według komórek siatki - indeks przestrzenny to zakresy rekordów
+    records.sort(key=lambda r: (_gazetteer_cell(r[1], r[2]), -r[3]))
+    strings = bytearray()
+    record_blob = bytearray()
+    keys = []
+    cell_starts = [0] * (GAZETTEER_CELLS + 1)
+    for number, (name, lat, lon, population, country) in enumerate(records):
+        encoded = name.encode("utf-8")[:65535]
+        record_blob += GAZETTEER_RECORD.pack(lat, lon, len(strings), min(population, 2**32 - 1),
+                                             len(encoded), country.encode("ascii", "replace").ljust(2))
+        strings += encoded
+        keys.append((normalize_place_name(name).encode("utf-8")[:65535], number))
+        cell_starts[_gazetteer_cell(lat, lon) + 1] += 1
+    for i in range(GAZETTEER_CELLS):
+        cell_starts[i + 1] += cell_starts[i]
+    keys.sort()
+    key_blob = bytearray()
+    key_entries = bytearray()
+    # populacje w kolejności kluczy - wybór największych z zakresu prefiksu bez czytania rekordów
+    key_populations = array.array("I")
+    for key, number in keys:
+        key_entries += GAZETTEER_KEY.pack(len(key_blob), number, len(key))
+        key_blob += key
+        key_populations.append(min(records[number][3], 2**32 - 1))
+    cells = array.array("I", cell_starts).tobytes()
+    sections = (record_blob, strings, key_entries, key_blob, cells, key_populations.tobytes())
+    offsets = []
+    position = GAZETTEER_HEADER.size
+    for section in sections:
+        offsets.append(position)
+        position += len(section)
+    offsets.append(position)
+    os.makedirs(os.path.dirname(index_path) or ".", exist_ok=True)
+    tmp_path = index_path + ".tmp"
+    with open(tmp_path, "wb") as out:
+        out.write(GAZETTEER_HEADER.pack(GAZETTEER_MAGIC, len(records), len(keys), *offsets))
+        for section in sections:
+            out.write(section)
+    os.replace(tmp_path, index_path)
+    return len(records)
+
+class Gazetteer:
+    """
+    Indeks miejscowości mapowany w pamięci (mmap) - nic nie jest parsowane z góry;
+    wyszukiwanie po prefiksie (bez diakrytyków) i najbliższej miejscowości czyta
+    tylko potrzebne rekordy.
+    """
+    def __init__(self, path=GAZETTEER_PATH):
+        with open(path, "rb") as f:
+            self._mm = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        header = GAZETTEER_HEADER.unpack_from(self._mm, 0)
+        if header[0] != GAZETTEER_MAGIC:
+            self._mm.close()
+            raise ValueError(f"Nieprawidłowy plik indeksu gazetera: {path}")
+        self.size, self._n_keys = header[1], header[2]
+        (self._records_off, self._strings_off, self._keys_off,
+         self._keyblob_off, self._cells_off, self._populations_off, _) = header[3:]
+
+    def close(self):
+        self._mm.close()
 
-    def on_set_location(self, widget):
+    def record(self, number):
         """
-        Uruchamia redshift w trybie automatycznym na podstawie wprowadzonych danych.
+        Zwraca rekord (nazwa, lat, lon, kraj, populacja).
         """
-        try:
-            values = [w.get_text() for w in [
-                self.entry_lat, self.entry_lon, self.entry_temp_day,
-                self.entry_temp_night, self.entry_bright_day, self.entry_bright_night
-            ]]
-            if not all(values):
-                self.show_error_dialog("Wszystkie pola trybu auto muszą być wypełnione.")
-                return
-            lat, lon, t_day, t_night, b_day, b_night = values
-            # Walidacja danych wejściowych
-            if not (self.logic.validate_float(lat, -90, 90) and self.logic.validate_float(lon, -180, 180)):
-                self.show_error_dialog("Nieprawidłowe współrzędne geograficzne.")
-                return
-            if not (self.logic.validate_int(t_day, 1000, 25000) and self.logic.validate_int(t_night, 1000, 25000)):
-                self.show_error_dialog("Temperatura powinna być liczbą z zakresu 1000-25000.")
-                return
-            if not (self.logic.validate_float(b_day, 0.1, 1.0) and self.logic.validate_float(b_night, 0.1, 1.0)):
-                self.show_error_dialog("Jasność powinna być liczbą z zakresu 0.1-1.0.")
-                return
-        except Exception as e:
-            self.show_error_dialog(f"Błąd odczytu danych: {e}")
-            return
-        self.logic.kill_redshift()
-        time.sleep(0.2)
-        cmd = [
-            "redshift", "-l", f"{lat}:{lon}", "-t", f"{t_day}:{t_night}", "-b", f"{b_day}:{b_night}"
-        ]
-        self.logic.run_redshift(cmd, background=True)
-        self.status_label.set_text("Uruchamianie trybu auto...")
-        time.sleep(0.5)
-        self.check_and_update_status()
+        lat, lon, name_off, population, name_len, country = GAZETTEER_RECORD.unpack_from(
+            self._mm, self._records_off + number * GAZETTEER_RECORD.size)
+        start = self._strings_off + name_off
+        name = self._mm[start:start + name_len].decode("utf-8")
+        return name, lat, lon, country.decode("ascii").strip(), population
+
+    def _key(self, index):
+        key_off, number, key_len = GAZETTEER_KEY.unpack_from(self._mm, self._keys_off + index * GAZETTEER_KEY.size)
+        start = self._keyblob_off + key_off
+        return self._mm[start:start + key_len], number
+
+    def _lower_bound(self, key):
+        lo, hi = 0, self._n_keys
+        while lo < hi:
+            mid = (lo + hi) // 2
+            if self._key(mid)[0] < key:
+                lo = mid + 1
+            else:
+                hi = mid
+        return lo
 
-    def on_city_changed(self, widget):
+    def search(self, text, limit=20):
         """
-        Ustawia współrzędne po wyborze miasta.
+        Zwraca do `limit` miejscowości, których nazwa zaczyna się od tekstu:
+        najpierw dokładne trafienia, potem największe z całego zakresu prefiksu.
         """
-        coords = self.cities_data.get(widget.get_active_text())
-        if coords:
-            self.entry_lat.set_text(coords[0])
-            self.entry_lon.set_text(coords[1])
+        prefix = normalize_place_name(text.strip()).encode("utf-8")
+        if not prefix or limit <= 0:
+            return []
+        # bajt 0xff nie występuje w UTF-8, więc zakres [lo, hi) to dokładnie klucze z prefiksem
+        lo, hi = self._lower_bound(prefix), self._lower_bound(prefix + b"\xff")
+        exact = lo
+        while exact < hi and self._key(exact)[0] == prefix:
+            exact += 1
+        populations = array.array("I")
+        populations.frombytes(self._mm[self._populations_off + lo * 4:self._populations_off + hi * 4])
+        if sys.byteorder == "big":
+            populations.byteswap()
+        ordered = sorted(range(exact - lo), key=lambda i: -populations[i])
+        if len(ordered) < limit:
+            ordered += heapq.nlargest(limit - len(ordered), range(exact - lo, hi - lo),
+                                      key=populations.__getitem__)
+        return [self.record(self._key(lo + i)[1]) for i in ordered[:limit]]
 
-    # --- Dialogi ---
+    def _cell_range(self, cell):
+        start, end = struct.unpack_from("<II", self._mm, self._cells_off + cell * 4)
+        return range(start, end)
 
-    def show_error_dialog(self, message):
+    @staticmethod
+    def _cells_within(lat, lon, radius_km):
         """
-        Wyświetla okno dialogowe z błędem.
+        Komórki siatki pokrywające wszystkie punkty w odległości radius_km od (lat, lon).
         """
-        dialog = Gtk.MessageDialog(
-            transient_for=self, flags=0, message_type=Gtk.MessageType.ERROR,
-            buttons=Gtk.ButtonsType.OK, text="Wystąpił błąd"
-        )
-        dialog.format_secondary_text(str(message))
-        dialog.run()
-        dialog.destroy()
+        angle = radius_km / 6371.0
+        lat_min, lat_max = lat - math.degrees(angle), lat + math.degrees(angle)
+        rows = range(max(0, int(math.floor(lat_min)) + 90), min(179, int(math.floor(lat_max)) + 90) + 1)
+        if lat_min <= -90.0 or lat_max >= 90.0 or angle >= math.pi / 2:
+            cols = range(360)  # okrąg obejmuje biegun - wszystkie długości
+        else:
+            spread = math.degrees(math.asin(min(1.0, math.sin(angle) / math.cos(math.radians(lat)))))
+            first, last = int(math.floor(lon - spread)), int(math.floor(lon + spread))
+            cols = range(360) if last - first >= 359 else [c % 360 for c in range(first, last + 1)]
+        return [row * 360 + col for row in rows for col in cols]
 
-    def show_info_dialog(self, title, message):
+    def nearest(self, lat, lon, max_km=GAZETTEER_NEAREST_KM):
         """
-        Wyświetla okno dialogowe z informacją.
+        Zwraca (rekord, odległość w km) najbliższej miejscowości w promieniu max_km albo None.
+        Promień przeszukiwanego obszaru rośnie dwukrotnie; trafienie bliższe niż
+        bieżący promień jest ostateczne, bo reszta miejscowości leży dalej.
         """
-        dialog = Gtk.MessageDialog(
-            transient_for=self, flags=0, message_type=Gtk.MessageType.INFO,
-            buttons=Gtk.ButtonsType.OK, text=title
-        )
-        dialog.format_secondary_text(message)
-        dialog.run()
-        dialog.destroy()
+        best, best_dist = None, float("inf")
+        scanned = set()
+        radius = min(GAZETTEER_NEAREST_START_KM, max_km)
+        while True:
+            for cell in self._cells_within(lat, lon, radius):
+                if cell in scanned:
+                    continue
+                scanned.add(cell)
+                for number in self._cell_range(cell):
+                    rec_lat, rec_lon = struct.unpack_from(
+                        "<ff", self._mm, self._records_off + number * GAZETTEER_RECORD.size)
+                    dist = _distance_km(lat, lon, rec_lat, rec_lon)
+                    if dist < best_dist:
+                        best, best_dist = number, dist
+            if best_dist <= radius or radius >= max_km:
+                break
+            radius = min(radius * 2, max_km)
+        if best is None or best_dist > max_km:
+            return None
+        return self.record(best), best_dist
+
+class BuiltinGazetteer:
+    """
+    Wbudowana lista miast (POLISH_CITIES) z tym samym interfejsem co Gazetteer.
+    """
+    def __init__(self, cities=POLISH_CITIES):
+        self._records = [(name, float(lat), float(lon), "PL", 0) for name, (lat, lon) in sorted(cities.items())]
+        self.size = len(self._records)
+
+    def search(self, text, limit=20):
+        prefix = normalize_place_name(text.strip())
+        if not prefix:
+            return []
+        return [r for r in self._records if normalize_place_name(r[0]).startswith(prefix)][:limit]
+
+    def nearest(self, lat, lon, max_km=GAZETTEER_NEAREST_KM):
+        if not self._records:
+            return None
+        found = min(((r, _distance_km(lat, lon, r[1], r[2])) for r in self._records), key=lambda x: x[1])
+        return found if found[1] <= max_km else None
+
+def open_gazetteer(path=GAZETTEER_PATH):
+    """
+    Otwiera skompilowany gazeter; gdy go brak - wbudowaną listę miast.
+    """
+    try:
+        return Gazetteer(path)
+    except (OSError, ValueError, struct.error):
+        return BuiltinGazetteer()
+
+# --- Równoległe wykonywanie poleceń ---
+
+class ParallelRunner:
+    """
+    Uruchamia zestaw poleceń równolegle, z ograniczoną liczbą procesów w toku
+    i opcjonalnym limitem czasu na polecenie. Wyniki zbierane są per klucz.
+    """
+    def __init__(self, max_parallel=4, timeout=None, metrics=None):
+        self.max_parallel = max(1, max_parallel)
+        self.timeout = timeout
+        self.metrics = metrics
+
+    def run(self, jobs, callback):
+        """
+        jobs: słownik klucz -> (polecenie, zmienne środowiska lub None).
+        Po zakończeniu wszystkich wywołuje callback({klucz: (success, error)}).
+        """
+        queue = collections.deque(jobs.items())
+        results = {}
+        running = [0]
+
+        def launch_next():
+            while queue and running[0] < self.max_parallel:
+                key, (cmd, env) = queue.popleft()
+                running[0] += 1
+                self._start(key, cmd, env, finished)
+            if not queue and running[0] == 0:
+                callback(results)
+
+        def finished(key, success, error):
+            results[key] = (success, error)
+            running[0] -= 1
+            launch_next()
+
+        launch_next()
+
+    def _start(self, key, cmd, env, finished):
+        launcher = Gio.SubprocessLauncher.new(
+            Gio.SubprocessFlags.STDOUT_SILENCE | Gio.SubprocessFlags.STDERR_PIPE
+        )
+        for name, value in (env or {}).items():
+            launcher.setenv(name, value, True)
+        finish = self.metrics.measure("redshift", cmd) if self.metrics else None
+        try:
+            proc = launcher.spawnv(cmd)
+        except GLib.Error as e:
+            if finish:
+                finish(-1)
+            # e znika po wyjściu z bloku except - komunikat przekazujemy jako argument
+            msg = e.message
+            GLib.idle_add(lambda message: finished(key, False, message) or False, msg)
+            return
+        timed_out = [False]
+        timer = 0
+        if self.timeout:
+            def on_timeout():
+                # miejsce w puli zwalniane od razu - potomkowie procesu mogą trzymać potoki
+                timed_out[0] = True
+                proc.force_exit()
+                if finish:
+                    finish(-signal.SIGKILL)
+                finished(key, False, f"Przekroczono limit czasu ({self.timeout} s).")
+                return False
+            timer = GLib.timeout_add(int(self.timeout * 1000), on_timeout)
+
+        def on_done(proc, result):
+            stderr = None
+            try:
+                _, _, stderr = proc.communicate_utf8_finish(result)
+            except GLib.Error as e:
+                stderr = e.message
+            if timed_out[0]:
+                return
+            if timer:
+                GLib.source_remove(timer)
+            success = proc.get_successful()
+            if finish:
+                returncode = proc.get_exit_status() if proc.get_if_exited() else -proc.get_term_sig()
+                finish(returncode, len((stderr or "").encode("utf-8")))
+            error = None if success else (stderr or "").strip() or "Proces zakończył się błędem."
+            finished(key, success, error)
+
+        proc.communicate_utf8_async(None, None, on_done)
+
+class RedshiftLogic:
+    """
+    Klasa odpowiedzialna za logikę działania programu: obsługa konfiguracji, uruchamianie i resetowanie Redshift.
+    """
+    def __init__(self, config_path=CONFIG_PATH, gamma_backend="auto", state_path=STATE_SNAPSHOT_PATH,
+                 resident=False):
+        self.config_path = config_path
+        self.state_path = state_path
+        # Wartości pól okna zapisywane w migawce stanu (ustawia GUI); None - zachowaj poprzednie
+        self.form_state = None
+        self._snapshot_data = None
+        self._snapshot_timer = 0
+        self._config_cache = None  # (klucz stat, ConfigParser, treść pliku)
+        self._config_monitor = None
+        # "auto" - XRandR, jeśli dostępny; None - zawsze uruchamiaj redshift
+        self.gamma_backend = gamma_backend
+        # True - właściciel stanu działa stale (demon), więc tryb auto może działać w procesie;
+        # okno i CLI uruchamiają redshift -l, który przeżywa ich zamknięcie
+        self.resident = resident
+        self._gamma_engine = None
+        self.auto_scheduler = None
+        # PID-y procesów redshift uruchomionych w tle bez nadzoru (CLI) - zapisywane w migawce stanu
+        self.detached_pids = set()
+        # PID-y z migawki zatrzymane przez ten proces - nie trafiają już do kolejnych migawek
+        self.stopped_pids = set()
+        self.metrics = LatencyMetrics()
+        self.status_monitor = ProcessStatusMonitor(metrics=self.metrics)
+        self.supervisor = RedshiftSupervisor()
+        self.transition = TransitionEngine(self._apply_frame)
+        self.profile_scheduler = None
+        self._schedule_key = None
+        self.adaptive_brightness = None
+        # Ostatnio zastosowany stan: "off", "manual" lub "auto"
+        self.mode = "off"
+        self.manual_params = None
+        self.output_params = None
+        self.auto_params = None
+
+    def _config_stat_key(self):
+        """
+        Klucz pamięci podręcznej konfiguracji: (mtime, rozmiar, i-węzeł) albo None, gdy brak pliku.
+        """
+        try:
+            st = os.stat(self.config_path)
+        except FileNotFoundError:
+            return None
+        return (st.st_mtime_ns, st.st_size, st.st_ino)
+
+    def load_config(self):
+        """
+        Wczytuje konfigurację z pliku. Wynik jest buforowany do czasu zmiany pliku
+        (mtime, rozmiar, i-węzeł) - zwracanego obiektu nie należy modyfikować.
+        """
+        try:
+            key = self._config_stat_key()
+            if key is None:
+                self._config_cache = None
+                return None
+            if self._config_cache is not None and self._config_cache[0] == key:
+                return self._config_cache[1]
+            with open(self.config_path, "r", encoding="utf-8") as f:
+                text = f.read()
+            config = configparser.ConfigParser()
+            config.read_string(text, source=self.config_path)
+            self._config_cache = (key, config, text)
+            return config
+        except (OSError, configparser.Error) as e:
+            print(f"Błąd podczas wczytywania konfiguracji: {e}")
+            return None
+
+    def save_config(self, redshift_data, manual_data, outputs_data=None, extra_sections=None):
+        """
+        Zapisuje konfigurację do pliku w kodowaniu UTF-8. Zapis jest atomowy
+        (plik tymczasowy + fsync + rename) i pomijany, gdy treść się nie zmieniła.
+        outputs_data: {crtc: {temp, brightness, gamma}} - profile wyjść w sekcjach [output-N].
+        extra_sections: {nazwa: {klucz: wartość}} - ustawienia programu (redshift ich nie czyta).
+        """
+        config = configparser.ConfigParser()
+        config['redshift'] = redshift_data
+        config['manual'] = manual_data
+        for crtc, data in sorted((outputs_data or {}).items()):
+            config[f'output-{crtc}'] = data
+        for name, data in (extra_sections or {}).items():
+            config[name] = data
+        buffer = io.StringIO()
+        buffer.write("; Konfiguracja wygenerowana przez Kontroler Redshift\n")
+        config.write(buffer)
+        text = buffer.getvalue()
+        directory = os.path.dirname(self.config_path)
+        try:
+            self.load_config()
+            if self._config_cache is not None and self._config_cache[2] == text:
+                return True, None
+            os.makedirs(directory, exist_ok=True)
+            try:
+                mode = stat.S_IMODE(os.stat(self.config_path).st_mode)
+            except FileNotFoundError:
+                mode = 0o644
+            fd, tmp_path = tempfile.mkstemp(prefix=".redshift.conf.", dir=directory)
+            try:
+                with os.fdopen(fd, "w", encoding="utf-8") as tmp:
+                    tmp.write(text)
+                    tmp.flush()
+                    os.fsync(tmp.fileno())
+                os.chmod(tmp_path, mode)
+                os.replace(tmp_path, self.config_path)
+            except BaseException:
+                os.unlink(tmp_path)
+                raise
+            dir_fd = os.open(directory, os.O_RDONLY)
+            try:
+                os.fsync(dir_fd)
+            finally:
+                os.close(dir_fd)
+            self._config_cache = (self._config_stat_key(), config, text)
+            return True, None
+        except OSError as e:
+            return False, str(e)
+
+    @staticmethod
+    def output_profiles_from_config(config):
+        """
+        Odczytuje profile wyjść z sekcji [output-N]. Zwraca {crtc: (temp, jasność, gamma)}.
+        """
+        profiles = {}
+        for section in config.sections():
+            if not section.startswith("output-"):
+                continue
+            try:
+                crtc = int(section[len("output-"):])
+                temp = config.getint(section, "temp", fallback=6500)
+                bright = config.getfloat(section, "brightness", fallback=1.0)
+                gamma = tuple(float(g) for g in config.get(section, "gamma", fallback="1.0:1.0:1.0").split(":"))
+            except ValueError:
+                print(f"Ostrzeżenie: nieprawidłowa sekcja [{section}] w pliku konfiguracyjnym")
+                continue
+            if len(gamma) == 3:
+                profiles[crtc] = (temp, bright, gamma)
+        return profiles
+
+    @staticmethod
+    def presets_from_config(config):
+        """
+        Odczytuje presety z sekcji [preset-NAZWA]. Zwraca {nazwa: (temp, jasność, gamma)}.
+        """
+        presets = {}
+        for section in config.sections():
+            if not section.startswith("preset-"):
+                continue
+            try:
+                temp = config.getint(section, "temp", fallback=6500)
+                bright = config.getfloat(section, "brightness", fallback=1.0)
+                gamma = tuple(float(g) for g in config.get(section, "gamma", fallback="1.0:1.0:1.0").split(":"))
+            except ValueError:
+                print(f"Ostrzeżenie: nieprawidłowa sekcja [{section}] w pliku konfiguracyjnym")
+                continue
+            if len(gamma) == 3:
+                presets[section[len("preset-"):]] = (temp, bright, gamma)
+        return presets
+
+    @staticmethod
+    def schedule_from_config(config):
+        """
+        Odczytuje harmonogram z sekcji [schedule-N] (klucze time, days, preset).
+        Zwraca listę ScheduleEntry w kolejności numerów sekcji.
+        """
+        entries = []
+        for section in config.sections():
+            if not section.startswith("schedule-"):
+                continue
+            try:
+                number = int(section[len("schedule-"):])
+                moment = datetime.datetime.strptime(config.get(section, "time"), "%H:%M").time()
+                days = parse_weekdays(config.get(section, "days", fallback="*"))
+                preset = config.get(section, "preset")
+            except (ValueError, KeyError, configparser.Error):
+                print(f"Ostrzeżenie: nieprawidłowa sekcja [{section}] w pliku konfiguracyjnym")
+                continue
+            entries.append((number, ScheduleEntry(moment, days, preset)))
+        return [entry for _, entry in sorted(entries)]
+
+    @staticmethod
+    def schedule_sections(presets, entries):
+        """
+        Odwrotność presets_from_config()/schedule_from_config() - sekcje dla save_config(extra_sections=...).
+        """
+        sections = {}
+        for name, (temp, bright, gamma) in sorted(presets.items()):
+            sections[f"preset-{name}"] = {
+                'temp': str(temp),
+                'brightness': f'{bright:.2f}',
+                'gamma': ':'.join(f'{g:.2f}' for g in gamma),
+            }
+        for number, entry in enumerate(entries, 1):
+            sections[f"schedule-{number}"] = {
+                'time': entry.time.strftime("%H:%M"),
+                'days': format_weekdays(entry.days),
+                'preset': entry.preset,
+            }
+        return sections
+
+    def watch_config(self, callback):
+        """
+        Obserwuje plik konfiguracyjny (Gio.FileMonitor); po zewnętrznej zmianie
+        wywołuje callback(config) z nową konfiguracją (None, gdy plik usunięto).
+        """
+        gfile = Gio.File.new_for_path(self.config_path)
+        self._config_monitor = gfile.monitor_file(Gio.FileMonitorFlags.WATCH_MOVES, None)
+        self._config_monitor.connect("changed", self._on_config_file_changed, callback)
+
+    def _on_config_file_changed(self, monitor, gfile, other_file, event_type, callback):
+        events = (
+            Gio.FileMonitorEvent.CHANGES_DONE_HINT, Gio.FileMonitorEvent.CREATED,
+            Gio.FileMonitorEvent.DELETED, Gio.FileMonitorEvent.MOVED_IN,
+            Gio.FileMonitorEvent.MOVED_OUT, Gio.FileMonitorEvent.RENAMED,
+        )
+        if event_type not in events:
+            return
+        old_key = self._config_cache[0] if self._config_cache is not None else None
+        config = self.load_config()
+        new_key = self._config_cache[0] if self._config_cache is not None else None
+        # własne zapisy aktualizują pamięć podręczną, więc nie wywołują callbacku
+        if new_key != old_key:
+            callback(config)
+
+    def run_redshift(self, cmd, background=False):
+        """
+        Uruchamia polecenie redshift.
+        """
+        finish = self.metrics.measure("spawn" if background else "redshift", cmd)
+        try:
+            if background:
+                proc = subprocess.Popen(cmd, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
+                self.detached_pids.add(proc.pid)
+                finish()
+            else:
+                result = subprocess.run(cmd, capture_output=True, text=True)
+                finish(result.returncode, len(result.stderr))
+                result.check_returncode()
+            return True, None
+        except (subprocess.CalledProcessError, FileNotFoundError) as e:
+            if isinstance(e, FileNotFoundError):
+                finish(-1)
+            return False, str(e)
+
+    def run_redshift_async(self, cmd, callback=None):
+        """
+        Uruchamia polecenie redshift bez blokowania pętli GTK.
+        Po zakończeniu procesu wywołuje callback(success, error).
+        """
+        flags = Gio.SubprocessFlags.STDOUT_SILENCE | Gio.SubprocessFlags.STDERR_PIPE
+        finish = self.metrics.measure("redshift", cmd)
+        try:
+            proc = Gio.Subprocess.new(cmd, flags)
+        except GLib.Error as e:
+            finish(-1)
+            if callback:
+                GLib.idle_add(callback, False, e.message)
+            return None
+
+        def on_finished(proc, result):
+            stderr = None
+            try:
+                _, _, stderr = proc.communicate_utf8_finish(result)
+            except GLib.Error as e:
+                success, error = False, e.message
+            else:
+                success = proc.get_successful()
+                error = None if success else (stderr or "").strip() or "Proces zakończył się błędem."
+            returncode = proc.get_exit_status() if proc.get_if_exited() else -proc.get_term_sig()
+            finish(returncode, len((stderr or "").encode("utf-8")))
+            if callback:
+                callback(success, error)
+
+        proc.communicate_utf8_async(None, None, on_finished)
+        return proc
+
+    def start_redshift_async(self, cmd, on_exit=None):
+        """
+        Uruchamia redshift w tle (tryb automatyczny) pod nadzorem i zwraca (pid, error).
+        Zakończenie procesu zgłaszane jest przez on_exit(success, error); po awarii
+        proces jest wznawiany z wykładniczym opóźnieniem.
+        """
+        return self.supervisor.start(cmd, restart=True, on_exit=on_exit)
+
+    def adopt_session_processes(self):
+        """
+        Przejmuje nadzór nad procesami redshift tej sesji (ten sam DISPLAY) uruchomionymi
+        przez program, np. przez poprzednie okno.
+        """
+        for pid in self.session_pids():
+            self.supervisor.adopt(pid)
+
+    def owned_processes(self):
+        """
+        Procesy redshift uruchomione przez ten proces programu jako lista [pid, czas startu].
+        """
+        owned = []
+        for pid in sorted(set(self.supervisor.entries) | self.detached_pids):
+            start = process_start_time(pid)
+            if start is not None:
+                owned.append([pid, start])
+        return owned
+
+    def session_pids(self):
+        """
+        Zwraca PID-y procesów redshift tej sesji (ten sam DISPLAY) uruchomionych przez program:
+        własnych albo zapisanych w migawce stanu. PID z migawki musi mieć ten sam czas startu
+        (mógł zostać ponownie użyty); procesów redshift uruchomionych inaczej program nie dotyka.
+        """
+        recorded = dict(self._snapshot_pids())
+        # brak DISPLAY i pusty DISPLAY to ta sama sesja (np. Wayland, konsola)
+        display = os.environ.get("DISPLAY", "").encode()
+        pids = []
+        for pid in self.status_monitor.processes:
+            if pid not in recorded or process_start_time(pid) != recorded[pid]:
+                continue
+            try:
+                with open(f"/proc/{pid}/environ", "rb") as f:
+                    environ = dict(item.partition(b"=")[::2] for item in f.read().split(b"\0") if item)
+            except OSError:
+                continue
+            if environ.get(b"DISPLAY", b"") == display:
+                pids.append(pid)
+        return pids
+
+    def recorded_processes(self):
+        """
+        Procesy zapisane w migawce stanu (np. przez CLI), które nadal działają - ten sam czas startu -
+        i nie zostały zatrzymane przez ten proces programu. Lista [pid, czas startu].
+        """
+        snapshot = read_state_snapshot(self.state_path)
+        alive = []
+        for item in (snapshot or {}).get("pids") or ():
+            if (isinstance(item, list) and len(item) == 2 and all(isinstance(v, int) for v in item)
+                    and item[0] not in self.stopped_pids and process_start_time(item[0]) == item[1]):
+                alive.append(item)
+        return alive
+
+    def stop_session_processes(self, timeout=2.0):
+        """
+        Synchronicznie zatrzymuje procesy redshift tej sesji (SIGTERM, po czasie SIGKILL).
+        Nie wymaga pętli GLib - używane przez CLI.
+        """
+        self.status_monitor.processes = self.status_monitor.scan()
+        for pid in self.session_pids():
+            try:
+                pidfd = os.pidfd_open(pid)
+            except OSError:
+                continue
+            self.stopped_pids.add(pid)
+            try:
+                signal.pidfd_send_signal(pidfd, signal.SIGTERM)
+                ready, _, _ = select.select([pidfd], [], [], timeout)
+                if not ready:
+                    signal.pidfd_send_signal(pidfd, signal.SIGKILL)
+                    select.select([pidfd], [], [], SIGKILL_WAIT)
+            except OSError:
+                pass  # proces zakończył się w międzyczasie
+            finally:
+                os.close(pidfd)
+
+    def configured_gamma(self):
+        """
+        Gamma z sekcji [redshift] (jedna wartość albo R:G:B) - ta sama, której używa redshift -l.
+        """
+        config = self.load_config()
+        if config is None or "redshift" not in config:
+            return (1.0, 1.0, 1.0)
+        values = config.get("redshift", "gamma", fallback="1.0").split(":")
+        gamma = values * 3 if len(values) == 1 else values
+        if self.validate_gamma(gamma):
+            print(f"Ostrzeżenie: nieprawidłowy format gamma w pliku konfiguracyjnym: {':'.join(values)}")
+            return (1.0, 1.0, 1.0)
+        return tuple(float(g) for g in gamma)
+
+    def start_auto_schedule(self, lat, lon, t_day, t_night, b_day, b_night, on_change=None):
+        """
+        Uruchamia tryb automatyczny w procesie. Zwraca harmonogram albo None,
+        gdy silnik gamma jest niedostępny (wtedy trzeba użyć procesu redshift).
+        """
+        engine = self.get_gamma_engine()
+        if engine is None:
+            return None
+        self.stop_auto_schedule()
+        self.auto_scheduler = AutoScheduler(engine, lat, lon, t_day, t_night, b_day, b_night, on_change,
+                                            gamma=self.configured_gamma())
+        if self.adaptive_brightness is not None:
+            self.auto_scheduler.brightness_override = self.adaptive_brightness.applied
+        self.auto_scheduler.start()
+        return self.auto_scheduler
+
+    def stop_auto_schedule(self):
+        """
+        Zatrzymuje harmonogram trybu automatycznego działający w procesie.
+        """
+        if self.auto_scheduler:
+            self.auto_scheduler.stop()
+            self.auto_scheduler = None
+
+    def kill_redshift_async(self, callback=None):
+        """
+        Zatrzymuje procesy redshift (SIGTERM - redshift sam przywraca neutralne kolory)
+        i wywołuje callback() dopiero, gdy faktycznie zakończą działanie.
+        """
+        self.stop_auto_schedule()
+        finish = self.metrics.measure("kill")
+
+        def on_stopped():
+            finish()
+            if callback:
+                callback()
+
+        self.supervisor.stop_all(on_stopped)
+
+    def get_gamma_engine(self):
+        """
+        Zwraca silnik gamma działający w procesie albo None, jeśli backend jest niedostępny.
+        """
+        if self._gamma_engine is None and self.gamma_backend is not None:
+            backend = self.gamma_backend
+            if backend == "auto":
+                try:
+                    backend = XRandRGammaBackend()
+                except (GammaBackendError, OSError):
+                    self.gamma_backend = None
+                    return None
+            self._gamma_engine = GammaEngine(backend)
+        return self._gamma_engine
+
+    @staticmethod
+    def manual_command(temp, bright, gamma, crtc=None):
+        """
+        Buduje polecenie redshift dla ustawień ręcznych (opcjonalnie tylko dla jednego CRTC).
+        """
+        gamma_str = ":".join(str(g) for g in gamma)
+        cmd = ["redshift", "-P", "-O", str(temp), "-b", str(bright), "-g", gamma_str]
+        if crtc is not None:
+            cmd[1:1] = ["-m", f"randr:crtc={crtc}"]
+        return cmd
+
+    def list_outputs(self):
+        """
+        Zwraca indeksy wyjść (CRTC) - znane tylko, gdy działa silnik gamma w procesie.
+        """
+        engine = self.get_gamma_engine()
+        if engine is None:
+            return []
+        try:
+            return engine.outputs()
+        except GammaBackendError:
+            return []
+
+    def apply_outputs_async(self, profiles, callback=None, max_parallel=4):
+        """
+        Stosuje osobne ustawienia dla każdego wyjścia. profiles: {crtc: (temp, jasność, gamma)}.
+        Polecenia redshift dla wyjść działają równolegle (co najwyżej max_parallel naraz),
+        więc całość trwa tyle, co najwolniejsze wyjście. callback({crtc: (success, error)}).
+        """
+        def on_done(results):
+            if all(success for success, _ in results.values()):
+                self.mode = "manual"
+                self.output_params = dict(profiles)
+                self._state_changed()
+            if callback:
+                callback(results)
+
+        self.transition.cancel()
+        engine = self.get_gamma_engine()
+        if engine is not None:
+            # w procesie każde wyjście to mikrosekundy na jednym połączeniu X - bez wątków
+            results = {}
+            for crtc, (temp, bright, gamma) in sorted(profiles.items()):
+                results[crtc] = self._apply_gamma(engine, temp, bright, gamma, outputs=[crtc])
+            on_done(results)
+            return
+        jobs = {
+            crtc: (self.manual_command(temp, bright, gamma, crtc=crtc), None)
+            for crtc, (temp, bright, gamma) in profiles.items()
+        }
+        ParallelRunner(max_parallel, metrics=self.metrics).run(jobs, on_done)
+
+    def apply_manual(self, temp, bright, gamma):
+        """
+        Synchroniczna wersja apply_manual_async(). Zwraca (success, error).
+        """
+        engine = self.get_gamma_engine()
+        if engine is None:
+            success, error = self.run_redshift(self.manual_command(temp, bright, gamma))
+        else:
+            success, error = self._apply_gamma(engine, temp, bright, gamma)
+        if success:
+            self.mode = "manual"
+            self.manual_params = (int(temp), float(bright), tuple(float(g) for g in gamma))
+            self.output_params = None
+            self._state_changed()
+        return success, error
+
+    def reset(self):
+        """
+        Synchroniczna wersja reset_async(). Zwraca (success, error).
+        """
+        engine = self.get_gamma_engine()
+        if engine is None:
+            success, error = self.run_redshift(["redshift", "-x"])
+        else:
+            success, error = self._apply_gamma(engine, None, 1.0, (1.0, 1.0, 1.0))
+        if success:
+            self.mode = "off"
+            self.manual_params = None
+            self.output_params = None
+            self._state_changed()
+        return success, error
+
+    def apply_manual_async(self, temp, bright, gamma, callback=None):
+        """
+        Stosuje ustawienia ręczne - w procesie, gdy to możliwe, w przeciwnym razie przez redshift.
+        """
+        def on_applied(success, error):
+            if success:
+                self.mode = "manual"
+                self.manual_params = (int(temp), float(bright), tuple(float(g) for g in gamma))
+                self.output_params = None
+                self._state_changed()
+            if callback:
+                callback(success, error)
+
+        self.transition.cancel()
+        engine = self.get_gamma_engine()
+        if engine is None:
+            return self.run_redshift_async(self.manual_command(temp, bright, gamma), on_applied)
+        on_applied(*self._apply_gamma(engine, temp, bright, gamma))
+        return None
+
+    @staticmethod
+    def auto_oneshot_command(lat, lon, t_day, t_night, b_day, b_night):
+        """
+        Buduje polecenie redshift -o: jednorazowe ustawienie wartości trybu auto dla bieżącej pory dnia.
+        """
+        return ["redshift", "-o", "-l", f"{lat}:{lon}", "-t", f"{t_day}:{t_night}", "-b", f"{b_day}:{b_night}"]
+
+    def apply_fleet_async(self, targets, cmd, callback, max_parallel=16, timeout=10.0):
+        """
+        Wykonuje polecenie redshift na wielu ekranach X (zmienna DISPLAY) z ograniczoną
+        współbieżnością i limitem czasu na ekran. callback({ekran: (success, error)}).
+        """
+        jobs = {target: (cmd, {"DISPLAY": target}) for target in targets}
+        ParallelRunner(max_parallel, timeout, self.metrics).run(jobs, callback)
+
+    def _apply_gamma(self, engine, temp, bright, gamma, outputs=None):
+        """
+        Ustawia rampy gamma w procesie z pomiarem czasu. Zwraca (success, error).
+        """
+        finish = self.metrics.measure("gamma")
+        try:
+            engine.apply(temp, bright, gamma, outputs)
+            finish(0)
+            return True, None
+        except GammaBackendError as e:
+            finish(1)
+            return False, str(e)
+
+    def reset_async(self, callback=None):
+        """
+        Przywraca neutralne kolory (odpowiednik redshift -x).
+        """
+        def on_reset(success, error):
+            if success:
+                self.mode = "off"
+                self.manual_params = None
+                self.output_params = None
+                self._state_changed()
+            if callback:
+                callback(success, error)
+
+        self.transition.cancel()
+        engine = self.get_gamma_engine()
+        if engine is None:
+            return self.run_redshift_async(["redshift", "-x"], on_reset)
+        # rampy tożsamościowe - tablica ciała doskonale czarnego nie daje (1, 1, 1) dla 6500 K
+        on_reset(*self._apply_gamma(engine, None, 1.0, (1.0, 1.0, 1.0)))
+        return None
+
+    def start_profile_schedule(self, on_switch=None):
+        """
+        Uruchamia harmonogram presetów z pliku konfiguracyjnego (zastępuje poprzedni,
+        chyba że presety i harmonogram się nie zmieniły). on_switch(entry, success, error)
+        po każdym przełączeniu. Zwraca liczbę wpisów.
+        """
+        config = self.load_config()
+        if config is None:
+            self.stop_profile_schedule()
+            return 0
+        presets = self.presets_from_config(config)
+        entries = self.schedule_from_config(config)
+        try:
+            fade = config.getfloat(CONTROLLER_SECTION, "fade", fallback=0.0)
+        except ValueError:
+            fade = 0.0
+        key = (presets, entries, fade)
+        if self.profile_scheduler is not None and key == self._schedule_key:
+            return len(entries)
+        self.stop_profile_schedule()
+        if not entries:
+            return 0
+        self._schedule_key = key
+
+        def switch(entry):
+            def done(success, error):
+                if not success:
+                    print(f"Błąd przełączania presetu {entry.preset}: {error}")
+                if on_switch:
+                    on_switch(entry, success, error)
+
+            if entry.preset == PRESET_OFF:
+                self.switch_mode_async("off", None, fade, done)
+            elif entry.preset in presets:
+                self.switch_mode_async("manual", presets[entry.preset], fade, done)
+            else:
+                done(False, f"Nieznany preset: {entry.preset}")
+
+        self.profile_scheduler = ProfileScheduler(entries, switch)
+        self.profile_scheduler.start()
+        return len(entries)
+
+    def stop_profile_schedule(self):
+        if self.profile_scheduler is not None:
+            self.profile_scheduler.stop()
+            self.profile_scheduler = None
+            self._schedule_key = None
+
+    def set_brightness_async(self, bright, callback=None, duration=1.0):
+        """
+        Zmienia tylko jasność, zachowując temperaturę i gamma bieżącego trybu.
+        W trybie auto działającym w procesie jasność zastępuje wartość z krzywej dnia.
+        """
+        callback = callback or (lambda success, error: None)
+        if self.mode == "auto":
+            if self.auto_scheduler is None:
+                callback(False, "Tryb automatyczny działa w procesie redshift - jasności nie można zmienić w locie.")
+                return
+            self.auto_scheduler.set_brightness_override(bright)
+            callback(True, None)
+            return
+        if self.output_params is not None:
+            callback(False, "Aktywne są osobne profile wyjść - jasność adaptacyjna jest pominięta.")
+            return
+        if self.mode == "manual" and self.manual_params:
+            temp, _, gamma = self.manual_params
+        else:
+            # zmiana jasności przełącza w tryb ręczny, który zawsze ma temperaturę
+            temp, gamma = NEUTRAL_TEMP, NEUTRAL_STATE[2]
+        self.fade_manual_async(temp, bright, gamma, duration, callback)
+
+    def start_adaptive_brightness(self, sensor_path=None, on_change=None, **options):
+        """
+        Włącza jasność adaptacyjną z czujnika IIO (sensor_path - katalog urządzenia,
+        domyślnie pierwszy znaleziony). Zwraca (success, error).
+        """
+        self.stop_adaptive_brightness()
+        sensor_path = sensor_path or find_light_sensor()
+        if sensor_path is None:
+            return False, "Nie znaleziono czujnika światła otoczenia (IIO)."
+        try:
+            sensor = AmbientLightSensor(sensor_path)
+        except OSError as e:
+            return False, str(e)
+        self.adaptive_brightness = AdaptiveBrightness(self, sensor, on_change, **options)
+        self.adaptive_brightness.start()
+        return True, None
+
+    @staticmethod
+    def ambient_settings(config):
+        """
+        Odczytuje z sekcji [controller] ustawienia jasności adaptacyjnej: (włączona, ścieżka czujnika lub None).
+        """
+        if config is None or CONTROLLER_SECTION not in config:
+            return False, None
+        try:
+            enabled = config.getboolean(CONTROLLER_SECTION, "ambient-light", fallback=False)
+        except ValueError:
+            enabled = False
+        return enabled, config.get(CONTROLLER_SECTION, "ambient-sensor", fallback="") or None
+
+    def stop_adaptive_brightness(self):
+        """
+        Wyłącza jasność adaptacyjną; w trybie auto wraca jasność z krzywej dnia.
+        """
+        if self.adaptive_brightness is not None:
+            self.adaptive_brightness.stop()
+            self.adaptive_brightness.sensor.close()
+            self.adaptive_brightness = None
+            if self.auto_scheduler is not None:
+                self.auto_scheduler.set_brightness_override(None)
+
+    def _apply_frame(self, state, done):
+        """
+        Stosuje jedną klatkę przejścia - w procesie albo przez redshift -P -O
+        (kolory neutralne przez redshift -x, punkt bieli klatki - najbliższa temperatura z tablicy).
+        """
+        temp, bright, gamma = state
+        engine = self.get_gamma_engine()
+        if engine is None:
+            if state == NEUTRAL_STATE:
+                self.run_redshift_async(["redshift", "-x"], done)
+                return
+            if temp is None:
+                temp = NEUTRAL_TEMP
+            elif isinstance(temp, tuple):
+                temp = nearest_temperature(temp)
+            self.run_redshift_async(self.manual_command(temp, bright, gamma), done)
+        else:
+            done(*self._apply_gamma(engine, temp, bright, gamma))
+
+    def auto_state_now(self, lat, lon, t_day, t_night, b_day, b_night):
+        """
+        Stan (temperatura, jasność, gamma), który tryb automatyczny ustawiłby teraz.
+        """
+        now = datetime.datetime.now()
+        # ta sama minuta krzywej dnia i ta sama gamma, które zastosuje AutoScheduler
+        temps, brights = day_curve(float(lat), float(lon), now.date(),
+                                   int(t_day), int(t_night), float(b_day), float(b_night))
+        idx = now.hour * 60 + now.minute
+        return int(temps[idx]), float(brights[idx]), self.configured_gamma()
+
+    def applied_state(self):
+        """
+        Najlepsze przybliżenie aktualnie ustawionego stanu - punkt startowy płynnego przejścia.
+        Zwraca None, gdy stan jest nieznany (np. różne profile wyjść).
+        """
+        if self.transition.active:
+            return self.transition.current
+        if self.mode == "manual":
+            return self.manual_params if self.output_params is None else None
+        if self.mode == "auto":
+            scheduler = self.auto_scheduler
+            if scheduler is not None and scheduler.current:
+                return scheduler.current[0], scheduler.current[1], scheduler.gamma
+            return self.auto_state_now(*self.auto_params) if self.auto_params else None
+        return NEUTRAL_STATE
+
+    def fade_manual_async(self, temp, bright, gamma, duration, callback=None):
+        """
+        Płynnie przechodzi od bieżącego stanu do ustawień ręcznych w ciągu duration sekund.
+        Kolejne wywołanie w trakcie przejścia zmienia cel, zaczynając od bieżącej pozycji.
+        """
+        target = (int(temp), float(bright), tuple(float(g) for g in gamma))
+
+        def on_done(success, error):
+            if success:
+                self.mode = "manual"
+                self.manual_params = target
+                self.output_params = None
+                self._state_changed()
+            if callback:
+                callback(success, error)
+
+        self._fade_to(target, duration, on_done)
+
+    def fade_reset_async(self, duration, callback=None):
+        """
+        Płynnie przywraca neutralne kolory - punkt bieli zmierza do (1, 1, 1),
+        a przejście kończy się rampą tożsamościową (jak redshift -x).
+        """
+        def on_done(success, error):
+            if success:
+                self.mode = "off"
+                self.manual_params = None
+                self.output_params = None
+                self._state_changed()
+            if callback:
+                callback(success, error)
+
+        self._fade_to(NEUTRAL_STATE, duration, on_done)
+
+    def _fade_to(self, target, duration, callback):
+        if not self.transition.active:
+            self.transition.current = self.applied_state()
+        self.transition.fade_to(target, duration, callback)
+
+    def switch_mode_async(self, target_mode, params, duration, callback, on_change=None, on_exit=None):
+        """
+        Płynna zmiana trybu: stan startowy jest zapamiętywany, procesy redshift zatrzymywane
+        zwykłym SIGTERM (przywracają przy tym neutralne kolory), po czym stan startowy jest
+        od razu ponownie ustawiany i następuje płynne przejście do trybu target_mode
+        ("manual" - params to (temp, jasność, gamma); "off"; "auto" - params jak w
+        start_auto_mode). callback(success, error).
+        """
+        start = self.applied_state()
+
+        def on_stopped():
+            if start is None or duration <= 0:
+                fade()
+                return
+            # po zakończeniu redshift rampy są neutralne - wracamy do stanu startowego
+            self._apply_frame(start, on_restored)
+
+        def on_restored(success, error):
+            if success:
+                self.transition.current = start
+            fade()
+
+        def fade():
+            if target_mode == "manual":
+                self.fade_manual_async(*params, duration, callback)
+            elif target_mode == "off":
+                self.fade_reset_async(duration, callback)
+            else:
+                self.fade_manual_async(*self.auto_state_now(*params), duration, on_faded)
+
+        def on_faded(success, error):
+            if not success:
+                callback(success, error)
+                return
+            # redshift startuje od razu z wartością ustawioną przez przejście - bez własnego wygaszania
+            callback(*self.start_auto_mode(*params, on_change=on_change, on_exit=on_exit, redshift_fade=False))
+
+        self.transition.cancel()
+        self.kill_redshift_async(on_stopped)
+
+    def start_auto_mode(self, lat, lon, t_day, t_night, b_day, b_night, on_change=None, on_exit=None,
+                        redshift_fade=True):
+        """
+        Uruchamia tryb automatyczny: w procesie demona (resident), a poza nim lub gdy
+        silnik gamma jest niedostępny - przez nadzorowany proces redshift -l.
+        Zwraca (success, error). Wcześniejsze procesy muszą być już zatrzymane.
+        """
+        self.auto_params = (lat, lon, t_day, t_night, b_day, b_night)
+        if not self.resident or self.start_auto_schedule(lat, lon, t_day, t_night, b_day, b_night,
+                                                         on_change) is None:
+            cmd = [
+                "redshift", "-l", f"{lat}:{lon}", "-t", f"{t_day}:{t_night}", "-b", f"{b_day}:{b_night}"
+            ]
+            if not redshift_fade:
+                cmd.append("-r")
+            pid, error = self.start_redshift_async(cmd, on_exit=on_exit)
+            if pid is None:
+                return False, error
+        self.mode = "auto"
+        self._state_changed()
+        return True, None
+
+    # --- Migawka stanu (szybki start okna) ---
+
+    def state_snapshot(self):
+        """
+        Zwarty opis ostatnio zastosowanego stanu: tryb, parametry, PID-y procesów, czas i pola okna.
+        """
+        return {
+            "version": STATE_SNAPSHOT_VERSION,
+            "time": round(time.time(), 1),
+            "mode": self.mode,
+            "manual": self.manual_params,
+            "outputs": {str(k): v for k, v in self.output_params.items()} if self.output_params else None,
+            "auto": self.auto_params if self.mode == "auto" else None,
+            "in_process": self.auto_scheduler is not None,
+            "pids": self._snapshot_pids(),
+            "form": self.form_state,
+        }
+
+    def _snapshot_pids(self):
+        """
+        PID-y do migawki: własne procesy oraz przejęte z poprzedniej migawki, które nadal działają.
+        """
+        pids = dict(self.owned_processes())
+        for pid, start in self.recorded_processes():
+            pids.setdefault(pid, start)
+        return [[pid, pids[pid]] for pid in sorted(pids)]
+
+    def _state_changed(self):
+        """
+        Zapisuje migawkę stanu - w pętli GLib z opóźnieniem (kolejne zmiany w ciągu
+        sekundy dają jeden zapis), poza nią od razu.
+        """
+        if "gi" not in sys.modules or GLib.main_depth() == 0:
+            self.write_state_snapshot()
+        elif not self._snapshot_timer:
+            self._snapshot_timer = GLib.timeout_add(1000, self._on_snapshot_timer)
+
+    def _on_snapshot_timer(self):
+        self._snapshot_timer = 0
+        self.write_state_snapshot()
+        return False
+
+    def write_state_snapshot(self, form_only=False):
+        """
+        Zapisuje migawkę (plik tymczasowy + rename), o ile jej treść się zmieniła. Zwraca (success, error).
+        form_only=True - zmienia tylko pola okna, a stan zostawia właścicielowi (demonowi).
+        """
+        if form_only:
+            previous = read_state_snapshot(self.state_path)
+            if previous is None or self.form_state is None:
+                return True, None
+            snapshot = dict(previous, form=self.form_state)
+        else:
+            snapshot = self.state_snapshot()
+        if snapshot["form"] is None:
+            previous = read_state_snapshot(self.state_path)
+            snapshot["form"] = previous.get("form") if previous else None
+        # czas nie wpływa na to, czy stan się zmienił
+        data = json.dumps(dict(snapshot, time=None), separators=(",", ":"))
+        if data == self._snapshot_data:
+            return True, None
+        directory = os.path.dirname(self.state_path)
+        try:
+            os.makedirs(directory, exist_ok=True)
+            fd, tmp_path = tempfile.mkstemp(prefix=".state.", dir=directory)
+            try:
+                with os.fdopen(fd, "w", encoding="utf-8") as tmp:
+                    tmp.write(json.dumps(snapshot, separators=(",", ":")))
+                os.replace(tmp_path, self.state_path)
+            except BaseException:
+                os.unlink(tmp_path)
+                raise
+        except OSError as e:
+            return False, str(e)
+        self._snapshot_data = data
+        return True, None
+
+    def restore_state_snapshot(self, snapshot):
+        """
+        Przyjmuje stan z migawki jako roboczy - do czasu weryfikacji (skan procesów, konfiguracja).
+        """
+        self.mode = snapshot.get("mode", "off")
+        manual = snapshot.get("manual")
+        self.manual_params = (int(manual[0]), float(manual[1]), tuple(manual[2])) if manual else None
+        outputs = snapshot.get("outputs")
+        self.output_params = {
+            int(k): (int(v[0]), float(v[1]), tuple(v[2])) for k, v in outputs.items()
+        } if outputs else None
+        self.auto_params = tuple(snapshot["auto"]) if snapshot.get("auto") else None
+
+    def status_snapshot(self):
+        """
+        Zwraca bieżący stan (tryb, parametry, procesy) jako słownik gotowy do serializacji JSON.
+        """
+        scheduler = self.auto_scheduler
+        adaptive = self.adaptive_brightness
+        return {
+            "mode": self.mode,
+            "manual": list(self.manual_params) if self.manual_params else None,
+            "outputs": {str(k): list(v) for k, v in self.output_params.items()} if self.output_params else None,
+            "auto": list(self.auto_params) if self.mode == "auto" and self.auto_params else None,
+            "in_process": scheduler is not None,
+            "current": list(scheduler.current) if scheduler is not None and scheduler.current else None,
+            "schedule": [
+                {"at": moment.isoformat(timespec="minutes"), "preset": entry.preset}
+                for moment, entry in self.profile_scheduler.upcoming()
+            ] if self.profile_scheduler is not None else None,
+            "adaptive": {
+                "lux": round(10 ** adaptive.level, 1) if adaptive.level is not None else None,
+                "brightness": adaptive.applied,
+                "interval": adaptive.interval,
+            } if adaptive is not None else None,
+            "processes": [
+                {"pid": proc.pid, "mode": proc.mode, "argv": list(proc.argv)}
+                for proc in sorted(self.status_monitor.processes.values())
+            ],
+        }
+
+    def kill_redshift(self):
+        """
+        Zatrzymuje procesy redshift nadzorowane przez program.
+        """
+        self.stop_auto_schedule()
+        finish = self.metrics.measure("kill")
+        self.supervisor.stop_all_sync()
+        finish()
+
+    def kill_redshift_gtk_async(self):
+        """
+        Zatrzymuje redshift-gtk bez czekania na killall - nie opóźnia pierwszej klatki okna.
+        """
+        try:
+            proc = Gio.Subprocess.new(["killall", "redshift-gtk"], Gio.SubprocessFlags.STDERR_SILENCE)
+        except GLib.Error:
+            return
+        proc.wait_async(None, lambda proc, result: proc.wait_finish(result))
+
+    def kill_redshift_gtk(self):
+        """
+        Zatrzymuje redshift-gtk (na starcie programu).
+        """
+        try:
+            subprocess.run(["killall", "redshift-gtk"], stderr=subprocess.DEVNULL)
+        except Exception:
+            pass
+
+    @classmethod
+    def validate_auto_params(cls, lat, lon, t_day, t_night, b_day, b_night):
+        """
+        Waliduje parametry trybu automatycznego. Zwraca komunikat błędu albo None.
+        """
+        if not all(str(v) for v in (lat, lon, t_day, t_night, b_day, b_night)):
+            return "Wszystkie pola trybu auto muszą być wypełnione."
+        if not (cls.validate_float(lat, -90, 90) and cls.validate_float(lon, -180, 180)):
+            return "Nieprawidłowe współrzędne geograficzne."
+        if not (cls.validate_int(t_day, 1000, 25000) and cls.validate_int(t_night, 1000, 25000)):
+            return "Temperatura powinna być liczbą z zakresu 1000-25000."
+        if not (cls.validate_float(b_day, 0.1, 1.0) and cls.validate_float(b_night, 0.1, 1.0)):
+            return "Jasność powinna być liczbą z zakresu 0.1-1.0."
+        return None
+
+    @classmethod
+    def validate_manual_params(cls, temp, bright, gamma):
+        """
+        Waliduje parametry trybu ręcznego. Zwraca komunikat błędu albo None.
+        """
+        if not cls.validate_int(temp, 1000, 25000):
+            return "Temperatura powinna być liczbą z zakresu 1000-25000."
+        if not cls.validate_float(bright, 0.1, 1.0):
+            return "Jasność powinna być liczbą z zakresu 0.1-1.0."
+        return cls.validate_gamma(gamma)
+
+    @classmethod
+    def validate_gamma(cls, gamma):
+        """
+        Waliduje trójkę gamma (R, G, B). Zwraca komunikat błędu albo None.
+        """
+        if (not isinstance(gamma, (list, tuple)) or len(gamma) != 3
+                or not all(cls.validate_float(g, 0.1, 10.0) for g in gamma)):
+            return "Gamma powinna składać się z trzech liczb z zakresu 0.1-10.0."
+        return None
+
+    @staticmethod
+    def validate_float(value, min_val, max_val):
+        """
+        Waliduje wartość zmiennoprzecinkową.
+        """
+        try:
+            val = float(value)
+            if not (min_val <= val <= max_val):
+                return False
+            return True
+        except (TypeError, ValueError):
+            return False
+
+    @staticmethod
+    def validate_int(value, min_val, max_val):
+        """
+        Waliduje wartość całkowitą.
+        """
+        try:
+            val = int(value)
+            if not (min_val <= val <= max_val):
+                return False
+            return True
+        except (TypeError, ValueError):
+            return False
+
+def read_state_snapshot(path=STATE_SNAPSHOT_PATH):
+    """
+    Wczytuje migawkę stanu jednym odczytem. Zwraca słownik albo None (brak pliku, inna wersja).
+    """
+    try:
+        fd = os.open(path, os.O_RDONLY | os.O_CLOEXEC)
+    except OSError:
+        return None
+    try:
+        data = os.read(fd, 65536)
+    finally:
+        os.close(fd)
+    try:
+        snapshot = json.loads(data)
+    except ValueError:
+        return None
+    if not isinstance(snapshot, dict) or snapshot.get("version") != STATE_SNAPSHOT_VERSION:
+        return None
+    return snapshot
+
+def process_start_time(pid):
+    """
+    Czas startu procesu (pole 22 /proc/PID/stat, w taktach zegara) albo None, gdy proces nie istnieje.
+    Para (PID, czas startu) odróżnia proces od późniejszego z tym samym PID.
+    """
+    try:
+        with open(f"/proc/{pid}/stat", "rb") as f:
+            data = f.read()
+    except OSError:
+        return None
+    # nazwa procesu (pole 2) może zawierać spacje i nawiasy - pola liczymy od ostatniego ")"
+    return int(data[data.rindex(b")") + 2:].split()[19])
+
+def system_boot_time():
+    """
+    Czas uruchomienia systemu (znacznik uniksowy) - starsze migawki opisują stan sprzed restartu.
+    """
+    return time.time() - time.clock_gettime(time.CLOCK_BOOTTIME)
+
+class CoalescingDispatcher:
+    """
+    Koalescencja żądań zastosowania ustawień: co najwyżej jedno wywołanie w toku,
+    wartości pośrednie są pomijane (wygrywa najnowsza), a częstotliwość ograniczona.
+    """
+    def __init__(self, apply_func, min_interval=0.1):
+        # apply_func(state, done) musi wywołać done(success) po zakończeniu
+        self.apply_func = apply_func
+        self.min_interval = min_interval
+        self.last_applied = None
+        self._pending = None
+        self._in_flight = False
+        self._last_start = 0.0
+        self._timer_id = 0
+
+    def request(self, state):
+        """
+        Zgłasza nowy stan do zastosowania.
+        """
+        if not self._in_flight and state == self.last_applied:
+            self._pending = None
+            return
+        self._pending = state
+        self._pump()
+
+    def cancel(self):
+        """
+        Porzuca oczekujące żądanie i zapomina ostatnio zastosowany stan.
+        """
+        self._pending = None
+        self.last_applied = None
+        if self._timer_id:
+            GLib.source_remove(self._timer_id)
+            self._timer_id = 0
+
+    def _pump(self):
+        if self._in_flight or self._pending is None or self._timer_id:
+            return
+        if self._pending == self.last_applied:
+            self._pending = None
+            return
+        wait = self._last_start + self.min_interval - GLib.get_monotonic_time() / 1e6
+        if wait > 0:
+            self._timer_id = GLib.timeout_add(int(wait * 1000) + 1, self._on_timer)
+            return
+        state, self._pending = self._pending, None
+        self._in_flight = True
+        self._last_start = GLib.get_monotonic_time() / 1e6
+        self.apply_func(state, lambda success: self._on_done(state, success))
+
+    def _on_timer(self):
+        self._timer_id = 0
+        self._pump()
+        return False
+
+    def _on_done(self, state, success):
+        self._in_flight = False
+        if success:
+            self.last_applied = state
+        self._pump()
+
+# Kolory neutralne: bez korekty temperatury (punkt bieli 1, 1, 1) - rampa tożsamościowa jak redshift -x
+NEUTRAL_STATE = (None, 1.0, (1.0, 1.0, 1.0))
+NEUTRAL_TEMP = 6500  # temperatura dla poleceń redshift, gdy potrzebna jest liczba
+FADE_MAX = 60.0  # najdłuższe płynne przejście (s)
+
+def _white_of(temp):
+    if temp is None:
+        return (1.0, 1.0, 1.0)
+    return tuple(temp) if isinstance(temp, tuple) else whitepoint(temp)
+
+def interpolate_state(start, target, alpha):
+    """
+    Stan pośredni (temperatura, jasność, gamma) dla alpha z przedziału 0..1.
+    Gdy jeden ze stanów nie ma temperatury (kolory neutralne) albo ma już punkt bieli,
+    interpolowany jest punkt bieli, a w miejscu temperatury zwracana jest krotka (R, G, B).
+    """
+    if isinstance(start[0], (int, float)) and isinstance(target[0], (int, float)):
+        temp = int(round(start[0] + (target[0] - start[0]) * alpha))
+    else:
+        temp = tuple(round(s + (t - s) * alpha, 4) for s, t in zip(_white_of(start[0]), _white_of(target[0])))
+    bright = round(start[1] + (target[1] - start[1]) * alpha, 3)
+    gamma = tuple(round(s + (t - s) * alpha, 3) for s, t in zip(start[2], target[2]))
+    return temp, bright, gamma
+
+class TransitionEngine:
+    """
+    Płynne przejście od aktualnie ustawionego stanu do docelowego. Klatki są wysyłane
+    z docelową częstotliwością, która spada, gdy pojedyncze zastosowanie trwa dłużej;
+    w toku jest najwyżej jedna klatka, więc zaległe klatki są pomijane, a nie kolejkowane.
+    Nowy cel w trakcie przejścia startuje z bieżącej pozycji.
+    """
+    def __init__(self, apply_func, fps=30, min_fps=2):
+        # apply_func(state, done) musi wywołać done(success, error) po zakończeniu
+        self.apply_func = apply_func
+        self.fps = fps
+        self.min_fps = min_fps
+        self.current = None  # ostatnio zastosowany stan
+        self.latency = None  # średnia krocząca czasu zastosowania klatki (s)
+        self.frames = 0
+        self.dropped = 0
+        self._start = None
+        self._target = None
+        self._t0 = 0.0
+        self._duration = 0.0
+        self._callback = None
+        self._in_flight = False
+        self._timer_id = 0
+
+    @property
+    def active(self):
+        return self._target is not None
+
+    @property
+    def frame_interval(self):
+        """
+        Odstęp między klatkami: 1/fps, wydłużony do 1.5x zmierzonego czasu zastosowania.
+        """
+        interval = 1.0 / self.fps
+        if self.latency is not None:
+            interval = max(interval, self.latency * 1.5)
+        return min(interval, 1.0 / self.min_fps)
+
+    def fade_to(self, target, duration, callback=None):
+        """
+        Rozpoczyna przejście do stanu target w ciągu duration sekund. callback(success, error)
+        po dojściu do celu; callback przejścia zastąpionego nowym celem nie jest wywoływany.
+        """
+        temp = target[0] if target[0] is None else int(target[0])
+        target = (temp, float(target[1]), tuple(float(g) for g in target[2]))
+        self._stop_timer()
+        self._start = self.current if self.current is not None and duration > 0 else target
+        self._target = target
+        self._t0 = GLib.get_monotonic_time() / 1e6
+        self._duration = max(0.0, duration)
+        self._callback = callback
+        if not self._in_flight:
+            self._frame()
+
+    def cancel(self):
+        """
+        Przerywa przejście w bieżącym miejscu (bez wywołania callbacku).
+        """
+        self._stop_timer()
+        self._target = None
+        self._callback = None
+
+    def _stop_timer(self):
+        if self._timer_id:
+            GLib.source_remove(self._timer_id)
+            self._timer_id = 0
+
+    def _on_timer(self):
+        self._timer_id = 0
+        self._frame()
+        return False
+
+    def _frame(self):
+        if self._target is None:
+            return
+        now = GLib.get_monotonic_time() / 1e6
+        progress = (now - self._t0) / self._duration if self._duration > 0 else 1.0
+        if progress >= 1.0:
+            state = self._target
+        else:
+            eased = progress * progress * (3 - 2 * progress)
+            state = interpolate_state(self._start, self._target, eased)
+            if state == self.current:
+                self._schedule(self.frame_interval)
+                return
+        self._in_flight = True
+        self.apply_func(state, lambda success, error: self._on_applied(state, now, success, error))
+
+    def _on_applied(self, state, started, success, error):
+        self._in_flight = False
+        elapsed = GLib.get_monotonic_time() / 1e6 - started
+        self.latency = elapsed if self.latency is None else 0.8 * self.latency + 0.2 * elapsed
+        self.frames += 1
+        self.dropped += max(0, int(elapsed * self.fps) - 1)
+        if success:
+            self.current = state
+        if self._target is None:
+            return
+        if not success:
+            self._finish(False, error)
+            return
+        if state == self._target:
+            self._finish(True, None)
+            return
+        self._schedule(max(0.0, self.frame_interval - elapsed))
+
+    def _schedule(self, delay):
+        self._stop_timer()
+        self._timer_id = GLib.timeout_add(int(delay * 1000), self._on_timer)
+
+    def _finish(self, success, error):
+        callback = self._callback
+        self._target = None
+        self._callback = None
+        if callback:
+            callback(success, error)
+
+# --- Harmonogram profili (presety przełączane o zadanych godzinach) ---
+
+WEEKDAY_NAMES = {
+    "mon": 0, "tue": 1, "wed": 2, "thu": 3, "fri": 4, "sat": 5, "sun": 6,
+    "pn": 0, "wt": 1, "sr": 2, "śr": 2, "cz": 3, "pt": 4, "sb": 5, "so": 5, "nd": 6,
+}
+ALL_WEEKDAYS = frozenset(range(7))
+PRESET_OFF = "off"  # wbudowany preset: neutralne kolory
+
+ScheduleEntry = collections.namedtuple("ScheduleEntry", "time days preset")
+
+def parse_weekdays(spec):
+    """
+    Zamienia opis dni ("*", "mon-fri", "sat,sun", "pn-pt") na zbiór numerów dni (0 - poniedziałek).
+    Nieznany dzień albo niepełny zakres ("mon-") - KeyError.
+    """
+    spec = spec.strip().lower()
+    if spec in ("", "*"):
+        return ALL_WEEKDAYS
+    days = set()
+    for part in spec.split(","):
+        first, dash, last = part.strip().partition("-")
+        start = WEEKDAY_NAMES[first.strip()]
+        end = WEEKDAY_NAMES[last.strip()] if dash else start
+        day = start
+        days.add(day)
+        while day != end:  # zakres może przechodzić przez niedzielę, np. fri-mon
+            day = (day + 1) % 7
+            days.add(day)
+    return frozenset(days)
+
+def format_weekdays(days):
+    """
+    Odwrotność parse_weekdays() dla zapisu w pliku konfiguracyjnym (kolejne dni jako zakres).
+    """
+    if days == ALL_WEEKDAYS:
+        return "*"
+    names = ("mon", "tue", "wed", "thu", "fri", "sat", "sun")
+    parts = []
+    for day in sorted(days):
+        if parts and parts[-1][1] == day - 1:
+            parts[-1][1] = day
+        else:
+            parts.append([day, day])
+    return ",".join(names[a] if a == b else f"{names[a]}-{names[b]}" for a, b in parts)
+
+def next_occurrence(entry, after):
+    """
+    Najbliższa chwila (lokalny datetime) wpisu harmonogramu późniejsza niż after.
+    """
+    for offset in range(8):
+        date = after.date() + datetime.timedelta(days=offset)
+        moment = datetime.datetime.combine(date, entry.time)
+        if date.weekday() in entry.days and moment > after:
+            return moment
+    return None
+
+def previous_occurrence(entry, before):
+    """
+    Ostatnia chwila wpisu harmonogramu nie późniejsza niż before (w ciągu tygodnia).
+    """
+    for offset in range(8):
+        date = before.date() - datetime.timedelta(days=offset)
+        moment = datetime.datetime.combine(date, entry.time)
+        if date.weekday() in entry.days and moment <= before:
+            return moment
+    return None
+
+class _timespec(ctypes.Structure):
+    _fields_ = [("tv_sec", ctypes.c_long), ("tv_nsec", ctypes.c_long)]
+
+class _itimerspec(ctypes.Structure):
+    _fields_ = [("it_interval", _timespec), ("it_value", _timespec)]
+
+class WallClockTimer:
+    """
+    Jednorazowy budzik na chwilę czasu zegarowego: timerfd na CLOCK_REALTIME
+    z TFD_TIMER_CANCEL_ON_SET obserwowany w pętli GLib. Odlicza także podczas
+    uśpienia i zgłasza przestawienie zegara. callback(clock_changed).
+    Bez timerfd (poza Linuksem) - zwykły timeout GLib.
+    """
+    CLOCK_REALTIME = 0
+    TFD_NONBLOCK = 0o4000
+    TFD_CLOEXEC = 0o2000000
+    TFD_TIMER_ABSTIME = 1
+    TFD_TIMER_CANCEL_ON_SET = 2
+
+    def __init__(self, callback):
+        self.callback = callback
+        self._fd = None
+        self._watch_id = 0
+        self._timeout_id = 0
+        try:
+            self._libc = ctypes.CDLL(ctypes.util.find_library("c"), use_errno=True)
+            fd = self._libc.timerfd_create(self.CLOCK_REALTIME, self.TFD_NONBLOCK | self.TFD_CLOEXEC)
+        except (OSError, AttributeError):
+            fd = -1
+        if fd >= 0:
+            self._fd = fd
+            self._watch_id = GLib.unix_fd_add_full(GLib.PRIORITY_DEFAULT, fd, GLib.IOCondition.IN,
+                                                   self._on_ready)
+
+    def arm(self, timestamp):
+        """
+        Ustawia budzik na podany czas uniksowy (zastępuje poprzedni).
+        """
+        if self._fd is None:
+            self._cancel_timeout()
+            delay = max(0.0, timestamp - time.time())
+            self._timeout_id = GLib.timeout_add_seconds(max(1, int(math.ceil(delay))), self._on_timeout)
+            return
+        spec = _itimerspec()
+        spec.it_value.tv_sec = int(timestamp)
+        spec.it_value.tv_nsec = int((timestamp % 1) * 1e9)
+        flags = self.TFD_TIMER_ABSTIME | self.TFD_TIMER_CANCEL_ON_SET
+        if self._libc.timerfd_settime(self._fd, flags, ctypes.byref(spec), None) != 0:
+            raise OSError(ctypes.get_errno(), os.strerror(ctypes.get_errno()))
+
+    def disarm(self):
+        if self._fd is None:
+            self._cancel_timeout()
+            return
+        self._libc.timerfd_settime(self._fd, 0, ctypes.byref(_itimerspec()), None)
+
+    def close(self):
+        self._cancel_timeout()
+        if self._watch_id:
+            GLib.source_remove(self._watch_id)
+            self._watch_id = 0
+        if self._fd is not None:
+            os.close(self._fd)
+            self._fd = None
+
+    def _cancel_timeout(self):
+        if self._timeout_id:
+            GLib.source_remove(self._timeout_id)
+            self._timeout_id = 0
+
+    def _on_timeout(self):
+        self._timeout_id = 0
+        self.callback(False)
+        return False
+
+    def _on_ready(self, fd, condition):
+        try:
+            os.read(fd, 8)
+            clock_changed = False
+        except BlockingIOError:
+            return True
+        except OSError as e:
+            if e.errno != errno.ECANCELED:
+                raise
+            clock_changed = True  # zegar przestawiono - budzik jest rozbrojony
+        self.callback(clock_changed)
+        return True
+
+class ProfileScheduler:
+    """
+    Przełącza presety według harmonogramu. Nadchodzące przełączenia są w kolejce
+    priorytetowej (heapq), a uzbrojony jest tylko jeden budzik - na najbliższe z nich;
+    między przełączeniami proces nie jest budzony. Po przestawieniu zegara lub
+    wybudzeniu kolejka jest przeliczana od nowa. on_switch(entry).
+    """
+    def __init__(self, entries, on_switch):
+        self.entries = list(entries)
+        self.on_switch = on_switch
+        self.active = None  # wpis obowiązujący od ostatniego przełączenia (albo od uruchomienia)
+        self._heap = []
+        self._timer = None
+        self._bus = None
+        self._sleep_subscription = 0
+
+    def start(self):
+        """
+        Uzbraja budzik na najbliższe przełączenie. Preset obowiązujący teraz nie jest
+        stosowany - uruchomienie (start okna, zapis konfiguracji) nie nadpisuje ustawień.
+        """
+        self._timer = WallClockTimer(self._on_timer)
+        try:
+            # logind: PrepareForSleep(False) po wybudzeniu
+            self._bus = Gio.bus_get_sync(Gio.BusType.SYSTEM, None)
+            self._sleep_subscription = self._bus.signal_subscribe(
+                "org.freedesktop.login1", "org.freedesktop.login1.Manager", "PrepareForSleep",
+                "/org/freedesktop/login1", None, Gio.DBusSignalFlags.NONE, self._on_prepare_for_sleep
+            )
+        except GLib.Error:
+            self._bus = None
+        self.recompute()
+
+    def stop(self):
+        if self._timer is not None:
+            self._timer.close()
+            self._timer = None
+        if self._bus is not None:
+            self._bus.signal_unsubscribe(self._sleep_subscription)
+            self._bus = None
+        self._heap = []
+
+    def _on_prepare_for_sleep(self, connection, sender, path, interface, signal_name, parameters):
+        if not parameters.unpack()[0]:
+            self.recompute(apply_current=True)
+
+    def recompute(self, apply_current=False):
+        """
+        Buduje kolejkę od bieżącej chwili. apply_current (przestawienie zegara, wybudzenie) -
+        przełącza na preset obowiązujący teraz, jeśli w międzyczasie minęła granica przełączenia;
+        bez niego obowiązujący wpis jest tylko zapamiętywany.
+        """
+        now = datetime.datetime.now()
+        self._heap = []
+        for index, entry in enumerate(self.entries):
+            moment = next_occurrence(entry, now)
+            if moment is not None:
+                self._heap.append((moment, index))
+        heapq.heapify(self._heap)
+        past = [(previous_occurrence(e, now), i) for i, e in enumerate(self.entries)]
+        past = [p for p in past if p[0] is not None]
+        current = self.entries[max(past)[1]] if past else None
+        if not apply_current:
+            self.active = current
+        elif current is not None and current is not self.active:
+            # wpis już aktywny nie jest stosowany ponownie - ręczne zmiany pozostają do następnego przełączenia
+            self._switch(current)
+        self._arm()
+
+    def upcoming(self, count=5):
+        """
+        Zwraca najbliższe przełączenia jako listę (datetime, wpis).
+        """
+        return [(moment, self.entries[index]) for moment, index in heapq.nsmallest(count, self._heap)]
+
+    def _arm(self):
+        if self._timer is None:
+            return
+        if self._heap:
+            self._timer.arm(self._heap[0][0].timestamp())
+        else:
+            self._timer.disarm()
+
+    def _on_timer(self, clock_changed):
+        if clock_changed:
+            self.recompute(apply_current=True)
+            return
+        now = datetime.datetime.now()
+        due = None
+        while self._heap and self._heap[0][0] <= now:
+            moment, index = heapq.heappop(self._heap)
+            due = (moment, index)
+            following = next_occurrence(self.entries[index], moment)
+            if following is not None:
+                heapq.heappush(self._heap, (following, index))
+        if due is not None:
+            self._switch(self.entries[due[1]])
+        self._arm()
+
+    def _switch(self, entry):
+        self.active = entry
+        self.on_switch(entry)
+
+# --- Jasność adaptacyjna (czujnik światła otoczenia IIO) ---
+
+IIO_DEVICES_PATH = "/sys/bus/iio/devices"
+
+class AmbientLightSensor:
+    """
+    Czujnik światła otoczenia z sysfs (IIO): in_illuminance*_input w luksach albo
+    in_illuminance*_raw przeliczane przez _scale i _offset. Plik wartości jest
+    otwarty na stałe i czytany przez pread - jeden syscall na próbkę.
+    """
+    def __init__(self, device_path):
+        self.device_path = device_path
+        self.scale, self.offset = 1.0, 0.0
+        names = sorted(os.listdir(device_path))
+        inputs = [n for n in names if n.startswith("in_illuminance") and n.endswith("_input")]
+        raws = [n for n in names if n.startswith("in_illuminance") and n.endswith("_raw")]
+        if inputs:
+            value_name = inputs[0]
+        elif raws:
+            value_name = raws[0]
+            prefix = value_name[:-len("raw")]
+            self.scale = self._read_number(prefix + "scale", 1.0)
+            self.offset = self._read_number(prefix + "offset", 0.0)
+        else:
+            raise OSError(f"Brak odczytu natężenia światła w {device_path}")
+        self._fd = os.open(os.path.join(device_path, value_name), os.O_RDONLY | os.O_CLOEXEC)
+
+    def _read_number(self, name, default):
+        try:
+            with open(os.path.join(self.device_path, name)) as f:
+                return float(f.read().strip())
+        except (OSError, ValueError):
+            return default
+
+    def read_lux(self):
+        return (float(os.pread(self._fd, 64, 0).strip()) + self.offset) * self.scale
+
+    def close(self):
+        if self._fd is not None:
+            os.close(self._fd)
+            self._fd = None
+
+def find_light_sensor(root=IIO_DEVICES_PATH):
+    """
+    Zwraca katalog pierwszego urządzenia IIO z odczytem natężenia światła albo None.
+    """
+    try:
+        devices = sorted(os.listdir(root))
+    except OSError:
+        return None
+    for device in devices:
+        path = os.path.join(root, device)
+        try:
+            if any(n.startswith("in_illuminance") for n in os.listdir(path)):
+                return path
+        except OSError:
+            continue
+    return None
+
+class AdaptiveBrightness:
+    """
+    Pętla jasności adaptacyjnej: próbki z czujnika są wygładzane filtrem EMA
+    (w skali logarytmicznej - tak jak oko odbiera jasność) i mapowane na zakres
+    jasności. Zmiana jest stosowana dopiero po przekroczeniu progu min_step,
+    a odwrócenie kierunku wymaga dodatkowo progu histerezy. Dopóki filtr się
+    nie ustabilizuje, stosowane są tylko duże skoki (jump_step), więc jedna zmiana
+    oświetlenia to zwykle jedno-dwa zastosowania. Gdy odczyty są stabilne,
+    odstęp między próbkami rośnie dwukrotnie aż do interval_max.
+    """
+    def __init__(self, logic, sensor, on_change=None, min_bright=0.5, max_bright=1.0,
+                 lux_dark=5.0, lux_bright=500.0, alpha=0.3, min_step=0.05, hysteresis=0.03, jump_step=0.2,
+                 interval_min=2.0, interval_max=64.0, stable_delta=0.02):
+        self.logic = logic
+        self.sensor = sensor
+        self.on_change = on_change  # on_change(jasność) po zastosowaniu
+        self.min_bright, self.max_bright = min_bright, max_bright
+        self.lux_dark, self.lux_bright = lux_dark, lux_bright
+        self.alpha = alpha
+        self.min_step = min_step
+        self.hysteresis = hysteresis
+        self.jump_step = jump_step
+        self.interval_min, self.interval_max = interval_min, interval_max
+        self.stable_delta = stable_delta  # zmiana log10(lux) uznawana za stabilny odczyt
+        self.interval = interval_min
+        self.level = None  # wygładzony log10(lux)
+        self.applied = None  # ostatnio zastosowana jasność
+        self.samples = 0
+        self.applies = 0
+        self._direction = 0
+        self._timer_id = 0
+
+    def start(self):
+        self._sample()
+
+    def stop(self):
+        if self._timer_id:
+            GLib.source_remove(self._timer_id)
+            self._timer_id = 0
+
+    def target_brightness(self, level):
+        """
+        Jasność dla wygładzonego poziomu log10(lux), zaokrąglona do 0.01.
+        """
+        low, high = math.log10(self.lux_dark), math.log10(self.lux_bright)
+        alpha = max(0.0, min(1.0, (level - low) / (high - low)))
+        return round(self.min_bright + (self.max_bright - self.min_bright) * alpha, 2)
+
+    def _on_timer(self):
+        self._timer_id = 0
+        self._sample()
+        return False
+
+    def _sample(self):
+        try:
+            lux = self.sensor.read_lux()
+        except (OSError, ValueError) as e:
+            print(f"Błąd odczytu czujnika światła: {e}")
+            self.interval = self.interval_max
+            self._timer_id = GLib.timeout_add(int(self.interval * 1000), self._on_timer)
+            return
+        self.samples += 1
+        sample = math.log10(max(lux, 0.01))
+        previous = self.level
+        self.level = sample if previous is None else previous + self.alpha * (sample - previous)
+        # odstęp próbkowania: podwajany przy stabilnych odczytach, skracany przy zmianie
+        stable = previous is not None and abs(self.level - previous) < self.stable_delta
+        if stable:
+            self.interval = min(self.interval * 2, self.interval_max)
+        else:
+            self.interval = self.interval_min
+        self._maybe_apply(self.target_brightness(self.level), stable)
+        self._timer_id = GLib.timeout_add(int(self.interval * 1000), self._on_timer)
+
+    def _maybe_apply(self, target, stable):
+        if self.applied is not None:
+            delta = target - self.applied
+            direction = 1 if delta > 0 else -1
+            threshold = self.min_step if stable else self.jump_step
+            if self._direction and direction != self._direction:
+                threshold += self.hysteresis
+            if abs(delta) < threshold - 1e-9:
+                return
+            self._direction = direction
+        self.applied = target
+        self.applies += 1
+        self.logic.set_brightness_async(target, self._on_applied)
+
+    def _on_applied(self, success, error):
+        if not success:
+            print(f"Jasność adaptacyjna: {error}")
+        elif self.on_change:
+            self.on_change(self.applied)
+
+# --- Demon sterujący (IPC przez gniazdo Unix) ---
+
+class ControllerDaemon:
+    """
+    Długo działający demon przechowujący stan RedshiftLogic i obsługujący prosty
+    protokół żądanie/odpowiedź (JSON, jedna linia na komunikat) przez gniazdo Unix.
+    Polecenia: apply, outputs, auto, reset, status, subscribe, metrics, schedule, ambient.
+    """
+    def __init__(self, logic=None, socket_path=DAEMON_SOCKET_PATH):
+        self.logic = logic or RedshiftLogic()
+        self.logic.resident = True  # demon działa stale - tryb auto może działać w procesie
+        self.socket_path = socket_path
+        self.service = None
+        self.subscribers = set()
+        self._connections = set()
+        self.logic.status_monitor.on_change = lambda processes: self._broadcast_status()
+
+    def start(self):
+        """
+        Tworzy gniazdo nasłuchujące. Zwraca (success, error).
+        """
+        if os.path.exists(self.socket_path):
+            try:
+                send_daemon_request({"cmd": "status"}, self.socket_path, timeout=1.0)
+                return False, f"Demon już działa: {self.socket_path}"
+            except (OSError, ValueError):
+                os.unlink(self.socket_path)  # pozostałość po poprzednim uruchomieniu
+        self.service = Gio.SocketService()
+        try:
+            self.service.add_address(Gio.UnixSocketAddress.new(self.socket_path), Gio.SocketType.STREAM,
+                                     Gio.SocketProtocol.DEFAULT, None)
+        except GLib.Error as e:
+            return False, e.message
+        os.chmod(self.socket_path, 0o600)
+        self.service.connect("incoming", self._on_incoming)
+        self.service.start()
+        self.logic.status_monitor.refresh()
+        self.logic.adopt_session_processes()
+        self._apply_controller_config(self.logic.load_config())
+        self.logic.watch_config(self._apply_controller_config)
+        return True, None
+
+    def _apply_controller_config(self, config):
+        """
+        Uruchamia usługi zapisane w konfiguracji: harmonogram presetów i jasność adaptacyjną.
+        """
+        self.logic.start_profile_schedule(self._on_preset_switched)
+        enabled, sensor_path = self.logic.ambient_settings(config)
+        if not enabled:
+            self.logic.stop_adaptive_brightness()
+        elif (self.logic.adaptive_brightness is None
+              or sensor_path not in (None, self.logic.adaptive_brightness.sensor.device_path)):
+            success, error = self.logic.start_adaptive_brightness(
+                sensor_path, on_change=lambda bright: self._broadcast_status()
+            )
+            if not success:
+                print(f"Jasność adaptacyjna: {error}")
+
+    def _on_preset_switched(self, entry, success, error):
+        self._broadcast_status()
+
+    def stop(self):
+        self.logic.stop_profile_schedule()
+        self.logic.stop_adaptive_brightness()
+        if self.service is not None:
+            self.service.stop()
+            self.service.close()
+            self.service = None
+        if os.path.exists(self.socket_path):
+            os.unlink(self.socket_path)
+
+    def run(self):
+        """
+        Uruchamia demona w pętli GLib (do SIGINT/SIGTERM).
+        """
+        success, error = self.start()
+        if not success:
+            print(f"Błąd uruchamiania demona: {error}")
+            return 1
+        loop = GLib.MainLoop()
+        for sig in (signal.SIGINT, signal.SIGTERM):
+            GLib.unix_signal_add(GLib.PRIORITY_DEFAULT, sig, lambda: loop.quit() or False)
+        try:
+            loop.run()
+        finally:
+            self.stop()
+        return 0
+
+    def _on_incoming(self, service, connection, source_object):
+        stream = Gio.DataInputStream.new(connection.get_input_stream())
+        self._connections.add(connection)
+        self._read_next(connection, stream)
+        return True
+
+    def _read_next(self, connection, stream):
+        stream.read_line_async(GLib.PRIORITY_DEFAULT, None, self._on_line, connection)
+
+    def _close(self, connection):
+        self.subscribers.discard(connection)
+        self._connections.discard(connection)
+        try:
+            connection.close(None)
+        except GLib.Error:
+            pass
+
+    def _send(self, connection, message):
+        try:
+            data = (json.dumps(message) + "\n").encode("utf-8")
+            connection.get_output_stream().write_all(data, None)
+            return True
+        except GLib.Error:
+            self._close(connection)
+            return False
+
+    def _on_line(self, stream, result, connection):
+        try:
+            line, _ = stream.read_line_finish_utf8(result)
+        except GLib.Error:
+            line = None
+        if line is None:
+            self._close(connection)
+            return
+        try:
+            request = json.loads(line)
+            handler = getattr(self, f"_cmd_{request.get('cmd')}", None)
+        except (ValueError, AttributeError):
+            request, handler = None, None
+        if handler is None:
+            self._send(connection, {"ok": False, "error": "Nieznane lub nieprawidłowe polecenie."})
+        else:
+            try:
+                handler(request, connection)
+            except Exception as e:
+                # błędne żądanie nie może zostawić klienta bez odpowiedzi ani przerwać połączenia
+                self._send(connection, {"ok": False, "error": f"Nieprawidłowe żądanie: {e}"})
+        self._read_next(connection, stream)
+
+    def _reply(self, connection):
+        return lambda success, error=None: self._send(
+            connection, {"ok": success, "error": error, "status": self.logic.status_snapshot()}
+        )
+
+    def _broadcast_status(self):
+        message = {"event": "status", "status": self.logic.status_snapshot()}
+        for connection in list(self.subscribers):
+            self._send(connection, message)
+
+    def _cmd_status(self, request, connection):
+        self.logic.status_monitor.refresh()
+        self._send(connection, {"ok": True, "status": self.logic.status_snapshot()})
+
+    def _cmd_metrics(self, request, connection):
+        self._send(connection, {"ok": True, "metrics": self.logic.metrics.summary()})
+
+    def _cmd_schedule(self, request, connection):
+        # ponowne wczytanie harmonogramu z pliku (np. po edycji ręcznej) i lista przełączeń
+        count = self.logic.start_profile_schedule(self._on_preset_switched)
+        self._send(connection, {"ok": True, "entries": count, "status": self.logic.status_snapshot()})
+
+    def _cmd_ambient(self, request, connection):
+        # {"enabled": true/false, "sensor": katalog urządzenia IIO (opcjonalnie)}
+        if request.get("enabled", True):
+            success, error = self.logic.start_adaptive_brightness(
+                request.get("sensor"), on_change=lambda bright: self._broadcast_status()
+            )
+        else:
+            self.logic.stop_adaptive_brightness()
+            success, error = True, None
+        self._send(connection, {"ok": success, "error": error, "status": self.logic.status_snapshot()})
+
+    def _cmd_subscribe(self, request, connection):
+        self.subscribers.add(connection)
+        self._send(connection, {"ok": True, "status": self.logic.status_snapshot()})
+
+    def _cmd_apply(self, request, connection):
+        temp = request.get("temp", 6500)
+        bright = request.get("brightness", 1.0)
+        gamma = request.get("gamma", [1.0, 1.0, 1.0])
+        fade = request.get("fade", 0)
+        error = self.logic.validate_manual_params(temp, bright, gamma) or self._validate_fade(fade)
+        if error:
+            self._send(connection, {"ok": False, "error": error})
+            return
+        reply = self._reply(connection)
+
+        def on_applied(success, error):
+            reply(success, error)
+            self._broadcast_status()
+
+        params = (int(temp), float(bright), [float(g) for g in gamma])
+        if float(fade) > 0:
+            self.logic.switch_mode_async("manual", params, float(fade), on_applied)
+            return
+        self.logic.kill_redshift_async(lambda: self.logic.apply_manual_async(*params, on_applied))
+
+    def _cmd_outputs(self, request, connection):
+        # {"profiles": {"CRTC": [temp, jasność, [R, G, B]]}} - osobne ustawienia wyjść
+        profiles = {}
+        for crtc, profile in (request.get("profiles") or {}).items():
+            if not (str(crtc).isdigit() and isinstance(profile, list) and len(profile) == 3):
+                self._send(connection, {"ok": False, "error": f"Nieprawidłowy profil wyjścia {crtc}."})
+                return
+            error = self.logic.validate_manual_params(*profile)
+            if error:
+                self._send(connection, {"ok": False, "error": f"CRTC {crtc}: {error}"})
+                return
+            temp, bright, gamma = profile
+            profiles[int(crtc)] = (int(temp), float(bright), tuple(float(g) for g in gamma))
+        if not profiles:
+            self._send(connection, {"ok": False, "error": "Brak profili wyjść."})
+            return
+
+        def on_applied(results):
+            failed = [f"CRTC {crtc}: {error}" for crtc, (success, error) in sorted(results.items()) if not success]
+            self._send(connection, {
+                "ok": not failed, "error": "; ".join(failed) or None,
+                "results": {str(crtc): list(result) for crtc, result in results.items()},
+                "status": self.logic.status_snapshot(),
+            })
+            self._broadcast_status()
+
+        self.logic.kill_redshift_async(lambda: self.logic.apply_outputs_async(profiles, on_applied))
+
+    @staticmethod
+    def _validate_fade(fade):
+        if not RedshiftLogic.validate_float(str(fade), 0.0, FADE_MAX):
+            return f"Czas przejścia musi być liczbą z zakresu 0-{FADE_MAX:g} s."
+        return None
+
+    def _cmd_auto(self, request, connection):
+        values = [str(request.get(key, "")) for key in (
+            "lat", "lon", "temp_day", "temp_night", "brightness_day", "brightness_night")]
+        fade = request.get("fade", 0)
+        error = self.logic.validate_auto_params(*values) or self._validate_fade(fade)
+        if error:
+            self._send(connection, {"ok": False, "error": error})
+            return
+        reply = self._reply(connection)
+        on_change = lambda temp, bright: self._broadcast_status()
+        on_exit = lambda success, error: self.logic.status_monitor.refresh()
+
+        def on_started(success, error):
+            self.logic.status_monitor.refresh()
+            reply(success, error)
+
+        if float(fade) > 0:
+            self.logic.switch_mode_async("auto", values, float(fade), on_started, on_change, on_exit)
+            return
+        self.logic.kill_redshift_async(
+            lambda: on_started(*self.logic.start_auto_mode(*values, on_change=on_change, on_exit=on_exit))
+        )
+
+    def _cmd_reset(self, request, connection):
+        fade = request.get("fade", 0)
+        error = self._validate_fade(fade)
+        if error:
+            self._send(connection, {"ok": False, "error": error})
+            return
+        reply = self._reply(connection)
+
+        def on_reset(success, error):
+            reply(success, error)
+            self._broadcast_status()
+
+        if float(fade) > 0:
+            self.logic.switch_mode_async("off", None, float(fade), on_reset)
+            return
+        self.logic.kill_redshift_async(lambda: self.logic.reset_async(on_reset))
+
+def send_daemon_request(request, socket_path=DAEMON_SOCKET_PATH, timeout=5.0):
+    """
+    Wysyła jedno żądanie do demona i zwraca odpowiedź (słownik).
+    Rzuca OSError, gdy demon nie działa.
+    """
+    with socket.socket(socket.AF_UNIX, socket.SOCK_STREAM) as sock:
+        sock.settimeout(timeout)
+        sock.connect(socket_path)
+        sock.sendall((json.dumps(request) + "\n").encode("utf-8"))
+        data = b""
+        while not data.endswith(b"\n"):
+            chunk = sock.recv(65536)
+            if not chunk:
+                break
+            data += chunk
+    return json.loads(data.decode("utf-8"))
+
+def daemon_running(socket_path=DAEMON_SOCKET_PATH):
+    """
+    Sprawdza, czy demon nasłuchuje na gnieździe (samo połączenie - bez czekania na odpowiedź).
+    """
+    with socket.socket(socket.AF_UNIX, socket.SOCK_STREAM) as sock:
+        try:
+            sock.connect(socket_path)
+        except OSError:
+            return False
+    return True
+
+class DaemonClient:
+    """
+    Klient demona dla pętli GLib: żądania bez blokowania (osobne połączenie na każde)
+    i subskrypcja zmian statusu. Okno steruje przez niego demonem, gdy ten działa.
+    """
+    def __init__(self, socket_path=DAEMON_SOCKET_PATH):
+        self.socket_path = socket_path
+        self._subscription = None
+
+    def _connect(self, request, on_connected):
+        client = Gio.SocketClient.new()
+
+        def connected(client, result):
+            try:
+                connection = client.connect_finish(result)
+                data = (json.dumps(request) + "\n").encode("utf-8")
+                connection.get_output_stream().write_all(data, None)
+            except GLib.Error:
+                on_connected(None, None)
+                return
+            on_connected(connection, Gio.DataInputStream.new(connection.get_input_stream()))
+
+        client.connect_async(Gio.UnixSocketAddress.new(self.socket_path), None, connected)
+
+    @staticmethod
+    def _read_message(stream, result):
+        try:
+            line, _ = stream.read_line_finish_utf8(result)
+            return json.loads(line) if line is not None else None
+        except (GLib.Error, ValueError):
+            return None
+
+    def request(self, request, callback):
+        """
+        Wysyła żądanie; callback(response) - słownik albo None, gdy demon nie odpowiedział.
+        """
+        def on_line(stream, result, connection):
+            response = self._read_message(stream, result)
+            connection.close(None)
+            callback(response)
+
+        def on_connected(connection, stream):
+            if connection is None:
+                callback(None)
+                return
+            stream.read_line_async(GLib.PRIORITY_DEFAULT, None, on_line, connection)
+
+        self._connect(request, on_connected)
+
+    def subscribe(self, on_status, on_lost):
+        """
+        Obserwuje status demona: on_status(status) przy każdej zmianie, on_lost() po zerwaniu połączenia.
+        """
+        def on_line(stream, result, connection):
+            message = self._read_message(stream, result)
+            if message is None or connection is not self._subscription:
+                if connection is self._subscription:
+                    self._subscription = None
+                    on_lost()
+                connection.close(None)
+                return
+            if "status" in message:
+                on_status(message["status"])
+            stream.read_line_async(GLib.PRIORITY_DEFAULT, None, on_line, connection)
+
+        def on_connected(connection, stream):
+            if connection is None:
+                on_lost()
+                return
+            self._subscription = connection
+            stream.read_line_async(GLib.PRIORITY_DEFAULT, None, on_line, connection)
+
+        self._connect({"cmd": "subscribe"}, on_connected)
+
+    def close(self):
+        if self._subscription is not None:
+            connection, self._subscription = self._subscription, None
+            connection.close(None)
+
+# --- Interfejs wiersza poleceń ---
+
+def _parse_gamma(value):
+    parts = value.split(":")
+    if len(parts) != 3:
+        raise argparse.ArgumentTypeError("gamma w formacie R:G:B, np. 1.0:1.0:1.0")
+    return parts
+
+def build_arg_parser():
+    """
+    Tworzy parser argumentów CLI. Bez polecenia uruchamiane jest okno GTK.
+    """
+    parser = argparse.ArgumentParser(prog="redshift_control.py", description="Kontroler Redshift")
+    sub = parser.add_subparsers(dest="command")
+    sub.add_parser("gui", help="otwiera okno programu (domyślnie)")
+    sub.add_parser("daemon", help="uruchamia demona sterującego (gniazdo Unix)")
+    p_apply = sub.add_parser("apply", help="stosuje ustawienia ręczne")
+    p_apply.add_argument("-t", "--temp", default="6500")
+    p_apply.add_argument("-b", "--brightness", default="1.0")
+    p_apply.add_argument("-g", "--gamma", type=_parse_gamma, default=["1.0", "1.0", "1.0"])
+    p_auto = sub.add_parser("auto", help="uruchamia tryb automatyczny (brakujące wartości z pliku konfiguracyjnego)")
+    p_save = sub.add_parser("save-config", help="zapisuje ustawienia w pliku konfiguracyjnym")
+    for p in (p_auto, p_save):
+        p.add_argument("--lat")
+        p.add_argument("--lon")
+        p.add_argument("--temp-day")
+        p.add_argument("--temp-night")
+        p.add_argument("--brightness-day")
+        p.add_argument("--brightness-night")
+    p_save.add_argument("-g", "--gamma", type=_parse_gamma)
+    p_reset = sub.add_parser("reset", help="wyłącza efekt i przywraca neutralne kolory")
+    for p in (p_apply, p_auto, p_reset):
+        p.add_argument("--fade", type=float, default=0.0,
+                       help="płynne przejście w ciągu podanej liczby sekund (wymaga działającego demona)")
+    sub.add_parser("status", help="wyświetla status redshift")
+    sub.add_parser("schedule", help="wczytuje harmonogram presetów i wyświetla najbliższe przełączenia")
+    p_fleet = sub.add_parser("fleet", help="stosuje profil na wielu ekranach X naraz")
+    p_fleet.add_argument("--displays", help="ekrany, np. :0-:31 lub :0,:2,host:1")
+    p_fleet.add_argument("--targets-file", help="plik z listą ekranów (jeden na linię)")
+    p_fleet.add_argument("--mode", choices=("manual", "auto"), default="manual",
+                         help="manual - jak 'apply'; auto - jednorazowo wartość trybu auto dla bieżącej pory (redshift -o)")
+    p_fleet.add_argument("-t", "--temp", default="6500")
+    p_fleet.add_argument("-b", "--brightness", default="1.0")
+    p_fleet.add_argument("-g", "--gamma", type=_parse_gamma, default=["1.0", "1.0", "1.0"])
+    p_fleet.add_argument("--lat")
+    p_fleet.add_argument("--lon")
+    p_fleet.add_argument("--temp-day")
+    p_fleet.add_argument("--temp-night")
+    p_fleet.add_argument("--brightness-day")
+    p_fleet.add_argument("--brightness-night")
+    p_fleet.add_argument("-j", "--parallel", type=int, default=16, help="maksymalna liczba równoczesnych procesów")
+    p_fleet.add_argument("--timeout", type=float, default=10.0, help="limit czasu na ekran (s)")
+    p_fleet.add_argument("--json", action="store_true", help="podsumowanie w formacie JSON")
+    p_gaz = sub.add_parser("compile-gazetteer", help="kompiluje plik GeoNames (TSV) do indeksu miejscowości")
+    p_gaz.add_argument("source", help="plik TSV, np. cities500.txt z geonames.org")
+    p_gaz.add_argument("-o", "--output", default=GAZETTEER_PATH)
+    p_gaz.add_argument("--min-population", type=int, default=0)
+    p_find = sub.add_parser("find-city", help="wyszukuje miejscowość po nazwie lub współrzędnych")
+    p_find.add_argument("query", nargs="+", help="początek nazwy albo LAT LON")
+    p_find.add_argument("-n", "--limit", type=int, default=10)
+    return parser
+
+DISPLAY_RE = re.compile(r"^[\w.-]*:\d+(\.\d+)?$")
+DISPLAY_RANGE_RE = re.compile(r"^([\w.-]*):(\d+)-(?:\1:)?(\d+)$")
+
+def expand_display_targets(spec):
+    """
+    Rozwija listę ekranów X: ":0,:3,host:1" oraz zakresy ":0-:15" (lub ":0-15").
+    """
+    targets = []
+    for item in spec.split(","):
+        item = item.strip()
+        if not item:
+            continue
+        match = DISPLAY_RANGE_RE.match(item)
+        if match:
+            host, first, last = match.groups()
+            targets.extend(f"{host}:{n}" for n in range(int(first), int(last) + 1))
+        elif DISPLAY_RE.match(item):
+            targets.append(item)
+        else:
+            raise ValueError(f"Nieprawidłowy ekran X: {item}")
+    return targets
+
+def read_targets_file(path):
+    """
+    Wczytuje ekrany z pliku (jeden wpis lub zakres na linię, # rozpoczyna komentarz).
+    """
+    targets = []
+    with open(path, encoding="utf-8") as f:
+        for line in f:
+            line = line.split("#", 1)[0].strip()
+            if line:
+                targets.extend(expand_display_targets(line))
+    return targets
+
+def run_fleet(logic, args):
+    """
+    Stosuje profil na wielu ekranach X i wypisuje podsumowanie. Zwraca kod wyjścia.
+    """
+    try:
+        targets = expand_display_targets(args.displays) if args.displays else []
+        if args.targets_file:
+            targets.extend(read_targets_file(args.targets_file))
+    except (OSError, ValueError) as e:
+        print(f"Błąd: {e}", file=sys.stderr)
+        return 2
+    targets = list(dict.fromkeys(targets))
+    if not targets:
+        print("Błąd: nie podano żadnych ekranów (--displays lub --targets-file).", file=sys.stderr)
+        return 2
+    if args.mode == "manual":
+        error = logic.validate_manual_params(args.temp, args.brightness, args.gamma)
+    else:
+        values = _auto_values(logic, args)
+        error = logic.validate_auto_params(*values)
+    if error:
+        print(error, file=sys.stderr)
+        return 2
+    if args.mode == "manual":
+        cmd = logic.manual_command(int(args.temp), float(args.brightness), [float(g) for g in args.gamma])
+    else:
+        cmd = logic.auto_oneshot_command(*values)
+
+    loop = GLib.MainLoop()
+    report = {}
+    start = time.perf_counter()
+
+    def on_done(results):
+        report.update(results)
+        loop.quit()
+
+    logic.apply_fleet_async(targets, cmd, on_done, args.parallel, args.timeout)
+    if len(report) < len(targets):
+        loop.run()
+    elapsed = time.perf_counter() - start
+    failed = {t: e for t, (ok, e) in report.items() if not ok}
+    if args.json:
+        print(json.dumps({
+            "targets": len(targets), "succeeded": len(targets) - len(failed), "failed": len(failed),
+            "elapsed_s": elapsed, "results": {t: {"ok": report[t][0], "error": report[t][1]} for t in targets},
+        }, indent=2))
+    else:
+        for target in targets:
+            ok, err = report[target]
+            print(f"{target}: {'OK' if ok else 'BŁĄD - ' + (err or '')}")
+        print(f"Ekrany: {len(targets)}, powodzenie: {len(targets) - len(failed)}, "
+              f"błędy: {len(failed)}, czas: {elapsed:.2f} s")
+    return 1 if failed else 0
+
+def _auto_values(logic, args):
+    """
+    Łączy argumenty trybu auto z wartościami zapisanymi w pliku konfiguracyjnym.
+    """
+    config = logic.load_config()
+
+    def from_config(section, key, fallback):
+        if config is not None and section in config:
+            return config.get(section, key, fallback=fallback)
+        return fallback
+
+    return [
+        args.lat or from_config("manual", "lat", ""),
+        args.lon or from_config("manual", "lon", ""),
+        args.temp_day or from_config("redshift", "temp-day", "6500"),
+        args.temp_night or from_config("redshift", "temp-night", "4500"),
+        args.brightness_day or from_config("redshift", "brightness-day", "1.0"),
+        args.brightness_night or from_config("redshift", "brightness-night", "1.0"),
+    ]
+
+def _try_daemon(request):
+    """
+    Przekazuje żądanie do działającego demona. Zwraca odpowiedź albo None, gdy demon nie działa.
+    """
+    if not os.path.exists(DAEMON_SOCKET_PATH):
+        if request.get("fade"):
+            print("Uwaga: płynne przejście wymaga działającego demona - zmiana zostanie zastosowana od razu.",
+                  file=sys.stderr)
+        return None
+    try:
+        # odpowiedź przychodzi po zakończeniu przejścia
+        return send_daemon_request(request, timeout=5.0 + request.get("fade", 0))
+    except (OSError, ValueError):
+        return None
+
+def _print_status(status):
+    if status["mode"] == "auto" and status["auto"]:
+        lat, lon, t_day, t_night, b_day, b_night = status["auto"]
+        print(f"Tryb automatyczny: {lat}, {lon}; temp. {t_day}K/{t_night}K; jasność {b_day}/{b_night}")
+    elif status["mode"] == "manual" and status["manual"]:
+        temp, bright, gamma = status["manual"]
+        print(f"Ustawienia ręczne: {temp}K, jasność {bright}, gamma {':'.join(map(str, gamma))}")
+    if not status["processes"]:
+        print("Redshift nie jest uruchomiony.")
+    for proc in status["processes"]:
+        print(f"PID {proc['pid']} ({proc['mode']}): {' '.join(proc['argv'])}")
+    if status.get("adaptive"):
+        adaptive = status["adaptive"]
+        print(f"Jasność adaptacyjna: {adaptive['brightness']} ({adaptive['lux']} lx)")
+    _print_schedule(status.get("schedule"))
+
+def _print_schedule(upcoming):
+    if upcoming:
+        print("Najbliższe przełączenia presetów:")
+    for item in upcoming or ():
+        print(f"  {item['at'].replace('T', ' ')}  {item['preset']}")
+
+def run_gazetteer(args):
+    """
+    Polecenia compile-gazetteer i find-city. Zwraca kod wyjścia.
+    """
+    if args.command == "compile-gazetteer":
+        try:
+            count = compile_gazetteer(args.source, args.output, args.min_population)
+        except OSError as e:
+            print(f"Błąd: {e}", file=sys.stderr)
+            return 1
+        print(f"Zapisano {count} miejscowości w {args.output}")
+        return 0
+    gazetteer = open_gazetteer()
+    try:
+        lat, lon = (float(v) for v in args.query)
+    except ValueError:
+        found = gazetteer.search(" ".join(args.query), args.limit)
+    else:
+        nearest = gazetteer.nearest(lat, lon)
+        found = [nearest[0]] if nearest else []
+    for name, lat, lon, country, population in found:
+        print(f"{name} ({country})\t{lat:.4f}\t{lon:.4f}")
+    return 0 if found else 1
+
+def run_cli(args):
+    """
+    Wykonuje polecenie CLI bez importowania GTK. Zwraca kod wyjścia.
+    """
+    if args.command in ("compile-gazetteer", "find-city"):
+        return run_gazetteer(args)
+    logic = RedshiftLogic()
+    if args.command == "fleet":
+        return run_fleet(logic, args)
+    if args.command == "apply":
+        error = logic.validate_manual_params(args.temp, args.brightness, args.gamma)
+        if error:
+            print(error, file=sys.stderr)
+            return 2
+        temp, bright, gamma = int(args.temp), float(args.brightness), [float(g) for g in args.gamma]
+        response = _try_daemon({"cmd": "apply", "temp": temp, "brightness": bright, "gamma": gamma, "fade": args.fade})
+        if response is None:
+            logic.stop_session_processes()
+            success, error = logic.apply_manual(temp, bright, gamma)
+            response = {"ok": success, "error": error}
+    elif args.command == "auto":
+        values = _auto_values(logic, args)
+        error = logic.validate_auto_params(*values)
+        if error:
+            print(error, file=sys.stderr)
+            return 2
+        keys = ("lat", "lon", "temp_day", "temp_night", "brightness_day", "brightness_night")
+        response = _try_daemon(dict(zip(keys, values), cmd="auto", fade=args.fade))
+        if response is None:
+            # bez demona redshift działa samodzielnie, niezależnie od tego procesu
+            logic.stop_session_processes()
+            lat, lon, t_day, t_night, b_day, b_night = values
+            success, error = logic.run_redshift(
+                ["redshift", "-l", f"{lat}:{lon}", "-t", f"{t_day}:{t_night}", "-b", f"{b_day}:{b_night}"],
+                background=True
+            )
+            if success:
+                # PID trafia do migawki stanu - późniejsze polecenia mogą zatrzymać ten proces
+                logic.mode, logic.auto_params = "auto", values
+                logic._state_changed()
+            response = {"ok": success, "error": error}
+    elif args.command == "reset":
+        response = _try_daemon({"cmd": "reset", "fade": args.fade})
+        if response is None:
+            logic.stop_session_processes()
+            success, error = logic.reset()
+            response = {"ok": success, "error": error}
+    elif args.command == "status":
+        response = _try_daemon({"cmd": "status"})
+        if response is None:
+            logic.status_monitor.processes = logic.status_monitor.scan()
+            response = {"ok": True, "status": logic.status_snapshot()}
+        _print_status(response["status"])
+    elif args.command == "schedule":
+        response = _try_daemon({"cmd": "schedule"})
+        if response is None:
+            # bez demona harmonogram tylko wyświetlamy - przełączać może proces działający w tle
+            config = logic.load_config()
+            entries = logic.schedule_from_config(config) if config is not None else []
+            scheduler = ProfileScheduler(entries, None)
+            scheduler.recompute()
+            upcoming = [
+                {"at": moment.isoformat(timespec="minutes"), "preset": entry.preset}
+                for moment, entry in scheduler.upcoming()
+            ]
+            print("Demon nie działa - harmonogram nie jest aktywny.")
+            response = {"ok": True, "status": {"schedule": upcoming}}
+        if not response["status"].get("schedule"):
+            print("Brak wpisów harmonogramu (sekcje [schedule-N] w pliku konfiguracyjnym).")
+        _print_schedule(response["status"].get("schedule"))
+    elif args.command == "save-config":
+        config = logic.load_config()
+        gamma = args.gamma
+        if gamma is None:
+            gamma = "1.0:1.0:1.0"
+            if config is not None and "redshift" in config:
+                gamma = config.get("redshift", "gamma", fallback=gamma)
+            gamma = gamma.split(":")
+        lat, lon, t_day, t_night, b_day, b_night = _auto_values(logic, args)
+        error = logic.validate_auto_params(lat, lon, t_day, t_night, b_day, b_night) or logic.validate_gamma(gamma)
+        if error:
+            print(error, file=sys.stderr)
+            return 2
+        redshift_data = {
+            'temp-day': t_day,
+            'temp-night': t_night,
+            'brightness-day': b_day,
+            'brightness-night': b_night,
+            'gamma': ":".join(f"{float(g):.2f}" for g in gamma),
+            'location-provider': 'manual'
+        }
+        # pozostałe sekcje (profile wyjść, ustawienia programu) są zachowywane
+        kept = {
+            name: dict(config[name]) for name in (config.sections() if config is not None else [])
+            if name not in ('redshift', 'manual')
+        }
+        success, error = logic.save_config(redshift_data, {'lat': lat, 'lon': lon}, extra_sections=kept)
+        response = {"ok": success, "error": error}
+    if not response["ok"]:
+        print(f"Błąd: {response['error']}", file=sys.stderr)
+        return 1
+    return 0
+
+def main(argv=None):
+    args = build_arg_parser().parse_args(argv)
+    if args.command == "daemon":
+        return ControllerDaemon().run()
+    if args.command in (None, "gui"):
+        # GTK importowane jest wyłącznie, gdy potrzebne jest okno
+        from redshift_control_gui import run_gui
+        return run_gui()
+    return run_cli(args)
 
 if __name__ == "__main__":
-    RedshiftLogic().kill_redshift_gtk()
-    win = RedshiftController()
-    win.connect("destroy", Gtk.main_quit)
-    win.show_all()
-    Gtk.main()
+    sys.exit(main())
@@ -0,0 +1,1344 @@
+# -*- coding: utf-8 -*-
+#
+#  redshift_control_gui.py - Okno GTK Kontrolera Redshift
+#
+#  Copyright (C) 2025  Wasz Informatyk
+#
+#  Ten program jest wolnym oprogramowaniem; możesz go rozprowadzać dalej i/lub
+#  modyfikować na warunkach Powszechnej Licencji Publicznej GNU, wydanej przez
+#  Fundację Wolnego Oprogramowania; według wersji 3 tej Licencji lub (według
+#  twojego wyboru) którejkolwiek późniejszej wersji.
+#
+#  Ten program rozpowszechniany jest z nadzieją, że będzie użyteczny – jednak
+#  BEZ JAKIEJKOLWIEK GWARANCJI, nawet domyślnej gwarancji PRZYDATNOŚCI
+#  HANDLOWEJ albo PRZYDATNOŚCI DO OKREŚLONYCH ZASTOSOWAŃ. W celu uzyskania
+#  bliższych informacji sięgnij do Powszechnej Licencji Publicznej GNU.
+#
+#  Powinieneś otrzymać kopię Powszechnej Licencji Publicznej GNU wraz z tym
+#  programem; jeśli nie – zobacz <https://www.gnu.org/licenses/>.
+
+import os
+import math
+import datetime
+
+import cairo
+import gi
+gi.require_version('Gtk', '3.0')
+from gi.repository import Gtk, GLib
+
+from redshift_control import (
+    CONFIG_PATH, CONTROLLER_SECTION, MINUTES_PER_DAY, POLISH_CITIES, PRESET_OFF, TEMP_MAX, TEMP_MIN,
+    CoalescingDispatcher, DaemonClient, RedshiftLogic, ScheduleEntry, daemon_running, day_curve,
+    format_weekdays, open_gazetteer, parse_weekdays, read_state_snapshot, system_boot_time, whitepoint
+)
+
+# Ustawienie REDSHIFT_CONTROL_PROFILE=1 mierzy czas wszystkich handlerów w pętli GTK
+PROFILE_HANDLERS = os.environ.get("REDSHIFT_CONTROL_PROFILE") == "1"
+NEAREST_DELAY_MS = 200  # wyszukiwanie najbliższej miejscowości dopiero po przerwie w pisaniu
+SEARCH_DELAY_MS = 200  # podpowiedzi z gazetera również dopiero po przerwie w pisaniu
+
+class CurvePreview(Gtk.DrawingArea):
+    """
+    Podgląd krzywej trybu automatycznego na całą dobę ze znacznikiem „teraz”.
+    Tło (krzywa temperatury w kolorze punktu bieli, jasność, siatka godzin) jest
+    renderowane raz do bufora cairo; co minutę przerysowywany jest tylko pasek
+    wokół znacznika, i to wyłącznie wtedy, gdy znacznik przesunął się o piksel.
+    """
+    MARKER_HALF_WIDTH = 4
+
+    def __init__(self):
+        Gtk.DrawingArea.__init__(self)
+        self.set_size_request(-1, 110)
+        self._params = None  # (lat, lon, t_day, t_night, b_day, b_night)
+        self._date = None
+        self._curve = None  # (temps, brights) dla każdej minuty doby
+        self._surface = None
+        self._temp_range = (TEMP_MIN, TEMP_MAX)
+        self._marker_x = None
+        self._timer_id = 0
+        self.connect("draw", self._on_draw)
+        self.connect("map", lambda w: self._schedule_tick())
+        self.connect("unmap", lambda w: self._stop_tick())
+
+    def set_params(self, params):
+        """
+        Ustawia parametry trybu auto (None - brak poprawnych danych). Krzywa jest
+        przeliczana tylko wtedy, gdy parametry faktycznie się zmieniły.
+        """
+        if params == self._params:
+            return
+        self._params = params
+        self._recompute()
+
+    def _recompute(self):
+        self._date = datetime.date.today()
+        if self._params is None:
+            self._curve = None
+        else:
+            lat, lon, t_day, t_night, b_day, b_night = self._params
+            self._curve = day_curve(lat, lon, self._date, t_day, t_night, b_day, b_night)
+        self._surface = None
+        self.queue_draw()
+
+    def _now_x(self, width):
+        now = datetime.datetime.now()
+        return int((now.hour * 60 + now.minute) * width / MINUTES_PER_DAY)
+
+    def _temp_y(self, temp, height):
+        low, high = self._temp_range
+        return height - 4 - (temp - low) / (high - low) * (height - 18)
+
+    def _render_background(self, width, height):
+        surface = cairo.ImageSurface(cairo.FORMAT_ARGB32, width, height)
+        cr = cairo.Context(surface)
+        cr.set_source_rgb(0.13, 0.13, 0.16)
+        cr.paint()
+        cr.set_font_size(10)
+        if self._curve is None:
+            cr.set_source_rgb(0.7, 0.7, 0.7)
+            cr.move_to(8, height / 2)
+            cr.show_text("Podaj poprawne dane trybu automatycznego, aby zobaczyć krzywą.")
+            return surface
+        temps, brights = self._curve
+        self._temp_range = (min(temps) - 500, max(temps) + 200)
+        # słupki w kolorze punktu bieli, przyciemnione jasnością
+        for x in range(width):
+            minute = min(MINUTES_PER_DAY - 1, x * MINUTES_PER_DAY // width)
+            bright = float(brights[minute])
+            r, g, b = whitepoint(int(temps[minute]))
+            y = self._temp_y(int(temps[minute]), height)
+            cr.set_source_rgb(r * bright, g * bright, b * bright)
+            cr.rectangle(x, y, 1, height - y)
+            cr.fill()
+        # siatka godzin
+        cr.set_line_width(1)
+        for hour in range(0, 24, 3):
+            x = int(hour * width / 24) + 0.5
+            cr.set_source_rgba(1, 1, 1, 0.25)
+            cr.move_to(x, 0)
+            cr.line_to(x, height)
+            cr.stroke()
+            cr.set_source_rgba(1, 1, 1, 0.7)
+            cr.move_to(x + 3, 11)
+            cr.show_text(f"{hour}:00")
+        return surface
+
+    def _on_draw(self, widget, cr):
+        width, height = self.get_allocated_width(), self.get_allocated_height()
+        if self._surface is None or (self._surface.get_width(), self._surface.get_height()) != (width, height):
+            self._surface = self._render_background(width, height)
+        cr.set_source_surface(self._surface, 0, 0)
+        cr.paint()
+        if self._curve is None:
+            self._marker_x = None
+            return False
+        x = self._now_x(width)
+        self._marker_x = x
+        now = datetime.datetime.now()
+        temp = int(self._curve[0][now.hour * 60 + now.minute])
+        cr.set_source_rgb(1, 1, 1)
+        cr.set_line_width(1)
+        cr.move_to(x + 0.5, 0)
+        cr.line_to(x + 0.5, height)
+        cr.stroke()
+        cr.arc(x + 0.5, self._temp_y(temp, height), self.MARKER_HALF_WIDTH - 1, 0, 2 * math.pi)
+        cr.fill()
+        return False
+
+    def _schedule_tick(self):
+        self._stop_tick()
+        self._timer_id = GLib.timeout_add_seconds(60 - datetime.datetime.now().second, self._on_tick)
+
+    def _stop_tick(self):
+        if self._timer_id:
+            GLib.source_remove(self._timer_id)
+            self._timer_id = 0
+
+    def _on_tick(self):
+        self._timer_id = 0
+        if self._params is not None and datetime.date.today() != self._date:
+            self._recompute()  # nowa doba - nowa krzywa
+        elif self._curve is not None:
+            width, height = self.get_allocated_width(), self.get_allocated_height()
+            x = self._now_x(width)
+            if x != self._marker_x:
+                for old_x in (self._marker_x, x):
+                    if old_x is not None:
+                        self.queue_draw_area(old_x - self.MARKER_HALF_WIDTH, 0,
+                                             2 * self.MARKER_HALF_WIDTH + 1, height)
+        self._schedule_tick()
+        return False
+
+class RedshiftController(Gtk.Window):
+    """
+    Klasa odpowiedzialna za GUI i interakcję z użytkownikiem.
+    """
+    def __init__(self):
+        Gtk.Window.__init__(self, title="Kontroler Redshift")
+        self.set_border_width(15)
+        self.set_default_size(500, 750)
+        # Wbudowane miasta -> (lat, lon) oraz wyniki ostatniego wyszukiwania w gazeterze
+        # (unikalna etykieta -> (lat, lon)), zastępowane przy każdym wyszukiwaniu
+        self.cities_data = dict(POLISH_CITIES)
+        self.search_results = {}
+        self._nearest_timer = 0
+        self._search_timer = 0
+        self.gazetteer = open_gazetteer()
+        self.logic = RedshiftLogic()
+        if PROFILE_HANDLERS:
+            self._install_handler_profiling()
+        self.preview_dispatcher = CoalescingDispatcher(self._apply_preview_state)
+        # Profile wyjść: {crtc: (temp, jasność, gamma R, G, B)}; None - wszystkie wyjścia
+        self.output_profiles = {}
+        self._selected_output = None
+        self._all_outputs_state = None
+        self._loading_profile = False
+        # Presety harmonogramu: {nazwa: (temp, jasność, gamma)}
+        self.presets = {}
+        self._ambient_sensor = None  # ścieżka czujnika z konfiguracji (None - wykrywana)
+        self._applying_config = False
+        # Klient demona (gdy działa, okno tylko przekazuje mu polecenia) i ostatni status od niego
+        self.daemon = None
+        self._daemon_status = None
+        self.logic.status_monitor.on_change = self._on_processes_changed
+
+        vbox = Gtk.Box(orientation=Gtk.Orientation.VERTICAL, spacing=15)
+        self.add(vbox)
+
+        # Tworzenie interfejsu
+        self._create_auto_mode_section(vbox)
+        self._create_manual_mode_section(vbox)
+        self._create_action_buttons_section(vbox)
+        self._create_status_section(vbox)
+        self._create_schedule_section(vbox)
+        self._create_config_save_section(vbox)
+        self._create_debug_section(vbox)
+
+        # Pierwsza klatka powstaje z migawki stanu (jeden odczyt małego pliku);
+        # konfiguracja i procesy są sprawdzane dopiero po wyświetleniu okna
+        self._snapshot = read_state_snapshot(self.logic.state_path)
+        self.connect("destroy", self._on_destroy)
+        if self._snapshot is not None:
+            self._apply_snapshot(self._snapshot)
+            GLib.idle_add(self._verify_startup_state, priority=GLib.PRIORITY_LOW)
+        else:
+            self._verify_startup_state()
+
+    # --- Sekcja GUI ---
+
+    def _create_auto_mode_section(self, parent_box):
+        frame = Gtk.Frame(label=" Ustawienia Trybu Automatycznego ")
+        parent_box.pack_start(frame, False, True, 0)
+        grid = Gtk.Grid(column_spacing=6, row_spacing=10)
+        grid.set_border_width(10)
+        frame.add(grid)
+        grid.attach(Gtk.Label(label="Miejscowość:"), 0, 0, 1, 1)
+        # Lista rozwijana - wbudowane miasta; wpisywanie tekstu przeszukuje gazeter
+        self.combo_cities = Gtk.ComboBoxText.new_with_entry()
+        for city in sorted(POLISH_CITIES.keys()):
+            self.combo_cities.append_text(city)
+        city_entry = self.combo_cities.get_child()
+        city_entry.set_placeholder_text("Wpisz nazwę lub wybierz z listy...")
+        self.city_results = Gtk.ListStore(str)
+        completion = Gtk.EntryCompletion(model=self.city_results)
+        completion.set_text_column(0)
+        completion.set_match_func(lambda *args: True)  # wyniki są już przefiltrowane przez gazeter
+        completion.connect("match-selected", self.on_city_match_selected)
+        city_entry.set_completion(completion)
+        self.combo_cities.connect("changed", self.on_city_changed)
+        grid.attach(self.combo_cities, 1, 0, 3, 1)
+        grid.attach(Gtk.Label(label="Szerokość (LAT):"), 0, 1, 1, 1)
+        self.entry_lat = Gtk.Entry()
+        self.entry_lat.connect("changed", self.on_coords_changed)
+        grid.attach(self.entry_lat, 1, 1, 3, 1)
+        grid.attach(Gtk.Label(label="Długość (LON):"), 0, 2, 1, 1)
+        self.entry_lon = Gtk.Entry()
+        self.entry_lon.connect("changed", self.on_coords_changed)
+        grid.attach(self.entry_lon, 1, 2, 3, 1)
+        self.nearest_label = Gtk.Label(xalign=0)
+        grid.attach(self.nearest_label, 1, 3, 3, 1)
+        grid.attach(Gtk.Separator(orientation=Gtk.Orientation.HORIZONTAL), 0, 4, 4, 1)
+        # Pola z przyciskami +/- (refaktoryzacja)
+        self.entry_temp_day = self._create_adjustable_entry(grid, "Temp. dzień (K):", 5, "6500", -100, 100, False)
+        self.entry_temp_night = self._create_adjustable_entry(grid, "Temp. noc (K):", 6, "4500", -100, 100, False)
+        self.entry_bright_day = self._create_adjustable_entry(grid, "Jasność dzień:", 7, "1.0", -0.05, 0.05, True)
+        self.entry_bright_night = self._create_adjustable_entry(grid, "Jasność noc:", 8, "1.0", -0.05, 0.05, True)
+        btn_set_loc = Gtk.Button(label="Uruchom tryb automatyczny")
+        btn_set_loc.connect("clicked", self.on_set_location)
+        grid.attach(btn_set_loc, 0, 9, 4, 1)
+        # Podgląd krzywej na całą dobę - przeliczany tylko po zmianie danych
+        self.curve_preview = CurvePreview()
+        grid.attach(self.curve_preview, 0, 10, 4, 1)
+        for entry in (self.entry_lat, self.entry_lon, self.entry_temp_day,
+                      self.entry_temp_night, self.entry_bright_day, self.entry_bright_night):
+            entry.connect("changed", self._update_curve_preview)
+        self._update_curve_preview()
+
+    def _create_manual_mode_section(self, parent_box):
+        frame = Gtk.Frame(label=" Kontrola Ręczna (Jednorazowy Efekt) ")
+        parent_box.pack_start(frame, False, True, 0)
+        grid = Gtk.Grid(column_spacing=10, row_spacing=10)
+        grid.set_border_width(10)
+        frame.add(grid)
+        # Suwaki temperatury i jasności
+        self.scale_temp = self._create_scale(grid, "Temperatura (K):", 0, 6500, 1000, 9000, 100, 0)
+        self.scale_bright = self._create_scale(grid, "Jasność:", 1, 1.0, 0.1, 1.0, 0.05, 2)
+        # Suwaki gamma
+        self.scale_gamma_r = self._create_scale(grid, "Gamma Czerwony (R):", 2, 1.0, 0.1, 2.0, 0.01, 2)
+        self.scale_gamma_g = self._create_scale(grid, "Gamma Zielony (G):", 3, 1.0, 0.1, 2.0, 0.01, 2)
+        self.scale_gamma_b = self._create_scale(grid, "Gamma Niebieski (B):", 4, 1.0, 0.1, 2.0, 0.01, 2)
+        # Podgląd na żywo podczas przesuwania suwaków
+        self.check_live_preview = Gtk.CheckButton(label="Podgląd na żywo")
+        self.check_live_preview.connect("toggled", self.on_live_preview_toggled)
+        grid.attach(self.check_live_preview, 0, 5, 2, 1)
+        for scale in (self.scale_temp, self.scale_bright, self.scale_gamma_r,
+                      self.scale_gamma_g, self.scale_gamma_b):
+            scale.connect("value-changed", self.on_manual_scale_changed)
+        # Osobne profile dla wyjść (monitorów)
+        grid.attach(Gtk.Label(label="Wyjście (monitor):"), 0, 6, 1, 1)
+        hbox = Gtk.Box(orientation=Gtk.Orientation.HORIZONTAL, spacing=6)
+        self.combo_output = Gtk.ComboBoxText()
+        self.combo_output.connect("changed", self.on_output_changed)
+        btn_remove = Gtk.Button(label="Usuń profil wyjścia")
+        btn_remove.connect("clicked", self.on_remove_output_profile)
+        hbox.pack_start(self.combo_output, True, True, 0)
+        hbox.pack_start(btn_remove, False, True, 0)
+        grid.attach(hbox, 1, 6, 1, 1)
+        self._populate_outputs()
+        # Czas płynnego przejścia przy zmianie ustawień i trybu (0 - natychmiast)
+        grid.attach(Gtk.Label(label="Płynne przejście (s):"), 0, 7, 1, 1)
+        self.spin_fade = Gtk.SpinButton.new_with_range(0.0, 10.0, 0.1)
+        self.spin_fade.set_digits(1)
+        self.spin_fade.set_value(1.0)
+        grid.attach(self.spin_fade, 1, 7, 1, 1)
+        # Jasność z czujnika światła otoczenia (zastępuje suwak jasności)
+        self.check_ambient = Gtk.CheckButton(label="Jasność adaptacyjna (czujnik światła)")
+        self.check_ambient.connect("toggled", self.on_ambient_toggled)
+        grid.attach(self.check_ambient, 0, 8, 1, 1)
+        self.ambient_label = Gtk.Label(xalign=0)
+        grid.attach(self.ambient_label, 1, 8, 1, 1)
+
+    def _create_action_buttons_section(self, parent_box):
+        hbox = Gtk.Box(orientation=Gtk.Orientation.HORIZONTAL, spacing=10)
+        parent_box.pack_start(hbox, False, True, 0)
+        btn_reset = Gtk.Button(label="Resetuj / Wyłącz")
+        btn_reset.get_style_context().add_class("destructive-action")
+        btn_reset.connect("clicked", self.on_reset)
+        btn_apply = Gtk.Button(label="Zastosuj ustawienia ręczne")
+        btn_apply.connect("clicked", self.on_apply_manual)
+        hbox.pack_start(btn_reset, True, True, 0)
+        hbox.pack_start(btn_apply, True, True, 0)
+
+    def _create_status_section(self, parent_box):
+        frame = Gtk.Frame(label=" Aktualny Status Redshift ")
+        parent_box.pack_start(frame, True, True, 0)
+        self.status_label = Gtk.Label(label="Sprawdzanie statusu...")
+        self.status_label.set_margin_top(10)
+        self.status_label.set_margin_bottom(10)
+        frame.add(self.status_label)
+
+    def _create_schedule_section(self, parent_box):
+        expander = Gtk.Expander(label="Harmonogram presetów")
+        parent_box.pack_start(expander, False, True, 0)
+        grid = Gtk.Grid(column_spacing=6, row_spacing=6)
+        grid.set_border_width(6)
+        expander.add(grid)
+        # Zapis bieżących ustawień ręcznych jako nazwany preset
+        self.entry_preset_name = Gtk.Entry(placeholder_text="Nazwa presetu, np. praca")
+        grid.attach(self.entry_preset_name, 0, 0, 2, 1)
+        btn_save_preset = Gtk.Button(label="Zapisz suwaki jako preset")
+        btn_save_preset.connect("clicked", self.on_save_preset)
+        grid.attach(btn_save_preset, 2, 0, 1, 1)
+        # Lista przełączeń: godzina, dni tygodnia, preset
+        self.schedule_store = Gtk.ListStore(str, str, str)
+        tree = Gtk.TreeView(model=self.schedule_store)
+        for column, title in enumerate(("Godzina", "Dni", "Preset")):
+            tree.append_column(Gtk.TreeViewColumn(title, Gtk.CellRendererText(), text=column))
+        self.schedule_selection = tree.get_selection()
+        grid.attach(tree, 0, 1, 3, 1)
+        self.entry_schedule_time = Gtk.Entry(placeholder_text="GG:MM", width_chars=6)
+        self.entry_schedule_days = Gtk.Entry(text="mon-fri", width_chars=12)
+        self.entry_schedule_days.set_tooltip_text("Dni: * (codziennie), mon-fri, sat,sun, pn-pt...")
+        self.combo_schedule_preset = Gtk.ComboBoxText()
+        grid.attach(self.entry_schedule_time, 0, 2, 1, 1)
+        grid.attach(self.entry_schedule_days, 1, 2, 1, 1)
+        grid.attach(self.combo_schedule_preset, 2, 2, 1, 1)
+        btn_add = Gtk.Button(label="Dodaj przełączenie")
+        btn_add.connect("clicked", self.on_add_schedule_entry)
+        btn_remove = Gtk.Button(label="Usuń zaznaczone")
+        btn_remove.connect("clicked", self.on_remove_schedule_entry)
+        grid.attach(btn_add, 0, 3, 2, 1)
+        grid.attach(btn_remove, 2, 3, 1, 1)
+        self.schedule_label = Gtk.Label(xalign=0)
+        grid.attach(self.schedule_label, 0, 4, 3, 1)
+        self._populate_presets()
+
+    def _create_config_save_section(self, parent_box):
+        btn_save = Gtk.Button(label=f"Zapisz ustawienia w pliku ~/.config/redshift/redshift.conf")
+        btn_save.connect("clicked", self.on_save_config_clicked)
+        parent_box.pack_start(btn_save, False, True, 0)
+
+    def _create_debug_section(self, parent_box):
+        expander = Gtk.Expander(label="Diagnostyka (czasy wywołań)")
+        expander.connect("notify::expanded", lambda w, p: self._refresh_debug_panel())
+        parent_box.pack_start(expander, False, True, 0)
+        box = Gtk.Box(orientation=Gtk.Orientation.VERTICAL, spacing=6)
+        expander.add(box)
+        self.debug_label = Gtk.Label(xalign=0)
+        self.debug_label.set_selectable(True)
+        box.pack_start(self.debug_label, False, True, 0)
+        hbox = Gtk.Box(orientation=Gtk.Orientation.HORIZONTAL, spacing=10)
+        box.pack_start(hbox, False, True, 0)
+        btn_refresh = Gtk.Button(label="Odśwież")
+        btn_refresh.connect("clicked", lambda w: self._refresh_debug_panel())
+        btn_dump = Gtk.Button(label="Zapisz pomiary (JSON)")
+        btn_dump.connect("clicked", self.on_dump_metrics_clicked)
+        hbox.pack_start(btn_refresh, True, True, 0)
+        hbox.pack_start(btn_dump, True, True, 0)
+
+    # --- Metody pomocnicze GUI ---
+
+    def _create_adjustable_entry(self, grid, label, row, default_text, step_minus, step_plus, is_float):
+        """
+        Tworzy pole tekstowe z przyciskami +/- do regulacji wartości.
+        """
+        entry = Gtk.Entry()
+        entry.set_text(default_text)
+        btn_m = Gtk.Button(label="-")
+        btn_p = Gtk.Button(label="+")
+        btn_m.connect("clicked", lambda w: self._on_adjust_button_clicked(entry, step_minus, is_float))
+        btn_p.connect("clicked", lambda w: self._on_adjust_button_clicked(entry, step_plus, is_float))
+        grid.attach(Gtk.Label(label=label), 0, row, 1, 1)
+        grid.attach(entry, 1, row, 1, 1)
+        grid.attach(btn_m, 2, row, 1, 1)
+        grid.attach(btn_p, 3, row, 1, 1)
+        return entry
+
+    def _create_scale(self, grid, label, row, value, lower, upper, step, digits):
+        """
+        Tworzy suwak do regulacji wartości liczbowych.
+        """
+        adj = Gtk.Adjustment(value=value, lower=lower, upper=upper, step_increment=step, page_increment=step*2, page_size=0)
+        scale = Gtk.Scale(orientation=Gtk.Orientation.HORIZONTAL, adjustment=adj)
+        scale.set_digits(digits)
+        scale.set_hexpand(True)
+        grid.attach(Gtk.Label(label=label), 0, row, 1, 1)
+        grid.attach(scale, 1, row, 1, 1)
+        return scale
+
+    def _on_adjust_button_clicked(self, entry_widget, step, is_float=False):
+        """
+        Obsługuje kliknięcia przycisków +/- przy polach tekstowych.
+        """
+        try:
+            val = float(entry_widget.get_text()) if is_float else int(entry_widget.get_text())
+            new_val = val + step
+            if is_float:
+                entry_widget.set_text(f"{max(0.1, min(1.0, new_val)):.2f}")
+            else:
+                entry_widget.set_text(str(max(1000, min(25000, new_val))))
+        except ValueError:
+            entry_widget.set_text("1.0" if is_float else "6500")
+
+    # --- Diagnostyka ---
+
+    def _install_handler_profiling(self):
+        """
+        Opakowuje handlery i callbacki okna pomiarem czasu (przed podłączeniem sygnałów).
+        """
+        for name, attr in vars(RedshiftController).items():
+            if name.startswith(("on_", "_on_")) and callable(attr):
+                setattr(self, name, self.logic.metrics.wrap_handler(name, getattr(self, name)))
+
+    def _refresh_debug_panel(self):
+        """
+        Wyświetla percentyle czasów dla każdego rodzaju wywołania.
+        """
+        summary = self.logic.metrics.summary()
+        if not summary:
+            self.debug_label.set_text("Brak pomiarów.")
+            return
+        lines = [f"{'rodzaj':<28} {'n':>5} {'p50':>9} {'p95':>9} {'p99':>9}"]
+        for kind, stats in summary.items():
+            lines.append(f"{kind:<28} {stats['n']:>5} {stats['p50_ms']:>7.1f}ms "
+                         f"{stats['p95_ms']:>7.1f}ms {stats['p99_ms']:>7.1f}ms")
+        self.debug_label.set_markup(f"<tt>{GLib.markup_escape_text(chr(10).join(lines))}</tt>")
+
+    def on_dump_metrics_clicked(self, widget):
+        """
+        Zapisuje pomiary do pliku JSON w katalogu cache użytkownika.
+        """
+        path = os.path.join(GLib.get_user_cache_dir(), "redshift-control", "metrics.json")
+        success, error = self.logic.metrics.dump(path)
+        if success:
+            self.show_info_dialog("Zapisano pomiary", f"Pomiary zapisano w pliku:\n{path}")
+        else:
+            self.show_error_dialog(f"Nie udało się zapisać pomiarów.\nBłąd: {error}")
+
+    # --- Migawka stanu (szybki start) ---
+
+    def _form_state(self):
+        """
+        Wartości pól okna zapisywane w migawce stanu.
+        """
+        return {
+            'lat': self.entry_lat.get_text(),
+            'lon': self.entry_lon.get_text(),
+            'temp_day': self.entry_temp_day.get_text(),
+            'temp_night': self.entry_temp_night.get_text(),
+            'bright_day': self.entry_bright_day.get_text(),
+            'bright_night': self.entry_bright_night.get_text(),
+            'manual': list(self._read_manual_state()),
+            'fade': round(self.spin_fade.get_value(), 1),
+        }
+
+    def _remember_form(self):
+        self.logic.form_state = self._form_state()
+
+    def _apply_snapshot(self, snapshot):
+        """
+        Wypełnia okno i stan logiki z migawki - bez parsowania konfiguracji i skanowania procesów.
+        """
+        self.logic.restore_state_snapshot(snapshot)
+        form = snapshot.get('form') or {}
+        fields = ((self.entry_lat, 'lat'), (self.entry_lon, 'lon'),
+                  (self.entry_temp_day, 'temp_day'), (self.entry_temp_night, 'temp_night'),
+                  (self.entry_bright_day, 'bright_day'), (self.entry_bright_night, 'bright_night'))
+        # przed pierwszą klatką bez wyszukiwania w gazeterze i przeliczania krzywej
+        # przy każdym polu - odświeżane raz, po wyświetleniu okna
+        blocked = [(entry, self._update_curve_preview) for entry, _key in fields]
+        blocked += [(self.entry_lat, self.on_coords_changed), (self.entry_lon, self.on_coords_changed)]
+        for widget, handler in blocked:
+            widget.handler_block_by_func(handler)
+        try:
+            for entry, key in fields:
+                if key in form:
+                    self._set_entry_text(entry, str(form[key]))
+        finally:
+            for widget, handler in blocked:
+                widget.handler_unblock_by_func(handler)
+        GLib.idle_add(self._refresh_location_views, priority=GLib.PRIORITY_LOW)
+        manual = form.get('manual')
+        if manual and len(manual) == 5:
+            for scale, value in zip((self.scale_temp, self.scale_bright, self.scale_gamma_r,
+                                     self.scale_gamma_g, self.scale_gamma_b), manual):
+                self._set_scale_value(scale, value)
+        if 'fade' in form:
+            self._set_scale_value(self.spin_fade, form['fade'])
+        self._show_state_status()
+
+    def _refresh_location_views(self):
+        """
+        Podgląd krzywej i najbliższa miejscowość dla pól odtworzonych z migawki.
+        """
+        self._update_curve_preview()
+        self.on_coords_changed(self.entry_lat)
+        return False
+
+    def _show_state_status(self):
+        """
+        Opisuje w etykiecie statusu stan znany bez działającego procesu redshift.
+        """
+        params = self.logic.auto_params
+        if self.logic.mode == "auto" and params:
+            lat, lon, t_day, t_night, b_day, b_night = params
+            markup = (
+                f"<b>Tryb automatyczny</b>\n"
+                f"Lokalizacja: {lat}, {lon}\n"
+                f"Temp (Dzień/Noc): {t_day}K / {t_night}K\n"
+                f"Jasność (Dzień/Noc): {b_day} / {b_night}"
+            )
+        elif self.logic.mode == "manual" and self.logic.output_params:
+            markup = f"<b>Zastosowano profile wyjść</b> ({len(self.logic.output_params)})"
+        elif self.logic.mode == "manual" and self.logic.manual_params:
+            temp, bright, gamma = self.logic.manual_params
+            markup = (
+                f"<b>Zastosowano ustawienia ręczne (jednorazowy efekt)</b>\n"
+                f"Temperatura: {temp}K, Jasność: {bright}\n"
+                f"Gamma (R:G:B): {':'.join(str(g) for g in gamma)}"
+            )
+        else:
+            markup = "Redshift nie jest uruchomiony."
+        self._set_status_markup(markup)
+
+    def _set_status_markup(self, markup):
+        if self.status_label.get_label() != markup:
+            self.status_label.set_markup(markup)
+
+    def _verify_startup_state(self):
+        """
+        Po wyświetleniu okna: wczytuje konfigurację, skanuje procesy i koryguje stan
+        przyjęty z migawki - zmieniane są tylko pola o innych wartościach.
+        Gdy działa demon, okno jest tylko jego klientem - nie przejmuje procesów
+        i nie uruchamia własnego harmonogramu ani jasności adaptacyjnej.
+        """
+        if daemon_running():
+            self._attach_daemon()
+        self.load_config_on_startup()
+        self.check_and_update_status()
+        if self.daemon is not None:
+            self.logic.kill_redshift_gtk_async()
+            self._remember_form()
+            self.logic.write_state_snapshot(form_only=True)
+            return False
+        self.logic.adopt_session_processes()
+        snapshot = self._snapshot
+        if snapshot is not None:
+            recorded = {item[0] for item in snapshot.get('pids') or () if isinstance(item, list) and item}
+            alive = recorded & set(self.logic.supervisor.entries)
+            if snapshot.get('time', 0) < system_boot_time():
+                # po restarcie systemu rampy gamma są neutralne
+                self.logic.restore_state_snapshot({'mode': 'off'})
+            elif self.logic.mode == "auto" and (snapshot.get('in_process') or not alive):
+                # tryb auto poprzedniego okna lub jego proces już nie działa
+                self.logic.restore_state_snapshot({'mode': 'off'})
+            self._on_processes_changed(self.logic.status_monitor.processes)
+        self._start_profile_schedule()
+        self.logic.kill_redshift_gtk_async()
+        self._remember_form()
+        self.logic.write_state_snapshot()
+        return False
+
+    def _on_destroy(self, widget):
+        if self._nearest_timer:
+            GLib.source_remove(self._nearest_timer)
+            self._nearest_timer = 0
+        if self._search_timer:
+            GLib.source_remove(self._search_timer)
+            self._search_timer = 0
+        self._remember_form()
+        self.logic.write_state_snapshot(form_only=self.daemon is not None)
+        if self.daemon is not None:
+            self.daemon.close()
+
+    # --- Klient demona ---
+
+    def _attach_daemon(self):
+        """
+        Przełącza okno w tryb klienta demona i subskrybuje jego status.
+        """
+        self.daemon = DaemonClient()
+        self.daemon.subscribe(self._on_daemon_status, self._on_daemon_lost)
+
+    def _on_daemon_status(self, status):
+        self._daemon_status = status
+        self.logic.restore_state_snapshot(status)
+        self._show_status(self.logic.status_monitor.processes)
+        adaptive = status.get("adaptive")
+        if adaptive and adaptive.get("brightness") is not None and adaptive.get("lux") is not None:
+            self.ambient_label.set_text(f"Jasność {adaptive['brightness']:.2f} ({adaptive['lux']:.0f} lx)")
+        self._update_schedule_label()
+
+    def _on_daemon_lost(self):
+        """
+        Demon zakończył działanie - okno przejmuje jego rolę (procesy, harmonogram, czujnik).
+        """
+        self.daemon = None
+        self._daemon_status = None
+        self.check_and_update_status()
+        self.logic.adopt_session_processes()
+        self._start_profile_schedule()
+        if self.check_ambient.get_active():
+            self.on_ambient_toggled(self.check_ambient)
+        self._show_status(self.logic.status_monitor.processes)
+
+    def _daemon_request(self, request, callback):
+        """
+        Wysyła polecenie do demona; callback(success, error) jak w metodach RedshiftLogic.
+        """
+        def on_response(response):
+            if response is None:
+                callback(False, "Demon nie odpowiada.")
+            else:
+                callback(response.get("ok", False), response.get("error"))
+
+        self.daemon.request(request, on_response)
+
+    # --- Logika aplikacji ---
+
+    def load_config_on_startup(self):
+        """
+        Wczytuje konfigurację przy starcie programu i obserwuje późniejsze zmiany pliku.
+        """
+        config = self.logic.load_config()
+        if config:
+            self._apply_config(config)
+        self.logic.watch_config(self._on_config_changed_externally)
+
+    def _on_config_changed_externally(self, config):
+        """
+        Wczytuje do formularza zmiany pliku konfiguracyjnego wprowadzone poza programem.
+        """
+        if config:
+            self._apply_config(config)
+        self._start_profile_schedule()
+
+    @staticmethod
+    def _set_entry_text(entry, text):
+        if entry.get_text() != text:
+            entry.set_text(text)
+
+    @staticmethod
+    def _set_scale_value(scale, value):
+        if abs(scale.get_value() - value) > 1e-9:
+            scale.get_adjustment().set_value(value)
+
+    def _apply_config(self, config):
+        """
+        Ustawia pola formularza według konfiguracji - zmieniane są tylko różniące się wartości.
+        """
+        self._applying_config = True
+        try:
+            self._apply_config_values(config)
+        finally:
+            self._applying_config = False
+
+    def _apply_config_values(self, config):
+        if 'redshift' in config:
+            self._set_entry_text(self.entry_temp_day, config.get('redshift', 'temp-day', fallback='6500'))
+            self._set_entry_text(self.entry_temp_night, config.get('redshift', 'temp-night', fallback='4500'))
+            self._set_entry_text(self.entry_bright_day, config.get('redshift', 'brightness-day', fallback='1.0'))
+            self._set_entry_text(self.entry_bright_night, config.get('redshift', 'brightness-night', fallback='1.0'))
+            gamma_str = config.get('redshift', 'gamma', fallback='1.0:1.0:1.0')
+            try:
+                r, g, b = map(float, gamma_str.split(':'))
+                self._set_scale_value(self.scale_gamma_r, r)
+                self._set_scale_value(self.scale_gamma_g, g)
+                self._set_scale_value(self.scale_gamma_b, b)
+            except (ValueError, IndexError):
+                print(f"Ostrzeżenie: nieprawidłowy format gamma w pliku konfiguracyjnym: {gamma_str}")
+        if 'manual' in config:
+            self._set_entry_text(self.entry_lat, config.get('manual', 'lat', fallback=''))
+            self._set_entry_text(self.entry_lon, config.get('manual', 'lon', fallback=''))
+        try:
+            self._set_scale_value(self.spin_fade, config.getfloat(CONTROLLER_SECTION, 'fade', fallback=1.0))
+        except ValueError:
+            pass
+        enabled, self._ambient_sensor = self.logic.ambient_settings(config)
+        if self.check_ambient.get_active() != enabled:
+            self.check_ambient.set_active(enabled)
+        profiles = {
+            crtc: (temp, bright) + tuple(gamma)
+            for crtc, (temp, bright, gamma) in self.logic.output_profiles_from_config(config).items()
+        }
+        if profiles != self.output_profiles:
+            self.output_profiles = profiles
+            self._populate_outputs()
+        presets = self.logic.presets_from_config(config)
+        if presets != self.presets:
+            self.presets = presets
+            self._populate_presets()
+        rows = [
+            [entry.time.strftime("%H:%M"), format_weekdays(entry.days), entry.preset]
+            for entry in self.logic.schedule_from_config(config)
+        ]
+        if rows != [list(row) for row in self.schedule_store]:
+            self.schedule_store.clear()
+            for row in rows:
+                self.schedule_store.append(row)
+
+    def on_save_config_clicked(self, widget):
+        """
+        Zapisuje konfigurację do pliku.
+        """
+        gamma_r = self.scale_gamma_r.get_value()
+        gamma_g = self.scale_gamma_g.get_value()
+        gamma_b = self.scale_gamma_b.get_value()
+        redshift_data = {
+            'temp-day': self.entry_temp_day.get_text(),
+            'temp-night': self.entry_temp_night.get_text(),
+            'brightness-day': self.entry_bright_day.get_text(),
+            'brightness-night': self.entry_bright_night.get_text(),
+            'gamma': f'{gamma_r:.2f}:{gamma_g:.2f}:{gamma_b:.2f}',
+            'location-provider': 'manual'
+        }
+        manual_data = {
+            'lat': self.entry_lat.get_text(),
+            'lon': self.entry_lon.get_text()
+        }
+        self._store_selected_profile()
+        outputs_data = {
+            crtc: {
+                'temp': str(state[0]),
+                'brightness': f'{state[1]:.2f}',
+                'gamma': ':'.join(f'{g:.2f}' for g in state[2:]),
+            }
+            for crtc, state in self.output_profiles.items()
+        }
+        controller_data = {
+            'fade': f'{self.spin_fade.get_value():.1f}',
+            'ambient-light': 'on' if self.check_ambient.get_active() else 'off',
+        }
+        if self._ambient_sensor:
+            controller_data['ambient-sensor'] = self._ambient_sensor
+        extra_sections = {CONTROLLER_SECTION: controller_data}
+        extra_sections.update(self.logic.schedule_sections(self.presets, self._schedule_entries()))
+        success, error = self.logic.save_config(redshift_data, manual_data, outputs_data, extra_sections)
+        if success:
+            self._start_profile_schedule()
+            self.show_info_dialog("Sukces!", f"Konfiguracja została zapisana w pliku:\n{CONFIG_PATH}")
+        else:
+            self.show_error_dialog(f"Nie udało się zapisać pliku konfiguracyjnego.\nBłąd: {error}")
+
+    def _read_manual_state(self):
+        """
+        Zwraca stan suwaków ręcznych jako krotkę (temp, jasność, gamma R, G, B).
+        """
+        return (
+            int(self.scale_temp.get_value()),
+            round(self.scale_bright.get_value(), 2),
+            round(self.scale_gamma_r.get_value(), 2),
+            round(self.scale_gamma_g.get_value(), 2),
+            round(self.scale_gamma_b.get_value(), 2),
+        )
+
+    def on_live_preview_toggled(self, widget):
+        """
+        Włącza podgląd na żywo - zatrzymuje tryb auto, by nie nadpisywał podglądu.
+        """
+        if widget.get_active():
+            self.preview_dispatcher.last_applied = None
+            if self.daemon is not None:
+                # demon sam zatrzymuje tryb auto przed zastosowaniem ustawień
+                self.preview_dispatcher.request(self._read_manual_state())
+                return
+            self.logic.kill_redshift_async(
+                lambda: self.preview_dispatcher.request(self._read_manual_state())
+            )
+
+    def on_manual_scale_changed(self, widget):
+        """
+        Przekazuje zmianę suwaka do dyspozytora podglądu (tylko w trybie podglądu).
+        """
+        if self.check_live_preview.get_active() and not self._loading_profile:
+            self.preview_dispatcher.request(self._read_manual_state())
+
+    def _apply_preview_state(self, state, done):
+        """
+        Stosuje stan podglądu na żywo jednym wywołaniem redshift.
+        """
+        def on_applied(success, error):
+            if success:
+                self.status_label.set_markup(
+                    f"<b>Podgląd na żywo</b>\nTemperatura: {state[0]}K, Jasność: {state[1]}"
+                )
+            done(success)
+
+        if self.daemon is not None:
+            self._daemon_request(
+                {"cmd": "apply", "temp": state[0], "brightness": state[1], "gamma": list(state[2:])}, on_applied
+            )
+            return
+        self.logic.apply_manual_async(state[0], state[1], state[2:], on_applied)
+
+    # --- Profile wyjść ---
+
+    def _populate_outputs(self):
+        """
+        Wypełnia listę wyjść: wykryte CRTC oraz te, dla których zapisano profil.
+        """
+        outputs = sorted(set(self.logic.list_outputs()) | set(self.output_profiles))
+        self._loading_profile = True
+        self.combo_output.remove_all()
+        self.combo_output.append("all", "Wszystkie wyjścia")
+        for crtc in outputs:
+            suffix = " (własny profil)" if crtc in self.output_profiles else ""
+            self.combo_output.append(str(crtc), f"CRTC {crtc}{suffix}")
+        self.combo_output.set_active_id("all" if self._selected_output is None else str(self._selected_output))
+        self._loading_profile = False
+
+    def _load_state_into_scales(self, state):
+        self._loading_profile = True
+        for scale, value in zip((self.scale_temp, self.scale_bright, self.scale_gamma_r,
+                                 self.scale_gamma_g, self.scale_gamma_b), state):
+            self._set_scale_value(scale, value)
+        self._loading_profile = False
+
+    def _store_selected_profile(self):
+        """
+        Zapamiętuje stan suwaków dla aktualnie wybranego wyjścia.
+        """
+        state = self._read_manual_state()
+        if self._selected_output is None:
+            self._all_outputs_state = state
+        elif state != self.output_profiles.get(self._selected_output, self._all_outputs_state):
+            self.output_profiles[self._selected_output] = state
+
+    def on_output_changed(self, widget):
+        """
+        Przełącza edytowany profil: zapisuje suwaki poprzedniego wyjścia i wczytuje nowego.
+        """
+        if self._loading_profile or widget.get_active_id() is None:
+            return
+        self._store_selected_profile()
+        active = widget.get_active_id()
+        self._selected_output = None if active == "all" else int(active)
+        if self._selected_output is None:
+            state = self._all_outputs_state
+        else:
+            state = self.output_profiles.get(self._selected_output)
+        if state is not None:
+            self._load_state_into_scales(state)
+
+    def on_remove_output_profile(self, widget):
+        """
+        Usuwa własny profil wybranego wyjścia (wróci do ustawień wspólnych).
+        """
+        if self._selected_output is None:
+            return
+        self.output_profiles.pop(self._selected_output, None)
+        self._selected_output = None
+        self._populate_outputs()
+        if self._all_outputs_state is not None:
+            self._load_state_into_scales(self._all_outputs_state)
+
+    def _apply_output_profiles(self):
+        """
+        Stosuje profile wszystkich wyjść równolegle i pokazuje wynik dla każdego z nich.
+        """
+        base = self._all_outputs_state or self._read_manual_state()
+        outputs = sorted(set(self.logic.list_outputs()) | set(self.output_profiles))
+        profiles = {}
+        for crtc in outputs:
+            state = self.output_profiles.get(crtc, base)
+            profiles[crtc] = (state[0], state[1], state[2:])
+
+        def on_applied(results):
+            lines = ["<b>Zastosowano ustawienia ręczne dla wyjść</b>"]
+            failed = []
+            for crtc, (success, error) in sorted(results.items()):
+                temp, bright, gamma = profiles[crtc]
+                result = "OK" if success else "błąd"
+                lines.append(f"CRTC {crtc}: {temp}K, jasność {bright} - {result}")
+                if not success:
+                    failed.append(f"CRTC {crtc}: {error}")
+            self.status_label.set_markup("\n".join(lines))
+            if failed:
+                self.show_error_dialog("Błąd stosowania ustawień:\n" + "\n".join(failed))
+
+        self.status_label.set_text("Stosowanie ustawień dla wyjść...")
+        if self.daemon is not None:
+            def on_response(response):
+                if response is None or not response.get("results"):
+                    error = "Demon nie odpowiada." if response is None else response.get("error")
+                    on_applied({crtc: (False, error) for crtc in profiles})
+                    return
+                on_applied({int(crtc): tuple(result) for crtc, result in response["results"].items()})
+
+            self.daemon.request({"cmd": "outputs", "profiles": {
+                str(crtc): [temp, bright, list(gamma)] for crtc, (temp, bright, gamma) in profiles.items()
+            }}, on_response)
+            return
+        self.logic.kill_redshift_async(lambda: self.logic.apply_outputs_async(profiles, on_applied))
+
+    def on_apply_manual(self, widget):
+        """
+        Zastosowanie ustawień ręcznych (jednorazowy efekt).
+        """
+        self._store_selected_profile()
+        self._remember_form()
+        if self.output_profiles:
+            self._apply_output_profiles()
+            return
+        state = self._read_manual_state()
+        temp, bright = state[0], state[1]
+        gamma_str = ":".join(str(g) for g in state[2:])
+
+        def on_applied(success, error):
+            if success:
+                self.preview_dispatcher.last_applied = state
+                self.status_label.set_markup(
+                    f"<b>Zastosowano ustawienia ręczne (jednorazowy efekt)</b>\n"
+                    f"Temperatura: {temp}K, Jasność: {bright}\n"
+                    f"Gamma (R:G:B): {gamma_str}"
+                )
+            else:
+                self.status_label.set_text("Nie udało się zastosować ustawień ręcznych.")
+                self.show_error_dialog(f"Błąd uruchamiania redshift: {error}")
+
+        self.status_label.set_text("Stosowanie ustawień ręcznych...")
+        if self.daemon is not None:
+            self._daemon_request({"cmd": "apply", "temp": temp, "brightness": bright, "gamma": list(state[2:]),
+                                  "fade": self.spin_fade.get_value()}, on_applied)
+            return
+        self.logic.switch_mode_async("manual", (temp, bright, state[2:]), self.spin_fade.get_value(), on_applied)
+
+    def on_reset(self, widget):
+        """
+        Resetuje ustawienia i wyłącza redshift.
+        """
+        self.check_live_preview.set_active(False)
+        self.preview_dispatcher.cancel()
+        self.combo_output.set_active_id("all")
+        self.scale_temp.get_adjustment().set_value(6500)
+        self.scale_bright.get_adjustment().set_value(1.0)
+        self.scale_gamma_r.get_adjustment().set_value(1.0)
+        self.scale_gamma_g.get_adjustment().set_value(1.0)
+        self.scale_gamma_b.get_adjustment().set_value(1.0)
+        self._remember_form()
+        self.status_label.set_text("Resetowanie...")
+        if self.daemon is not None:
+            self._daemon_request({"cmd": "reset", "fade": self.spin_fade.get_value()},
+                                 lambda success, error: self._show_status(self.logic.status_monitor.processes))
+            return
+        self.logic.switch_mode_async(
+            "off", None, self.spin_fade.get_value(), lambda success, error: self.check_and_update_status()
+        )
+
+    def check_and_update_status(self):
+        """
+        Sprawdza status działania redshift (skanowanie /proc, bez uruchamiania procesów).
+        """
+        try:
+            self.logic.status_monitor.refresh()
+        except OSError as e:
+            self.status_label.set_text(f"Błąd podczas sprawdzania statusu: {e}")
+
+    def _on_processes_changed(self, processes):
+        """
+        Aktualizuje etykietę statusu po zmianie zbioru procesów redshift.
+        """
+        if self.daemon is None:
+            self._show_status(processes)
+
+    def _show_status(self, processes):
+        """
+        Opisuje w etykiecie statusu procesy redshift albo tryb auto prowadzony przez demona.
+        """
+        status = self._daemon_status
+        if status and status.get("in_process") and status.get("current") and status.get("auto"):
+            lat, lon, t_day, t_night, b_day, b_night = status["auto"]
+            temp, bright = status["current"]
+            self._set_status_markup(
+                f"<b>Tryb automatyczny aktywny (demon)</b>\n"
+                f"Lokalizacja: {lat}, {lon}\n"
+                f"Temp (Dzień/Noc): {t_day}K / {t_night}K\n"
+                f"Jasność (Dzień/Noc): {b_day} / {b_night}\n"
+                f"Teraz: {temp}K, jasność {bright}"
+            )
+            return
+        if not processes:
+            self._show_state_status()
+            return
+        blocks = []
+        entries_filled = False
+        for pid, proc in sorted(processes.items()):
+            if proc.mode == "auto" and proc.location and proc.temps and proc.brightness:
+                lat, lon = proc.location
+                t_day, t_night = proc.temps
+                b_day, b_night = proc.brightness
+                blocks.append(
+                    f"<b>Tryb automatyczny aktywny (PID: {pid})</b>\n"
+                    f"Lokalizacja: {lat}, {lon}\n"
+                    f"Temp (Dzień/Noc): {t_day}K / {t_night}K\n"
+                    f"Jasność (Dzień/Noc): {b_day} / {b_night}"
+                )
+                if not entries_filled:
+                    self._set_entry_text(self.entry_lat, lat)
+                    self._set_entry_text(self.entry_lon, lon)
+                    self._set_entry_text(self.entry_temp_day, t_day)
+                    self._set_entry_text(self.entry_temp_night, t_night)
+                    self._set_entry_text(self.entry_bright_day, b_day)
+                    self._set_entry_text(self.entry_bright_night, b_night)
+                    entries_filled = True
+            else:
+                arguments = " ".join(proc.argv[1:]) or "tryb domyślny (geolokalizacja)"
+                blocks.append(
+                    f"<b>Redshift działa (PID: {pid})</b>\nUruchomiony z opcjami:\n"
+                    f"<tt>{GLib.markup_escape_text(arguments)}</tt>"
+                )
+        if len(blocks) > 1:
+            blocks.insert(0, f"<b>Uruchomione procesy redshift: {len(blocks)}</b>")
+        self._set_status_markup("\n\n".join(blocks))
+
+    def on_set_location(self, widget):
+        """
+        Uruchamia redshift w trybie automatycznym na podstawie wprowadzonych danych.
+        """
+        values = [w.get_text() for w in [
+            self.entry_lat, self.entry_lon, self.entry_temp_day,
+            self.entry_temp_night, self.entry_bright_day, self.entry_bright_night
+        ]]
+        error = self.logic.validate_auto_params(*values)
+        if error:
+            self.show_error_dialog(error)
+            return
+
+        def on_started(success, error):
+            if not success:
+                self.status_label.set_text("Nie udało się uruchomić trybu auto.")
+                self.show_error_dialog(f"Błąd uruchamiania redshift: {error}")
+                return
+            self.check_and_update_status()
+
+        self.check_live_preview.set_active(False)
+        self.preview_dispatcher.cancel()
+        self._remember_form()
+        self.status_label.set_text("Uruchamianie trybu auto...")
+        if self.daemon is not None:
+            keys = ("lat", "lon", "temp_day", "temp_night", "brightness_day", "brightness_night")
+            self._daemon_request(dict(zip(keys, values), cmd="auto", fade=self.spin_fade.get_value()), on_started)
+            return
+        self.logic.switch_mode_async(
+            "auto", values, self.spin_fade.get_value(), on_started,
+            on_change=lambda temp, bright: self._show_status(self.logic.status_monitor.processes),
+            on_exit=self._on_auto_mode_exited
+        )
+
+    def _on_auto_mode_exited(self, success, error):
+        """
+        Odświeża status, gdy proces trybu automatycznego zakończy działanie.
+        """
+        self.check_and_update_status()
+
+    def on_city_changed(self, widget):
+        """
+        Ustawia współrzędne po wyborze miasta; wyszukiwanie podpowiedzi dla wpisywanego
+        tekstu odkłada do przerwy w pisaniu.
+        """
+        if self._search_timer:
+            GLib.source_remove(self._search_timer)
+            self._search_timer = 0
+        text = widget.get_active_text() or ""
+        coords = self.search_results.get(text) or self.cities_data.get(text)
+        if coords:
+            self.entry_lat.set_text(coords[0])
+            self.entry_lon.set_text(coords[1])
+            return
+        self._search_timer = GLib.timeout_add(SEARCH_DELAY_MS, self._update_city_results)
+
+    def _update_city_results(self):
+        """
+        Odświeża podpowiedzi miejscowości z gazetera dla bieżącego tekstu pola.
+        """
+        self._search_timer = 0
+        found = self.gazetteer.search(self.combo_cities.get_active_text() or "")
+        labels = [f"{name} ({country})" if country else name for name, _lat, _lon, country, _pop in found]
+        self.search_results = {}
+        self.city_results.clear()
+        for label, (name, lat, lon, country, _population) in zip(labels, found):
+            if labels.count(label) > 1:
+                # miejscowości o tej samej nazwie w jednym kraju rozróżniają współrzędne
+                label = f"{name} ({country}, {lat:.2f}, {lon:.2f})"
+            if label not in self.search_results:
+                self.search_results[label] = (f"{lat:.4f}", f"{lon:.4f}")
+                self.city_results.append([label])
+        return False
+
+    def _update_curve_preview(self, widget=None):
+        """
+        Przekazuje do podglądu krzywej bieżące dane trybu automatycznego (None, gdy niepoprawne).
+        """
+        values = [w.get_text() for w in (
+            self.entry_lat, self.entry_lon, self.entry_temp_day,
+            self.entry_temp_night, self.entry_bright_day, self.entry_bright_night
+        )]
+        params = None
+        if self.logic.validate_auto_params(*values) is None:
+            lat, lon, t_day, t_night, b_day, b_night = values
+            params = (float(lat), float(lon), int(t_day), int(t_night), float(b_day), float(b_night))
+        self.curve_preview.set_params(params)
+
+    def on_city_match_selected(self, completion, model, tree_iter):
+        """
+        Wybór podpowiedzi - tekst pola ustawia współrzędne przez on_city_changed.
+        """
+        self.combo_cities.get_child().set_text(model[tree_iter][0])
+        return True
+
+    def on_coords_changed(self, widget):
+        """
+        Odkłada wyszukanie najbliższej miejscowości do przerwy w pisaniu.
+        """
+        if self._nearest_timer:
+            GLib.source_remove(self._nearest_timer)
+        self._nearest_timer = GLib.timeout_add(NEAREST_DELAY_MS, self._update_nearest)
+
+    def _update_nearest(self):
+        """
+        Pokazuje najbliższą miejscowość dla wpisanych współrzędnych.
+        """
+        self._nearest_timer = 0
+        try:
+            lat, lon = float(self.entry_lat.get_text()), float(self.entry_lon.get_text())
+        except ValueError:
+            self.nearest_label.set_text("")
+            return False
+        nearest = self.gazetteer.nearest(lat, lon) if -90 <= lat <= 90 and -180 <= lon <= 180 else None
+        if nearest is None:
+            self.nearest_label.set_text("")
+            return False
+        (name, _lat, _lon, country, _population), distance = nearest
+        self.nearest_label.set_text(f"Najbliżej: {name} ({country}), {distance:.0f} km")
+        return False
+
+    # --- Jasność adaptacyjna ---
+
+    def on_ambient_toggled(self, widget):
+        """
+        Włącza lub wyłącza jasność adaptacyjną z czujnika światła otoczenia.
+        """
+        if self.daemon is not None:
+            # demon sam stosuje ustawienie z pliku konfiguracyjnego; okno przekazuje tylko zmiany użytkownika
+            enabled = widget.get_active()
+            self.scale_bright.set_sensitive(not enabled)
+            if not enabled:
+                self.ambient_label.set_text("")
+            if not self._applying_config:
+                def on_done(success, error):
+                    if not success:
+                        widget.set_active(False)
+                        self.show_error_dialog(f"Nie można włączyć jasności adaptacyjnej.\n{error}")
+
+                self._daemon_request({"cmd": "ambient", "enabled": enabled, "sensor": self._ambient_sensor}, on_done)
+            return
+        if not widget.get_active():
+            self.logic.stop_adaptive_brightness()
+            self.ambient_label.set_text("")
+            self.scale_bright.set_sensitive(True)
+            return
+        success, error = self.logic.start_adaptive_brightness(self._ambient_sensor, on_change=self._on_ambient_change)
+        if not success:
+            widget.set_active(False)
+            self.show_error_dialog(f"Nie można włączyć jasności adaptacyjnej.\n{error}")
+            return
+        self.scale_bright.set_sensitive(False)
+
+    def _on_ambient_change(self, bright):
+        adaptive = self.logic.adaptive_brightness
+        if adaptive is not None and adaptive.level is not None:
+            self.ambient_label.set_text(f"Jasność {bright:.2f} ({10 ** adaptive.level:.0f} lx)")
+
+    # --- Harmonogram presetów ---
+
+    def _populate_presets(self):
+        active = self.combo_schedule_preset.get_active_id()
+        self.combo_schedule_preset.remove_all()
+        for name in sorted(self.presets):
+            self.combo_schedule_preset.append(name, name)
+        self.combo_schedule_preset.append(PRESET_OFF, f"{PRESET_OFF} (neutralne kolory)")
+        if not self.combo_schedule_preset.set_active_id(active or ""):
+            self.combo_schedule_preset.set_active(0)
+
+    def on_save_preset(self, widget):
+        """
+        Zapisuje bieżące położenie suwaków jako nazwany preset.
+        """
+        name = self.entry_preset_name.get_text().strip()
+        if not name or name == PRESET_OFF or any(c.isspace() or c in "[]" for c in name):
+            self.show_error_dialog("Nazwa presetu nie może być pusta, zawierać spacji ani nawiasów "
+                                   f"i nie może brzmieć „{PRESET_OFF}”.")
+            return
+        state = self._read_manual_state()
+        self.presets[name] = (state[0], state[1], state[2:])
+        self._populate_presets()
+        self.combo_schedule_preset.set_active_id(name)
+        self.schedule_label.set_text(f"Zapisano preset „{name}” - zapisz ustawienia w pliku, aby go zachować.")
+
+    def on_add_schedule_entry(self, widget):
+        """
+        Dodaje przełączenie presetu o podanej godzinie w wybrane dni.
+        """
+        try:
+            moment = datetime.datetime.strptime(self.entry_schedule_time.get_text().strip(), "%H:%M").time()
+        except ValueError:
+            self.show_error_dialog("Godzina musi mieć format GG:MM, np. 07:30.")
+            return
+        try:
+            days = parse_weekdays(self.entry_schedule_days.get_text())
+        except KeyError:
+            self.show_error_dialog("Nieprawidłowe dni tygodnia. Przykłady: *, mon-fri, sat,sun, pn-pt.")
+            return
+        preset = self.combo_schedule_preset.get_active_id()
+        if preset is None:
+            return
+        self.schedule_store.append([moment.strftime("%H:%M"), format_weekdays(days), preset])
+        self.schedule_label.set_text("Zapisz ustawienia w pliku, aby uruchomić harmonogram.")
+
+    def on_remove_schedule_entry(self, widget):
+        model, tree_iter = self.schedule_selection.get_selected()
+        if tree_iter is not None:
+            model.remove(tree_iter)
+            self.schedule_label.set_text("Zapisz ustawienia w pliku, aby zmienić harmonogram.")
+
+    def _schedule_entries(self):
+        """
+        Zwraca wpisy harmonogramu z listy w oknie jako ScheduleEntry.
+        """
+        return [
+            ScheduleEntry(datetime.datetime.strptime(time_str, "%H:%M").time(), parse_weekdays(days), preset)
+            for time_str, days, preset in self.schedule_store
+        ]
+
+    def _start_profile_schedule(self):
+        """
+        Uruchamia (lub odświeża) harmonogram zapisany w pliku konfiguracyjnym.
+        Demon obserwuje plik sam, więc wtedy okno tylko pokazuje jego harmonogram.
+        """
+        if self.daemon is None:
+            self.logic.start_profile_schedule(self._on_preset_switched)
+        self._update_schedule_label()
+
+    def _on_preset_switched(self, entry, success, error):
+        """
+        Pokazuje przełączenie presetu wykonane przez harmonogram.
+        """
+        if success:
+            self.status_label.set_markup(
+                f"<b>Harmonogram: preset „{GLib.markup_escape_text(entry.preset)}”</b>\n"
+                f"od {entry.time.strftime('%H:%M')} ({format_weekdays(entry.days)})"
+            )
+        else:
+            self.status_label.set_text(f"Nie udało się przełączyć presetu „{entry.preset}”: {error}")
+        self._update_schedule_label()
+
+    def _update_schedule_label(self):
+        if self.daemon is not None:
+            upcoming = [
+                (datetime.datetime.fromisoformat(item["at"]), item["preset"])
+                for item in (self._daemon_status or {}).get("schedule") or ()
+            ][:1]
+        else:
+            scheduler = self.logic.profile_scheduler
+            upcoming = [(moment, entry.preset) for moment, entry in scheduler.upcoming(1)] if scheduler else []
+        if not upcoming:
+            self.schedule_label.set_text("Harmonogram nieaktywny.")
+            return
+        moment, preset = upcoming[0]
+        self.schedule_label.set_text(f"Następne przełączenie: {moment:%a %d.%m %H:%M} → {preset}")
+
+    # --- Dialogi ---
+
+    def show_error_dialog(self, message):
+        """
+        Wyświetla okno dialogowe z błędem.
+        """
+        dialog = Gtk.MessageDialog(
+            transient_for=self, flags=0, message_type=Gtk.MessageType.ERROR,
+            buttons=Gtk.ButtonsType.OK, text="Wystąpił błąd"
+        )
+        dialog.format_secondary_text(str(message))
+        dialog.run()
+        dialog.destroy()
+
+    def show_info_dialog(self, title, message):
+        """
+        Wyświetla okno dialogowe z informacją.
+        """
+        dialog = Gtk.MessageDialog(
+            transient_for=self, flags=0, message_type=Gtk.MessageType.INFO,
+            buttons=Gtk.ButtonsType.OK, text=title
+        )
+        dialog.format_secondary_text(message)
+        dialog.run()
+        dialog.destroy()
+
+def run_gui():
+    """
+    Uruchamia okno programu i pętlę GTK.
+    """
+    win = RedshiftController()
+    win.connect("destroy", Gtk.main_quit)
+    win.show_all()
+    Gtk.main()
+    return 0
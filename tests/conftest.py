@@ -0,0 +1,76 @@
+# -*- coding: utf-8 -*-
+#
+#  conftest.py - Wspólne elementy testów Kontrolera Redshift
+#
+#  Copyright (C) 2025  Wasz Informatyk
+#
+#  Ten program jest wolnym oprogramowaniem; możesz go rozprowadzać dalej i/lub
+#  modyfikować na warunkach Powszechnej Licencji Publicznej GNU, wydanej przez
+#  Fundację Wolnego Oprogramowania; według wersji 3 tej Licencji lub (według
+#  twojego wyboru) którejkolwiek późniejszej wersji.
+
+import os
+import sys
+
+import pytest
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+# Atrapa redshift: zapisuje wywołanie (ekran i argumenty), a zachowanie zależy od DISPLAY -
+# ":3" kończy się błędem, ":7" (albo ustawione STUB_HANG) zawiesza się do SIGTERM,
+# pozostałe kończą się sukcesem
+STUB_REDSHIFT = """#!/bin/sh
+echo "$DISPLAY $*" >> "$STUB_LOG"
+if [ "$DISPLAY" = ":7" ] || [ -n "$STUB_HANG" ]; then
+    trap 'kill $! 2>/dev/null; exit 0' TERM
+    sleep 30 & wait
+    exit 0
+fi
+case "$DISPLAY" in
+    :3) echo "Cannot open display" >&2; exit 1 ;;
+esac
+"""
+
+@pytest.fixture
+def stub_redshift(tmp_path, monkeypatch):
+    """
+    Umieszcza atrapę redshift na początku PATH; zwraca ścieżkę dziennika wywołań.
+    """
+    bindir = tmp_path / "bin"
+    bindir.mkdir()
+    stub = bindir / "redshift"
+    stub.write_text(STUB_REDSHIFT, encoding="utf-8")
+    stub.chmod(0o755)
+    log_path = tmp_path / "invocations.log"
+    monkeypatch.setenv("PATH", f"{bindir}{os.pathsep}{os.environ.get('PATH', '')}")
+    monkeypatch.setenv("STUB_LOG", str(log_path))
+    return log_path
+
+@pytest.fixture
+def run_glib():
+    """
+    Uruchamia pętlę GLib do chwili, gdy start(done) wywoła done(wynik); zwraca wynik.
+    Testy pętli zdarzeń są pomijane, gdy brak PyGObject.
+    """
+    pytest.importorskip("gi")
+    from gi.repository import GLib
+
+    def run(start, timeout=10.0):
+        loop = GLib.MainLoop()
+        result = []
+
+        def done(value):
+            result.append(value)
+            loop.quit()
+
+        start(done)
+        if not result:
+            timer = GLib.timeout_add(int(timeout * 1000), loop.quit)
+            loop.run()
+            if result:
+                GLib.source_remove(timer)
+        assert result, "pętla GLib nie zakończyła się w wyznaczonym czasie"
+        return result[0]
+
+    return run
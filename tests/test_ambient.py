@@ -0,0 +1,118 @@
+# -*- coding: utf-8 -*-
+#
+#  test_ambient.py - Testy jasności adaptacyjnej z atrapą czujnika IIO w katalogu tymczasowym
+#
+#  Copyright (C) 2025  Wasz Informatyk
+#
+#  Ten program jest wolnym oprogramowaniem; możesz go rozprowadzać dalej i/lub
+#  modyfikować na warunkach Powszechnej Licencji Publicznej GNU, wydanej przez
+#  Fundację Wolnego Oprogramowania; według wersji 3 tej Licencji lub (według
+#  twojego wyboru) którejkolwiek późniejszej wersji.
+
+import pytest
+
+import redshift_control as rc
+
+class RecordingLogic:
+    """
+    Zamiast RedshiftLogic - zapisuje żądane jasności i od razu zgłasza sukces.
+    """
+    def __init__(self):
+        self.brightness = []
+
+    def set_brightness_async(self, brightness, callback):
+        self.brightness.append(brightness)
+        callback(True, None)
+
+@pytest.fixture
+def iio_root(tmp_path):
+    """
+    Katalog w układzie /sys/bus/iio/devices: akcelerometr bez odczytu światła i czujnik światła.
+    """
+    (tmp_path / "iio:device0").mkdir()
+    (tmp_path / "iio:device0" / "in_accel_x_raw").write_text("0\n")
+    device = tmp_path / "iio:device1"
+    device.mkdir()
+    (device / "in_illuminance_raw").write_text("1000\n")
+    (device / "in_illuminance_scale").write_text("0.5\n")
+    (device / "in_illuminance_offset").write_text("0\n")
+    return tmp_path
+
+def _set_lux(device, lux):
+    # skala 0.5 - surowa wartość to podwojone natężenie
+    (device / "in_illuminance_raw").write_text(f"{lux * 2:g}\n")
+
+@pytest.fixture
+def adaptive(iio_root):
+    pytest.importorskip("gi")
+    sensor = rc.AmbientLightSensor(rc.find_light_sensor(str(iio_root)))
+    changes = []
+    loop = rc.AdaptiveBrightness(RecordingLogic(), sensor, on_change=changes.append)
+    loop.changes = changes
+    yield loop
+    loop.stop()
+    sensor.close()
+
+def _sample_now(loop):
+    # próbka bez czekania na budzik (poprzedni jest odwoływany)
+    loop.stop()
+    loop._sample()
+
+def test_find_light_sensor(iio_root, tmp_path_factory):
+    assert rc.find_light_sensor(str(iio_root)) == str(iio_root / "iio:device1")
+    assert rc.find_light_sensor(str(tmp_path_factory.mktemp("pusty"))) is None
+    assert rc.find_light_sensor(str(iio_root / "brak")) is None
+
+def test_sensor_reads_raw_with_scale(iio_root):
+    sensor = rc.AmbientLightSensor(str(iio_root / "iio:device1"))
+    try:
+        assert sensor.read_lux() == pytest.approx(500.0)
+        _set_lux(iio_root / "iio:device1", 42)
+        assert sensor.read_lux() == pytest.approx(42.0)
+    finally:
+        sensor.close()
+
+def test_sensor_without_illuminance_is_rejected(iio_root):
+    with pytest.raises(OSError):
+        rc.AmbientLightSensor(str(iio_root / "iio:device0"))
+
+def test_first_sample_applies_and_stable_readings_back_off(adaptive):
+    adaptive.start()
+    assert adaptive.logic.brightness == [1.0]
+    assert adaptive.changes == [1.0]
+    for expected in (4.0, 8.0, 16.0, 32.0, 64.0, 64.0):
+        _sample_now(adaptive)
+        assert adaptive.interval == expected
+    assert adaptive.logic.brightness == [1.0]
+
+def test_ema_applies_large_change_in_few_steps(adaptive, iio_root):
+    adaptive.start()
+    _set_lux(iio_root / "iio:device1", 5)
+    _sample_now(adaptive)
+    # pierwsza próbka po zmianie przesuwa średnią tylko o alpha - poniżej progu skoku
+    assert adaptive.logic.brightness == [1.0]
+    assert adaptive.interval == adaptive.interval_min
+    for _ in range(30):
+        _sample_now(adaptive)
+    assert adaptive.logic.brightness[-1] == pytest.approx(adaptive.min_bright, abs=adaptive.min_step)
+    assert len(adaptive.logic.brightness) <= 4
+    assert all(a > b for a, b in zip(adaptive.logic.brightness, adaptive.logic.brightness[1:]))
+
+def test_reversal_needs_hysteresis(adaptive):
+    adaptive.applied, adaptive._direction = 0.8, -1
+    adaptive._maybe_apply(0.75, True)  # ten sam kierunek - wystarczy min_step
+    assert adaptive.applied == 0.75
+    adaptive._maybe_apply(0.8, True)  # odwrócenie o min_step - za mało
+    assert adaptive.applied == 0.75
+    adaptive._maybe_apply(0.83, True)  # min_step + histereza
+    assert adaptive.applied == 0.83
+    adaptive._maybe_apply(0.9, False)  # niestabilny odczyt - tylko duże skoki
+    assert adaptive.applied == 0.83
+    assert adaptive.logic.brightness == [0.75, 0.83]
+
+def test_target_brightness_maps_log_lux():
+    loop = rc.AdaptiveBrightness(RecordingLogic(), None, min_bright=0.5, max_bright=1.0,
+                                 lux_dark=5.0, lux_bright=500.0)
+    assert loop.target_brightness(-1.0) == 0.5
+    assert loop.target_brightness(10.0) == 1.0
+    assert loop.target_brightness(1.699) == pytest.approx(0.75, abs=0.01)
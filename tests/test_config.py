@@ -0,0 +1,122 @@
+# -*- coding: utf-8 -*-
+#
+#  test_config.py - Testy wczytywania i atomowego zapisu konfiguracji (plik w katalogu tymczasowym)
+#
+#  Copyright (C) 2025  Wasz Informatyk
+#
+#  Ten program jest wolnym oprogramowaniem; możesz go rozprowadzać dalej i/lub
+#  modyfikować na warunkach Powszechnej Licencji Publicznej GNU, wydanej przez
+#  Fundację Wolnego Oprogramowania; według wersji 3 tej Licencji lub (według
+#  twojego wyboru) którejkolwiek późniejszej wersji.
+
+import os
+import time
+
+import pytest
+
+import redshift_control as rc
+
+REDSHIFT_DATA = {"temp-day": "6500", "temp-night": "3500", "gamma": "1.0"}
+MANUAL_DATA = {"temp": "4500", "brightness": "0.9"}
+
+@pytest.fixture
+def logic(tmp_path):
+    return rc.RedshiftLogic(config_path=str(tmp_path / "conf" / "redshift.conf"), gamma_backend=None,
+                            state_path=str(tmp_path / "state.json"))
+
+def _write(path, text):
+    with open(path, "w", encoding="utf-8") as f:
+        f.write(text)
+
+def test_load_config_is_cached_until_stat_key_changes(logic, tmp_path):
+    os.makedirs(tmp_path / "conf")
+    _write(logic.config_path, "[manual]\ntemp = 4500\n")
+    config = logic.load_config()
+    assert config.get("manual", "temp") == "4500"
+    st = os.stat(logic.config_path)
+    assert logic._config_cache[0] == (st.st_mtime_ns, st.st_size, st.st_ino)
+    assert logic.load_config() is config
+
+    # ta sama treść i rozmiar, inny czas modyfikacji - plik jest wczytywany ponownie
+    os.utime(logic.config_path, ns=(st.st_atime_ns, st.st_mtime_ns + 1_000_000))
+    assert logic.load_config() is not config
+
+    # plik podmieniony przez rename z przywróconym czasem: ten sam mtime i rozmiar, inny i-węzeł
+    config = logic.load_config()
+    st = os.stat(logic.config_path)
+    replacement = str(tmp_path / "conf" / "nowy")
+    _write(replacement, "[manual]\ntemp = 5500\n")
+    os.utime(replacement, ns=(st.st_atime_ns, st.st_mtime_ns))
+    os.replace(replacement, logic.config_path)
+    reloaded = logic.load_config()
+    assert reloaded is not config
+    assert reloaded.get("manual", "temp") == "5500"
+
+    os.unlink(logic.config_path)
+    assert logic.load_config() is None
+    assert logic._config_cache is None
+
+def test_save_config_replaces_file_atomically(logic, tmp_path):
+    assert logic.save_config(REDSHIFT_DATA, MANUAL_DATA, {1: {"temp": "5000"}}) == (True, None)
+    os.chmod(logic.config_path, 0o600)
+    inode = os.stat(logic.config_path).st_ino
+    assert logic.save_config(REDSHIFT_DATA, dict(MANUAL_DATA, temp="4000")) == (True, None)
+    st = os.stat(logic.config_path)
+    assert st.st_ino != inode  # nowy plik podstawiony przez rename
+    assert st.st_mode & 0o777 == 0o600
+    assert os.listdir(tmp_path / "conf") == ["redshift.conf"]
+    config = logic.load_config()
+    assert config.get("manual", "temp") == "4000"
+    assert not config.has_section("output-1")
+
+def test_failed_save_leaves_previous_file(logic, tmp_path, monkeypatch):
+    assert logic.save_config(REDSHIFT_DATA, MANUAL_DATA) == (True, None)
+    with open(logic.config_path, encoding="utf-8") as f:
+        before = f.read()
+
+    def failing_replace(src, dst):
+        raise OSError("Brak miejsca na urządzeniu")
+
+    monkeypatch.setattr(rc.os, "replace", failing_replace)
+    success, error = logic.save_config(REDSHIFT_DATA, dict(MANUAL_DATA, temp="3000"))
+    assert not success and "Brak miejsca" in error
+    with open(logic.config_path, encoding="utf-8") as f:
+        assert f.read() == before
+    assert os.listdir(tmp_path / "conf") == ["redshift.conf"]
+
+def test_unchanged_save_is_skipped(logic, monkeypatch):
+    assert logic.save_config(REDSHIFT_DATA, MANUAL_DATA) == (True, None)
+    key = logic._config_stat_key()
+
+    def no_write(*args, **kwargs):
+        raise AssertionError("niezmieniona konfiguracja nie powinna być zapisywana")
+
+    monkeypatch.setattr(rc.tempfile, "mkstemp", no_write)
+    assert logic.save_config(dict(REDSHIFT_DATA), dict(MANUAL_DATA)) == (True, None)
+    assert logic._config_stat_key() == key
+
+def _wait_glib(seconds):
+    context = rc.GLib.MainContext.default()
+    deadline = time.monotonic() + seconds
+    while time.monotonic() < deadline:
+        context.iteration(False)
+        time.sleep(0.005)
+
+def test_monitor_ignores_own_writes(logic, run_glib):
+    assert logic.save_config(REDSHIFT_DATA, MANUAL_DATA) == (True, None)
+    changes = []
+    logic.watch_config(changes.append)
+    try:
+        assert logic.save_config(REDSHIFT_DATA, dict(MANUAL_DATA, temp="4000")) == (True, None)
+        _wait_glib(0.5)
+        assert changes == []
+
+        # zmiana z zewnątrz (np. edytor) - callback dostaje nową konfigurację
+        def start(done):
+            logic._config_monitor.connect("changed", lambda *args: changes and done(changes[-1]))
+            _write(logic.config_path, "[manual]\ntemp = 3000\n")
+
+        config = run_glib(start, timeout=5)
+        assert config.get("manual", "temp") == "3000"
+    finally:
+        logic._config_monitor.cancel()
@@ -0,0 +1,104 @@
+# -*- coding: utf-8 -*-
+#
+#  test_daemon.py - Testy walidacji żądań demona (gniazdo Unix w katalogu tymczasowym)
+#
+#  Copyright (C) 2025  Wasz Informatyk
+#
+#  Ten program jest wolnym oprogramowaniem; możesz go rozprowadzać dalej i/lub
+#  modyfikować na warunkach Powszechnej Licencji Publicznej GNU, wydanej przez
+#  Fundację Wolnego Oprogramowania; według wersji 3 tej Licencji lub (według
+#  twojego wyboru) którejkolwiek późniejszej wersji.
+
+import json
+import socket
+import threading
+
+import pytest
+
+import redshift_control as rc
+
+@pytest.mark.parametrize("temp, bright, gamma", [
+    (None, 1.0, [1.0, 1.0, 1.0]),
+    ("abc", 1.0, [1.0, 1.0, 1.0]),
+    (999, 1.0, [1.0, 1.0, 1.0]),
+    (6500, None, [1.0, 1.0, 1.0]),
+    (6500, 1.5, [1.0, 1.0, 1.0]),
+    (6500, 1.0, None),
+    (6500, 1.0, [1.0, 1.0]),
+    (6500, 1.0, "1,1,1"),
+    (6500, 1.0, [1.0, None, 1.0]),
+    (6500, 1.0, {"r": 1.0}),
+])
+def test_validate_manual_params_rejects(temp, bright, gamma):
+    assert rc.RedshiftLogic.validate_manual_params(temp, bright, gamma)
+
+def test_validate_manual_params_accepts():
+    assert rc.RedshiftLogic.validate_manual_params(4500, 0.8, (1.0, 0.9, 0.8)) is None
+    assert rc.RedshiftLogic.validate_manual_params("4500", "0.8", ["1", "1", "1"]) is None
+
+@pytest.mark.parametrize("values", [
+    ("", "21", "6500", "4500", "1.0", "0.9"),
+    ("91", "21", "6500", "4500", "1.0", "0.9"),
+    ("52", "None", "6500", "4500", "1.0", "0.9"),
+    ("52", "21", "6500.5", "4500", "1.0", "0.9"),
+    ("52", "21", "6500", "4500", "1.0", "0"),
+])
+def test_validate_auto_params_rejects(values):
+    assert rc.RedshiftLogic.validate_auto_params(*values)
+
+def _exchange(socket_path, lines):
+    """
+    Wysyła kolejne linie jednym połączeniem i zwraca odpowiedzi (po jednej na linię).
+    """
+    replies = []
+    with socket.socket(socket.AF_UNIX, socket.SOCK_STREAM) as sock:
+        sock.settimeout(5)
+        sock.connect(socket_path)
+        reader = sock.makefile("rb")
+        for line in lines:
+            sock.sendall(line.encode("utf-8") + b"\n")
+            replies.append(json.loads(reader.readline()))
+    return replies
+
+@pytest.fixture
+def daemon(tmp_path, run_glib):
+    logic = rc.RedshiftLogic(config_path=str(tmp_path / "redshift.conf"), gamma_backend=None,
+                             state_path=str(tmp_path / "state.json"))
+    daemon = rc.ControllerDaemon(logic, socket_path=str(tmp_path / "daemon.sock"))
+    success, error = daemon.start()
+    assert success, error
+    yield daemon
+    daemon.stop()
+
+def test_daemon_replies_to_malformed_requests(daemon, run_glib):
+    requests = [
+        "to nie jest JSON",
+        "[1, 2]",
+        json.dumps({"cmd": "nieznane"}),
+        json.dumps({"cmd": "apply", "temp": None}),
+        json.dumps({"cmd": "apply", "gamma": [1.0, 1.0]}),
+        json.dumps({"cmd": "apply", "gamma": None}),
+        json.dumps({"cmd": "apply", "fade": None}),
+        json.dumps({"cmd": "auto", "lat": None, "lon": 21}),
+        json.dumps({"cmd": "outputs", "profiles": [1]}),
+        json.dumps({"cmd": "outputs", "profiles": {"0": [6500, None, [1, 1, 1]]}}),
+        json.dumps({"cmd": "status"}),
+    ]
+
+    def start(done):
+        def client():
+            try:
+                result = _exchange(daemon.socket_path, requests)
+            except Exception as e:
+                result = e
+            rc.GLib.idle_add(lambda: done(result) or False)
+        threading.Thread(target=client, daemon=True).start()
+
+    replies = run_glib(start)
+    assert not isinstance(replies, Exception), replies
+    *invalid, status = replies
+    assert all(reply["ok"] is False and reply["error"] for reply in invalid)
+    assert "Gamma" in invalid[4]["error"] and "Gamma" in invalid[5]["error"]
+    assert "Nieprawidłowe żądanie" in invalid[8]["error"]
+    # połączenie przetrwało błędne żądania
+    assert status["ok"] is True and "mode" in status["status"]
@@ -0,0 +1,96 @@
+# -*- coding: utf-8 -*-
+#
+#  test_dispatcher.py - Testy koalescencji żądań podglądu na żywo (CoalescingDispatcher)
+#
+#  Copyright (C) 2025  Wasz Informatyk
+#
+#  Ten program jest wolnym oprogramowaniem; możesz go rozprowadzać dalej i/lub
+#  modyfikować na warunkach Powszechnej Licencji Publicznej GNU, wydanej przez
+#  Fundację Wolnego Oprogramowania; według wersji 3 tej Licencji lub (według
+#  twojego wyboru) którejkolwiek późniejszej wersji.
+
+import time
+
+import pytest
+
+import redshift_control as rc
+
+class FakeApply:
+    """
+    Zamiast stosowania ustawień - zapisuje stany, a zakończenie wywołuje test (finish).
+    """
+    def __init__(self):
+        self.states = []
+        self.times = []
+        self._done = None
+
+    def __call__(self, state, done):
+        self.states.append(state)
+        self.times.append(time.monotonic())
+        self._done = done
+
+    def finish(self, success=True):
+        done, self._done = self._done, None
+        done(success)
+
+@pytest.fixture
+def fake_apply():
+    pytest.importorskip("gi")
+    return FakeApply()
+
+def test_superseded_states_are_dropped_while_in_flight(fake_apply):
+    dispatcher = rc.CoalescingDispatcher(fake_apply, min_interval=0)
+    dispatcher.request(1)
+    for state in (2, 3, 4):
+        dispatcher.request(state)
+    assert fake_apply.states == [1]
+    fake_apply.finish()
+    assert fake_apply.states == [1, 4]
+    fake_apply.finish()
+    assert dispatcher.last_applied == 4
+
+def test_state_equal_to_last_applied_is_skipped(fake_apply):
+    dispatcher = rc.CoalescingDispatcher(fake_apply, min_interval=0)
+    dispatcher.request(1)
+    fake_apply.finish()
+    dispatcher.request(1)
+    assert fake_apply.states == [1]
+    # powrót do wcześniejszego stanu po zastosowaniu innego nie jest pomijany
+    dispatcher.request(2)
+    dispatcher.request(1)
+    fake_apply.finish()
+    assert fake_apply.states == [1, 2, 1]
+
+def test_failed_apply_pumps_pending_and_allows_retry(fake_apply):
+    dispatcher = rc.CoalescingDispatcher(fake_apply, min_interval=0)
+    dispatcher.request(1)
+    dispatcher.request(2)
+    fake_apply.finish(False)
+    assert fake_apply.states == [1, 2]
+    fake_apply.finish(False)
+    assert dispatcher.last_applied is None
+    dispatcher.request(2)  # nieudany stan nie jest uznany za zastosowany
+    assert fake_apply.states == [1, 2, 2]
+    fake_apply.finish()
+    assert dispatcher.last_applied == 2
+
+def test_rate_cap_delays_next_apply(fake_apply, run_glib):
+    dispatcher = rc.CoalescingDispatcher(fake_apply, min_interval=0.2)
+    dispatcher.request(1)
+    fake_apply.finish()
+    dispatcher.request(2)
+    dispatcher.request(3)
+    assert fake_apply.states == [1]
+
+    def start(done):
+        fake_apply_call = fake_apply.__call__
+
+        def record(state, finish):
+            fake_apply_call(state, finish)
+            done(None)
+        dispatcher.apply_func = record
+
+    run_glib(start, timeout=2)
+    assert fake_apply.states == [1, 3]
+    assert fake_apply.times[1] - fake_apply.times[0] >= 0.19
+    dispatcher.cancel()
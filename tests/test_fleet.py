@@ -0,0 +1,76 @@
+# -*- coding: utf-8 -*-
+#
+#  test_fleet.py - Testy trybu floty (wiele ekranów X) z atrapą redshift
+#
+#  Copyright (C) 2025  Wasz Informatyk
+#
+#  Ten program jest wolnym oprogramowaniem; możesz go rozprowadzać dalej i/lub
+#  modyfikować na warunkach Powszechnej Licencji Publicznej GNU, wydanej przez
+#  Fundację Wolnego Oprogramowania; według wersji 3 tej Licencji lub (według
+#  twojego wyboru) którejkolwiek późniejszej wersji.
+
+import time
+
+import pytest
+
+import redshift_control as rc
+
+def test_expand_display_targets_lists_and_ranges():
+    assert rc.expand_display_targets(":0,:3, host:1") == [":0", ":3", "host:1"]
+    assert rc.expand_display_targets(":2-:4") == [":2", ":3", ":4"]
+    assert rc.expand_display_targets("host:0-2") == ["host:0", "host:1", "host:2"]
+    assert rc.expand_display_targets(":0,,") == [":0"]
+
+@pytest.mark.parametrize("spec", ["0", ":x", "host", ":1-:"])
+def test_expand_display_targets_rejects_invalid(spec):
+    with pytest.raises(ValueError):
+        rc.expand_display_targets(spec)
+
+def test_read_targets_file_skips_comments(tmp_path):
+    path = tmp_path / "targets"
+    path.write_text("# sala 1\n:0-:1\n\n:5  # projektor\n", encoding="utf-8")
+    assert rc.read_targets_file(str(path)) == [":0", ":1", ":5"]
+
+@pytest.mark.parametrize("argv", [
+    ["fleet", "--displays", ":0", "-t", "abc"],
+    ["fleet", "--displays", ":0", "-g", "a:b:c"],
+    ["fleet", "--displays", ":0", "-b", "5"],
+])
+def test_fleet_rejects_invalid_values_before_building_command(argv, capsys):
+    assert rc.main(argv) == 2
+    assert "powinna" in capsys.readouterr().err
+
+def test_fleet_requires_targets(capsys):
+    assert rc.main(["fleet"]) == 2
+    assert "nie podano" in capsys.readouterr().err
+
+def test_parallel_runner_collects_results(stub_redshift, run_glib):
+    jobs = {target: (["redshift", "-O", "4500"], {"DISPLAY": target}) for target in (":0", ":1", ":3")}
+    results = run_glib(lambda done: rc.ParallelRunner(max_parallel=2).run(jobs, done))
+    assert results[":0"] == (True, None)
+    assert results[":1"] == (True, None)
+    assert results[":3"][0] is False
+    assert "Cannot open display" in results[":3"][1]
+    assert sorted(stub_redshift.read_text().splitlines()) == [":0 -O 4500", ":1 -O 4500", ":3 -O 4500"]
+
+def test_parallel_runner_reports_spawn_failure(run_glib):
+    jobs = {"missing": (["/nonexistent/redshift"], None)}
+    results = run_glib(lambda done: rc.ParallelRunner().run(jobs, done), timeout=5)
+    success, error = results["missing"]
+    assert success is False and error
+
+def test_parallel_runner_timeout_frees_slot(stub_redshift, run_glib):
+    jobs = {target: (["redshift", "-x"], {"DISPLAY": target}) for target in (":7", ":0")}
+    start = time.monotonic()
+    results = run_glib(lambda done: rc.ParallelRunner(max_parallel=1, timeout=0.5).run(jobs, done))
+    assert results[":7"][0] is False and "limit" in results[":7"][1]
+    assert results[":0"] == (True, None)
+    assert time.monotonic() - start < 5
+
+def test_apply_fleet_sets_display_per_target(stub_redshift, run_glib, tmp_path):
+    logic = rc.RedshiftLogic(config_path=str(tmp_path / "redshift.conf"), gamma_backend=None,
+                             state_path=str(tmp_path / "state.json"))
+    cmd = logic.manual_command(4000, 0.8, [1.0, 1.0, 1.0])
+    results = run_glib(lambda done: logic.apply_fleet_async([":0", ":1"], cmd, done))
+    assert results == {":0": (True, None), ":1": (True, None)}
+    assert {line.split()[0] for line in stub_redshift.read_text().splitlines()} == {":0", ":1"}
@@ -0,0 +1,87 @@
+# -*- coding: utf-8 -*-
+#
+#  test_gamma.py - Testy silnika rampy gamma względem colorramp_fill z redshift
+#
+#  Copyright (C) 2025  Wasz Informatyk
+#
+#  Ten program jest wolnym oprogramowaniem; możesz go rozprowadzać dalej i/lub
+#  modyfikować na warunkach Powszechnej Licencji Publicznej GNU, wydanej przez
+#  Fundację Wolnego Oprogramowania; według wersji 3 tej Licencji lub (według
+#  twojego wyboru) którejkolwiek późniejszej wersji.
+
+import pytest
+
+import redshift_control as rc
+
+# Punkty bieli z tablicy blackbody_color w colorramp.c (redshift)
+REDSHIFT_WHITEPOINTS = {
+    1000: (1.0, 0.18172716, 0.0),
+    1100: (1.0, 0.25503671, 0.0),
+    1200: (1.0, 0.30942099, 0.0),
+    2000: (1.0, 0.54360078, 0.08679949),
+    3000: (1.0, 0.71976951, 0.42860152),
+}
+
+@pytest.fixture(params=["python", "numpy"])
+def ramps_impl(request, monkeypatch):
+    """
+    Oblicza rampy obiema ścieżkami: czysty Python (array) i NumPy (gdy jest zainstalowany).
+    """
+    if request.param == "numpy":
+        pytest.importorskip("numpy")
+    else:
+        monkeypatch.setattr(rc, "_numpy", lambda: None)
+    rc._cached_ramps.cache_clear()
+    yield request.param
+    rc._cached_ramps.cache_clear()
+
+def colorramp_fill(size, white, brightness, gamma):
+    """
+    Wzór colorramp_fill z redshift: (i / rozmiar * jasność * biel) ** (1 / gamma) * (UINT16_MAX + 1).
+    """
+    return [[int((i / size * brightness * w) ** (1.0 / g) * 65536) for i in range(size)]
+            for w, g in zip(white, gamma)]
+
+@pytest.mark.parametrize("temp", sorted(REDSHIFT_WHITEPOINTS))
+def test_whitepoint_matches_redshift_table(temp):
+    assert rc.whitepoint(temp) == pytest.approx(REDSHIFT_WHITEPOINTS[temp], abs=2e-4)
+
+def test_whitepoint_interpolates_and_clamps():
+    middle = rc.whitepoint(1050)
+    assert middle[1] == pytest.approx((rc.whitepoint(1000)[1] + rc.whitepoint(1100)[1]) / 2)
+    assert rc.whitepoint(500) == rc.whitepoint(1000)
+    assert rc.whitepoint(30000) == rc.whitepoint(25000)
+
+@pytest.mark.parametrize("temp, brightness, gamma, size", [
+    (3000, 0.8, (1.0, 1.0, 1.0), 256),
+    (2000, 1.0, (0.8, 1.0, 1.2), 256),
+    (1000, 0.5, (1.0, 1.0, 1.0), 1024),
+    (3000, 1.0, (2.0, 1.5, 0.6), 2048),
+])
+def test_ramps_match_colorramp_fill(ramps_impl, temp, brightness, gamma, size):
+    expected = colorramp_fill(size, REDSHIFT_WHITEPOINTS[temp], brightness, gamma)
+    ramps = rc.compute_gamma_ramps(temp, brightness, gamma, size)
+    for channel, reference in zip(ramps, expected):
+        assert len(channel) == size
+        # różnica tablic punktów bieli do 2e-4 to najwyżej kilkanaście jednostek 16-bitowych
+        assert max(abs(int(a) - b) for a, b in zip(channel, reference)) <= 16
+
+def test_known_ramp_value(ramps_impl):
+    red, _green, _blue = rc.compute_gamma_ramps(3000, 0.8, (1.0, 1.0, 1.0))
+    assert int(red[255]) == 52224
+    assert int(red[0]) == 0
+
+def test_neutral_ramps_are_identity(ramps_impl):
+    for size in (256, 1024):
+        ramps = rc.compute_gamma_ramps(None, 1.0, (1.0, 1.0, 1.0), size)
+        identity = [i * 65536 // size for i in range(size)]
+        assert [list(map(int, ramp)) for ramp in ramps] == [identity] * 3
+
+def test_reset_writes_identity_ramps(ramps_impl, tmp_path):
+    backend = rc.NullGammaBackend()
+    logic = rc.RedshiftLogic(config_path=str(tmp_path / "redshift.conf"), gamma_backend=backend,
+                             state_path=str(tmp_path / "state.json"))
+    assert logic.apply_manual(3500, 0.7, (1.0, 1.0, 1.0)) == (True, None)
+    assert logic.reset() == (True, None)
+    assert logic.mode == "off"
+    assert [list(map(int, ramp)) for ramp in backend.ramps[0]] == [[i * 256 for i in range(256)]] * 3
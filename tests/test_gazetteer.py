@@ -0,0 +1,96 @@
+# -*- coding: utf-8 -*-
+#
+#  test_gazetteer.py - Testy gazetera miejscowości (kompilacja indeksu, wyszukiwanie)
+#
+#  Copyright (C) 2025  Wasz Informatyk
+#
+#  Ten program jest wolnym oprogramowaniem; możesz go rozprowadzać dalej i/lub
+#  modyfikować na warunkach Powszechnej Licencji Publicznej GNU, wydanej przez
+#  Fundację Wolnego Oprogramowania; według wersji 3 tej Licencji lub (według
+#  twojego wyboru) którejkolwiek późniejszej wersji.
+
+import pytest
+
+import redshift_control as rc
+
+PLACES = [
+    # nazwa, lat, lon, kraj, populacja
+    ("Łódź", 51.7592, 19.4560, "PL", 679941),
+    ("Lodzia", 50.0, 20.0, "PL", 900000),
+    ("Warszawa", 52.2298, 21.0118, "PL", 1702139),
+    ("Springfield", 39.8017, -89.6437, "US", 114394),
+    ("Springfield", 42.1015, -72.5898, "US", 155929),
+    ("Szczecin", 53.4289, 14.5530, "PL", 407811),
+    ("Suva", -18.1416, 178.4415, "FJ", 77366),
+    ("Apia", -13.8333, -171.7667, "WS", 40407),
+]
+
+def _write_geonames(path, places):
+    with open(path, "w", encoding="utf-8") as f:
+        f.write("# komentarz\n")
+        for number, (name, lat, lon, country, population) in enumerate(places):
+            cols = [str(number), name, "", "", str(lat), str(lon), "P", "PPL", country,
+                    "", "", "", "", "", str(population)]
+            f.write("\t".join(cols) + "\n")
+
+@pytest.fixture
+def gazetteer(tmp_path):
+    source = tmp_path / "places.txt"
+    # wiele małych miejscowości alfabetycznie przed dużymi - kolejność musi wynikać z populacji
+    small = [(f"Saa{i:05d}", 10.0 + i % 50, 10.0, "XX", i % 100) for i in range(6000)]
+    _write_geonames(source, PLACES + small)
+    index = tmp_path / "gazetteer.idx"
+    assert rc.compile_gazetteer(str(source), str(index)) == len(PLACES) + len(small)
+    gazetteer = rc.Gazetteer(str(index))
+    yield gazetteer
+    gazetteer.close()
+
+def test_normalize_place_name_strips_diacritics():
+    assert rc.normalize_place_name("Łódź") == "lodz"
+    assert rc.normalize_place_name("Ærøskøbing") == "aeroskobing"
+
+def test_compile_gazetteer_min_population(tmp_path):
+    source = tmp_path / "places.txt"
+    _write_geonames(source, PLACES)
+    assert rc.compile_gazetteer(str(source), str(tmp_path / "g.idx"), min_population=150000) == 5
+
+def test_search_without_diacritics_exact_match_first(gazetteer):
+    assert [r[0] for r in gazetteer.search("lodz", limit=1)] == ["Łódź"]
+    assert [r[0] for r in gazetteer.search("Łódź ")] == ["Łódź", "Lodzia"]
+    assert [r[0] for r in gazetteer.search("lodzi")] == ["Lodzia"]
+
+def test_search_orders_whole_prefix_range_by_population(gazetteer):
+    found = gazetteer.search("s", limit=3)
+    assert [(r[0], r[4]) for r in found] == [
+        ("Szczecin", 407811), ("Springfield", 155929), ("Springfield", 114394)
+    ]
+    assert gazetteer.search("zzz") == []
+    assert gazetteer.search("  ") == []
+
+def test_nearest_within_radius(gazetteer):
+    (name, _lat, _lon, country, _population), distance = gazetteer.nearest(52.0, 21.0)
+    assert (name, country) == ("Warszawa", "PL")
+    assert 20 < distance < 30
+
+def test_nearest_across_antimeridian(gazetteer):
+    record, distance = gazetteer.nearest(-17.0, -179.5)
+    assert record[0] == "Suva" and distance < 300
+    record, _distance = gazetteer.nearest(-13.9, -171.0)
+    assert record[0] == "Apia"
+
+def test_nearest_far_from_any_place_is_none(gazetteer):
+    assert gazetteer.nearest(-40.0, -130.0) is None
+    assert gazetteer.nearest(-89.9, 0.0) is None
+
+def test_open_gazetteer_falls_back_to_builtin(tmp_path):
+    assert isinstance(rc.open_gazetteer(str(tmp_path / "brak.idx")), rc.BuiltinGazetteer)
+    invalid = tmp_path / "stary.idx"
+    invalid.write_bytes(b"RSGAZ\x00\x00\x01" + bytes(rc.GAZETTEER_HEADER.size))
+    assert isinstance(rc.open_gazetteer(str(invalid)), rc.BuiltinGazetteer)
+
+def test_builtin_gazetteer_same_interface():
+    builtin = rc.BuiltinGazetteer()
+    assert builtin.search("krak")[0][0] == "Kraków"
+    record, distance = builtin.nearest(50.06, 19.94)
+    assert record[0] == "Kraków" and distance < 5
+    assert builtin.nearest(0.0, 0.0) is None
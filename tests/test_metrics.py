@@ -0,0 +1,73 @@
+# -*- coding: utf-8 -*-
+#
+#  test_metrics.py - Testy pomiarów opóźnień (percentyle, bufor cykliczny, histogram)
+#
+#  Copyright (C) 2025  Wasz Informatyk
+#
+#  Ten program jest wolnym oprogramowaniem; możesz go rozprowadzać dalej i/lub
+#  modyfikować na warunkach Powszechnej Licencji Publicznej GNU, wydanej przez
+#  Fundację Wolnego Oprogramowania; według wersji 3 tej Licencji lub (według
+#  twojego wyboru) którejkolwiek późniejszej wersji.
+
+import json
+
+import pytest
+
+import redshift_control as rc
+
+def _metrics(kind, samples, capacity=512):
+    metrics = rc.LatencyMetrics(capacity)
+    for i, duration in enumerate(samples):
+        metrics.record(kind, 1000.0 + i, duration)
+    return metrics
+
+def test_percentiles_use_nearest_rank():
+    # 1..100 ms w odwróconej kolejności - podsumowanie sortuje próbki
+    summary = _metrics("redshift", [float(v) for v in range(100, 0, -1)]).summary()["redshift"]
+    assert summary["n"] == 100
+    assert (summary["p50_ms"], summary["p95_ms"], summary["p99_ms"], summary["max_ms"]) == (50.0, 95.0, 99.0, 100.0)
+
+def test_percentiles_of_few_samples():
+    summary = _metrics("gamma", [3.0, 1.0, 2.0]).summary()["gamma"]
+    assert (summary["p50_ms"], summary["p95_ms"], summary["p99_ms"]) == (2.0, 3.0, 3.0)
+    single = _metrics("gamma", [7.0]).summary()["gamma"]
+    assert single["p50_ms"] == single["p99_ms"] == single["max_ms"] == 7.0
+
+def test_ring_buffer_keeps_newest_records():
+    metrics = _metrics("status", [float(v) for v in range(10)], capacity=4)
+    assert len(metrics.records) == 4
+    assert [rec["duration_ms"] for rec in metrics.records] == [6.0, 7.0, 8.0, 9.0]
+    summary = metrics.summary()["status"]
+    assert summary["n"] == 4 and summary["p50_ms"] == 7.0
+    metrics.record("stop", 2000.0, 1.5)
+    assert list(metrics.summary()) == ["status", "stop"]
+    assert metrics.summary()["status"]["n"] == 3
+
+def test_histogram_buckets():
+    samples = [0.5, 1.0, 1.9, 4.99, 10.0, 150.0, 999.0, 5000.0, 12000.0]
+    histogram = _metrics("redshift", samples).summary()["redshift"]["histogram"]
+    assert histogram == {"<1": 1, "<2": 2, "<5": 1, "<20": 1, "<200": 1, "<1000": 1, ">=5000": 2}
+    assert sum(histogram.values()) == len(samples)
+
+def test_record_fields_and_json_dump(tmp_path):
+    metrics = rc.LatencyMetrics()
+    metrics.record("redshift", 1000.0, 250.0, returncode=1, stderr_bytes=20, cmd=("redshift", "-x"))
+    rec = metrics.records[0]
+    assert rec["exited"] == pytest.approx(1000.25)
+    assert rec["cmd"] == ["redshift", "-x"] and rec["returncode"] == 1
+    path = tmp_path / "metryki" / "latency.json"
+    assert metrics.dump(str(path)) == (True, None)
+    data = json.loads(path.read_text(encoding="utf-8"))
+    assert data["summary"]["redshift"]["n"] == 1 and len(data["records"]) == 1
+
+def test_measure_and_wrap_handler():
+    metrics = rc.LatencyMetrics()
+    finish = metrics.measure("spawn", ["redshift"])
+    finish(0)
+    handler = metrics.wrap_handler("kliknięcie", lambda value: value * 2)
+    assert handler(21) == 42
+    assert handler.__name__ == "<lambda>"
+    kinds = [rec["kind"] for rec in metrics.records]
+    assert kinds == ["spawn", "handler:kliknięcie"]
+    assert all(rec["duration_ms"] >= 0 for rec in metrics.records)
+    assert metrics.records[0]["returncode"] == 0
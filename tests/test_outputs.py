@@ -0,0 +1,96 @@
+# -*- coding: utf-8 -*-
+#
+#  test_outputs.py - Testy ustawień per wyjście: silnik w procesie i równoległe polecenia redshift
+#
+#  Copyright (C) 2025  Wasz Informatyk
+#
+#  Ten program jest wolnym oprogramowaniem; możesz go rozprowadzać dalej i/lub
+#  modyfikować na warunkach Powszechnej Licencji Publicznej GNU, wydanej przez
+#  Fundację Wolnego Oprogramowania; według wersji 3 tej Licencji lub (według
+#  twojego wyboru) którejkolwiek późniejszej wersji.
+
+import time
+
+import pytest
+
+import redshift_control as rc
+
+PROFILES = {
+    0: (6500, 1.0, (1.0, 1.0, 1.0)),
+    1: (4500, 0.8, (1.0, 0.9, 0.9)),
+    2: (3000, 0.6, (1.0, 1.0, 1.0)),
+}
+
+class FailingBackend(rc.NullGammaBackend):
+    """
+    Backend, którego jeden CRTC odrzuca rampy (np. odłączony monitor).
+    """
+    def __init__(self, crtcs, failing):
+        super().__init__(crtcs)
+        self.failing = failing
+
+    def set_ramps(self, crtc, red, green, blue):
+        if crtc == self.failing:
+            raise rc.GammaBackendError(f"BadMatch dla CRTC {crtc}")
+        super().set_ramps(crtc, red, green, blue)
+
+def _logic(tmp_path, backend):
+    return rc.RedshiftLogic(config_path=str(tmp_path / "redshift.conf"), gamma_backend=backend,
+                            state_path=str(tmp_path / "state.json"))
+
+def _apply(logic, profiles, max_parallel=4):
+    results = []
+    logic.apply_outputs_async(profiles, results.append, max_parallel)
+    assert len(results) == 1  # silnik w procesie odpowiada od razu
+    return results[0]
+
+def test_in_process_outputs_get_own_ramps(tmp_path):
+    backend = rc.NullGammaBackend(crtcs=((10, 256), (11, 1024), (12, 256)))
+    logic = _logic(tmp_path, backend)
+    results = _apply(logic, PROFILES)
+    assert results == {0: (True, None), 1: (True, None), 2: (True, None)}
+    for index, crtc in enumerate((10, 11, 12)):
+        size = 1024 if crtc == 11 else 256
+        assert backend.ramps[crtc] == rc.compute_gamma_ramps(*PROFILES[index], size)
+    assert logic.mode == "manual"
+    assert logic.output_params == PROFILES
+
+def test_in_process_failure_is_reported_per_output(tmp_path):
+    backend = FailingBackend(((10, 256), (11, 256), (12, 256)), failing=11)
+    logic = _logic(tmp_path, backend)
+    results = _apply(logic, PROFILES)
+    assert results[0] == (True, None) and results[2] == (True, None)
+    assert results[1][0] is False and "CRTC 11" in results[1][1]
+    assert sorted(backend.ramps) == [10, 12]
+    # częściowy sukces nie zmienia zapamiętanego stanu
+    assert logic.mode == "off" and logic.output_params is None
+
+def test_redshift_commands_run_per_output(tmp_path, stub_redshift, run_glib, monkeypatch):
+    monkeypatch.setenv("DISPLAY", ":0")
+    logic = _logic(tmp_path, None)
+    results = run_glib(lambda done: logic.apply_outputs_async(PROFILES, done, max_parallel=2))
+    assert results == {0: (True, None), 1: (True, None), 2: (True, None)}
+    lines = sorted(stub_redshift.read_text().splitlines())
+    assert lines == sorted(
+        ":0 " + " ".join(logic.manual_command(*profile, crtc=crtc)[1:]) for crtc, profile in PROFILES.items()
+    )
+    assert logic.mode == "manual" and logic.output_params == PROFILES
+
+def test_spawn_failure_does_not_block_other_outputs(tmp_path, stub_redshift, run_glib, monkeypatch):
+    monkeypatch.setenv("DISPLAY", ":0")
+    logic = _logic(tmp_path, None)
+    manual_command = logic.manual_command
+
+    def command(temp, bright, gamma, crtc=None):
+        cmd = manual_command(temp, bright, gamma, crtc)
+        return ["/nonexistent/redshift"] + cmd[1:] if crtc == 1 else cmd
+
+    monkeypatch.setattr(logic, "manual_command", command)
+    start = time.monotonic()
+    # jedno polecenie naraz: po błędzie uruchomienia kolejka musi ruszyć dalej
+    results = run_glib(lambda done: logic.apply_outputs_async(PROFILES, done, max_parallel=1), timeout=5)
+    assert time.monotonic() - start < 5
+    assert results[0] == (True, None) and results[2] == (True, None)
+    assert results[1][0] is False and results[1][1]
+    assert len(stub_redshift.read_text().splitlines()) == 2
+    assert logic.mode == "off"
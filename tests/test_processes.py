@@ -0,0 +1,114 @@
+# -*- coding: utf-8 -*-
+#
+#  test_processes.py - Testy parsowania argv redshift i skanowania /proc (atrapa w katalogu tymczasowym)
+#
+#  Copyright (C) 2025  Wasz Informatyk
+#
+#  Ten program jest wolnym oprogramowaniem; możesz go rozprowadzać dalej i/lub
+#  modyfikować na warunkach Powszechnej Licencji Publicznej GNU, wydanej przez
+#  Fundację Wolnego Oprogramowania; według wersji 3 tej Licencji lub (według
+#  twojego wyboru) którejkolwiek późniejszej wersji.
+
+import pytest
+
+import redshift_control as rc
+
+@pytest.mark.parametrize("argv, mode, location, temps, brightness", [
+    (["redshift", "-O", "4500"], "manual", None, None, None),
+    (["redshift", "-O4500", "-b", "0.8"], "manual", None, None, None),
+    (["redshift", "-l", "52.23:21.01", "-t", "6500:3500", "-b", "1.0:0.8"],
+     "auto", ("52.23", "21.01"), ("6500", "3500"), ("1.0", "0.8")),
+    (["redshift", "-l52.23:21.01", "-t6500:3500", "-b1.0:0.8", "-g", "0.9:1:1"],
+     "auto", ("52.23", "21.01"), ("6500", "3500"), ("1.0", "0.8")),
+    (["redshift", "-x"], "reset", None, None, None),
+    (["redshift", "-pl", "52:21"], "print", None, None, None),
+    (["redshift", "-l", "manual"], "auto", None, None, None),
+    (["redshift", "-l"], "auto", None, None, None),
+])
+def test_parse_redshift_argv(argv, mode, location, temps, brightness):
+    record = rc.parse_redshift_argv(42, argv)
+    assert record == rc.RedshiftProcess(42, tuple(argv), mode, location, temps, brightness)
+
+def test_value_option_consumes_next_argument():
+    # "-g" bierze następny argument - "-x" jest jego wartością, nie flagą resetu
+    assert rc.parse_redshift_argv(1, ["redshift", "-g", "-x", "-O", "5000"]).mode == "manual"
+    assert rc.parse_redshift_argv(1, ["redshift", "-m", "randr", "-x"]).mode == "reset"
+
+class FakeProc:
+    """
+    Katalog w układzie /proc: dla każdego PID pliki stat, comm i cmdline.
+    """
+    def __init__(self, root):
+        self.root = root
+
+    def add(self, pid, argv, comm="redshift", start=1000):
+        directory = self.root / str(pid)
+        directory.mkdir(exist_ok=True)
+        # pole 22 (czas startu) to 20. pole po nazwie procesu
+        fields = ["S", "1"] + ["0"] * 17 + [str(start)] + ["0"] * 10
+        (directory / "stat").write_text(f"{pid} ({comm}) {' '.join(fields)}\n")
+        (directory / "comm").write_text(comm + "\n")
+        (directory / "cmdline").write_bytes(b"".join(a.encode() + b"\0" for a in argv))
+
+    def remove(self, pid):
+        for name in ("stat", "comm", "cmdline"):
+            (self.root / str(pid) / name).unlink()
+        (self.root / str(pid)).rmdir()
+
+@pytest.fixture
+def fake_proc(tmp_path):
+    return FakeProc(tmp_path)
+
+def test_scan_finds_redshift_processes(fake_proc):
+    fake_proc.add(100, ["redshift", "-O", "4500"])
+    fake_proc.add(101, ["/bin/sh", "/home/u/bin/redshift", "-l", "52:21"])  # skrypt
+    fake_proc.add(102, ["bash"], comm="bash")
+    fake_proc.add(103, ["redshift-gtk"], comm="redshift")  # comm obcięty, inny program
+    monitor = rc.ProcessStatusMonitor(proc_root=str(fake_proc.root))
+    found = monitor.scan()
+    assert sorted(found) == [100, 101]
+    assert found[100].mode == "manual"
+    assert found[101].argv == ("/home/u/bin/redshift", "-l", "52:21")
+    assert found[101].location == ("52", "21")
+
+def test_scan_caches_by_start_time(fake_proc, monkeypatch):
+    fake_proc.add(100, ["redshift", "-O", "4500"])
+    monitor = rc.ProcessStatusMonitor(proc_root=str(fake_proc.root))
+    assert monitor.scan()[100].mode == "manual"
+    parsed = []
+    monkeypatch.setattr(rc, "parse_redshift_argv",
+                        lambda pid, argv: parsed.append(pid) or rc.RedshiftProcess(pid, tuple(argv), "auto",
+                                                                                    None, None, None))
+    # ten sam proces (ten sam czas startu) - argv nie jest parsowany ponownie
+    assert monitor.scan()[100].mode == "manual"
+    assert parsed == []
+    # PID ponownie użyty przez inny proces (inny czas startu) nie jest brany za redshift
+    fake_proc.add(100, ["bash"], comm="bash", start=2000)
+    assert monitor.scan() == {}
+    # i odwrotnie: nowy redshift pod starym PID-em jest parsowany od nowa
+    fake_proc.add(100, ["redshift", "-l", "52:21"], start=3000)
+    assert monitor.scan()[100].mode == "auto"
+    assert parsed == [100]
+
+def test_scan_drops_exited_processes(fake_proc):
+    fake_proc.add(100, ["redshift", "-O", "4500"])
+    fake_proc.add(101, ["redshift", "-x"])
+    monitor = rc.ProcessStatusMonitor(proc_root=str(fake_proc.root))
+    assert sorted(monitor.scan()) == [100, 101]
+    fake_proc.remove(100)
+    assert sorted(monitor.scan()) == [101]
+    assert [key[0] for key in monitor._cache] == [101]
+
+def test_refresh_reports_changes(fake_proc):
+    pytest.importorskip("gi")
+    fake_proc.add(100, ["redshift", "-O", "4500"])
+    changes = []
+    metrics = rc.LatencyMetrics()
+    monitor = rc.ProcessStatusMonitor(proc_root=str(fake_proc.root), on_change=changes.append, metrics=metrics)
+    try:
+        monitor.refresh()
+        assert [sorted(c) for c in changes] == [[100]]
+        assert metrics.summary()["status"]["n"] == 1
+    finally:
+        for pid in list(monitor._watches):
+            monitor._unwatch(pid)
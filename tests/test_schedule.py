@@ -0,0 +1,89 @@
+# -*- coding: utf-8 -*-
+#
+#  test_schedule.py - Testy harmonogramu presetów (dni tygodnia, najbliższe przełączenia)
+#
+#  Copyright (C) 2025  Wasz Informatyk
+#
+#  Ten program jest wolnym oprogramowaniem; możesz go rozprowadzać dalej i/lub
+#  modyfikować na warunkach Powszechnej Licencji Publicznej GNU, wydanej przez
+#  Fundację Wolnego Oprogramowania; według wersji 3 tej Licencji lub (według
+#  twojego wyboru) którejkolwiek późniejszej wersji.
+
+import configparser
+import datetime
+
+import pytest
+
+import redshift_control as rc
+
+@pytest.mark.parametrize("spec, days", [
+    ("*", set(range(7))),
+    ("", set(range(7))),
+    ("mon-fri", {0, 1, 2, 3, 4}),
+    ("sat,sun", {5, 6}),
+    ("pn-pt", {0, 1, 2, 3, 4}),
+    ("fri-mon", {4, 5, 6, 0}),
+    (" Wed , śr ", {2}),
+])
+def test_parse_weekdays(spec, days):
+    assert rc.parse_weekdays(spec) == frozenset(days)
+
+@pytest.mark.parametrize("spec", ["mon-", "-fri", "mon-tue-wed", "mon,", "monday", "1-5"])
+def test_parse_weekdays_rejects_invalid(spec):
+    with pytest.raises(KeyError):
+        rc.parse_weekdays(spec)
+
+@pytest.mark.parametrize("spec", ["*", "mon-fri", "sat-sun", "mon,wed-thu,sun"])
+def test_format_weekdays_round_trip(spec):
+    assert rc.format_weekdays(rc.parse_weekdays(spec)) == spec
+
+def test_next_occurrence_skips_excluded_days():
+    entry = rc.ScheduleEntry(datetime.time(7, 30), rc.parse_weekdays("mon-fri"), "praca")
+    friday = datetime.datetime(2024, 5, 10, 8, 0)
+    assert rc.next_occurrence(entry, friday) == datetime.datetime(2024, 5, 13, 7, 30)
+    assert rc.next_occurrence(entry, datetime.datetime(2024, 5, 13, 7, 0)) == datetime.datetime(2024, 5, 13, 7, 30)
+
+def test_next_occurrence_is_strictly_later():
+    entry = rc.ScheduleEntry(datetime.time(22, 0), rc.ALL_WEEKDAYS, "noc")
+    moment = datetime.datetime(2024, 5, 10, 22, 0)
+    assert rc.next_occurrence(entry, moment) == datetime.datetime(2024, 5, 11, 22, 0)
+    assert rc.previous_occurrence(entry, moment) == moment
+
+def test_next_occurrence_without_days():
+    entry = rc.ScheduleEntry(datetime.time(7, 30), frozenset(), "praca")
+    assert rc.next_occurrence(entry, datetime.datetime(2024, 5, 10)) is None
+
+def test_schedule_from_config_skips_invalid_sections(capsys):
+    config = configparser.ConfigParser()
+    config.read_dict({
+        "schedule-2": {"time": "22:00", "days": "*", "preset": "noc"},
+        "schedule-1": {"time": "07:30", "days": "mon-fri", "preset": "praca"},
+        "schedule-3": {"time": "08:00", "days": "mon-", "preset": "praca"},
+    })
+    entries = rc.RedshiftLogic.schedule_from_config(config)
+    assert [entry.preset for entry in entries] == ["praca", "noc"]
+    assert "[schedule-3]" in capsys.readouterr().out
+
+def test_scheduler_start_does_not_apply_current_preset():
+    pytest.importorskip("gi")
+    now = datetime.datetime.now()
+    entries = [
+        rc.ScheduleEntry((now - datetime.timedelta(hours=1)).time(), rc.ALL_WEEKDAYS, "dzien"),
+        rc.ScheduleEntry((now + datetime.timedelta(hours=1)).time(), rc.ALL_WEEKDAYS, "noc"),
+    ]
+    switched = []
+    scheduler = rc.ProfileScheduler(entries, lambda entry: switched.append(entry.preset))
+    scheduler.start()
+    try:
+        assert switched == []
+        assert scheduler.active is entries[0]
+        assert [entry.preset for _moment, entry in scheduler.upcoming(2)] == ["noc", "dzien"]
+        # wybudzenie bez minięcia granicy - bez przełączenia
+        scheduler.recompute(apply_current=True)
+        assert switched == []
+        # wybudzenie po granicy przełączenia
+        scheduler.active = entries[1]
+        scheduler.recompute(apply_current=True)
+        assert switched == ["dzien"]
+    finally:
+        scheduler.stop()
@@ -0,0 +1,102 @@
+# -*- coding: utf-8 -*-
+#
+#  test_snapshot.py - Testy migawki stanu: zapis, odczyt, odrzucanie uszkodzonych plików
+#
+#  Copyright (C) 2025  Wasz Informatyk
+#
+#  Ten program jest wolnym oprogramowaniem; możesz go rozprowadzać dalej i/lub
+#  modyfikować na warunkach Powszechnej Licencji Publicznej GNU, wydanej przez
+#  Fundację Wolnego Oprogramowania; według wersji 3 tej Licencji lub (według
+#  twojego wyboru) którejkolwiek późniejszej wersji.
+
+import json
+import os
+
+import pytest
+
+import redshift_control as rc
+
+FORM = {"temp": 4500, "brightness": 0.8, "city": "Kraków"}
+
+def _logic(tmp_path):
+    return rc.RedshiftLogic(config_path=str(tmp_path / "redshift.conf"), gamma_backend=rc.NullGammaBackend(),
+                            state_path=str(tmp_path / "stan" / "state.json"))
+
+def test_round_trip(tmp_path):
+    logic = _logic(tmp_path)
+    logic.form_state = FORM
+    # zastosowanie ustawień poza pętlą GLib zapisuje migawkę od razu
+    assert logic.apply_manual(4500, 0.8, (1.0, 0.9, 0.9)) == (True, None)
+    snapshot = rc.read_state_snapshot(logic.state_path)
+    assert snapshot == dict(json.loads(json.dumps(logic.state_snapshot())), time=snapshot["time"])
+    assert snapshot["version"] == rc.STATE_SNAPSHOT_VERSION
+    assert snapshot["mode"] == "manual" and snapshot["form"] == FORM
+
+    restored = _logic(tmp_path)
+    restored.restore_state_snapshot(snapshot)
+    assert restored.mode == "manual"
+    assert restored.manual_params == (4500, 0.8, (1.0, 0.9, 0.9))
+    assert restored.output_params is None and restored.auto_params is None
+
+def test_round_trip_of_outputs_and_auto(tmp_path):
+    logic = _logic(tmp_path)
+    profiles = {0: (5000, 0.9, (1.0, 1.0, 1.0))}
+    logic.apply_outputs_async(profiles)
+    restored = _logic(tmp_path)
+    restored.restore_state_snapshot(rc.read_state_snapshot(logic.state_path))
+    assert restored.mode == "manual" and restored.output_params == profiles
+
+    logic.mode, logic.auto_params = "auto", (52.23, 21.01, 6500, 3500, 1.0, 0.8)
+    assert logic.write_state_snapshot() == (True, None)
+    restored.restore_state_snapshot(rc.read_state_snapshot(logic.state_path))
+    assert restored.mode == "auto" and restored.auto_params == logic.auto_params
+
+@pytest.mark.parametrize("content", [
+    b"",
+    b"{\"version\": 2, \"mode\": ",  # ucięty zapis
+    b"\xff\xfe nie JSON",
+    b"[2, \"manual\"]",
+    json.dumps({"version": rc.STATE_SNAPSHOT_VERSION - 1, "mode": "manual"}).encode(),
+    json.dumps({"mode": "manual"}).encode(),
+])
+def test_corrupt_or_foreign_snapshot_is_rejected(tmp_path, content):
+    path = tmp_path / "state.json"
+    path.write_bytes(content)
+    assert rc.read_state_snapshot(str(path)) is None
+
+def test_missing_snapshot(tmp_path):
+    assert rc.read_state_snapshot(str(tmp_path / "brak.json")) is None
+
+def test_form_only_keeps_daemon_state(tmp_path):
+    daemon = _logic(tmp_path)
+    window = _logic(tmp_path)
+    window.form_state = FORM
+    # bez migawki właściciela okno niczego nie zapisuje
+    assert window.write_state_snapshot(form_only=True) == (True, None)
+    assert not os.path.exists(window.state_path)
+
+    assert daemon.apply_manual(3500, 0.7, (1.0, 1.0, 1.0)) == (True, None)
+    assert window.write_state_snapshot(form_only=True) == (True, None)
+    snapshot = rc.read_state_snapshot(window.state_path)
+    assert snapshot["mode"] == "manual" and snapshot["manual"] == [3500, 0.7, [1.0, 1.0, 1.0]]
+    assert snapshot["form"] == FORM
+
+    # kolejny zapis demona (bez pól okna) zachowuje pola zapisane przez okno
+    assert daemon.reset() == (True, None)
+    snapshot = rc.read_state_snapshot(daemon.state_path)
+    assert snapshot["mode"] == "off" and snapshot["form"] == FORM
+
+def test_unchanged_snapshot_is_not_rewritten(tmp_path, monkeypatch):
+    logic = _logic(tmp_path)
+    assert logic.apply_manual(4500, 0.8, (1.0, 1.0, 1.0)) == (True, None)
+    inode = os.stat(logic.state_path).st_ino
+    # sam upływ czasu nie jest zmianą stanu
+    now = rc.time.time()
+    monkeypatch.setattr(rc.time, "time", lambda: now + 3600)
+    assert logic.write_state_snapshot() == (True, None)
+    assert os.stat(logic.state_path).st_ino == inode
+
+    logic.form_state = FORM
+    assert logic.write_state_snapshot() == (True, None)
+    assert os.stat(logic.state_path).st_ino != inode
+    assert os.listdir(os.path.dirname(logic.state_path)) == ["state.json"]
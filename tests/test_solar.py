@@ -0,0 +1,111 @@
+# -*- coding: utf-8 -*-
+#
+#  test_solar.py - Testy wysokości słońca i krzywej przejścia dzień/noc
+#
+#  Copyright (C) 2025  Wasz Informatyk
+#
+#  Ten program jest wolnym oprogramowaniem; możesz go rozprowadzać dalej i/lub
+#  modyfikować na warunkach Powszechnej Licencji Publicznej GNU, wydanej przez
+#  Fundację Wolnego Oprogramowania; według wersji 3 tej Licencji lub (według
+#  twojego wyboru) którejkolwiek późniejszej wersji.
+
+import datetime
+
+import pytest
+
+import redshift_control as rc
+
+def _utc(*args):
+    return datetime.datetime(*args, tzinfo=datetime.timezone.utc).timestamp()
+
+def _max_elevation(date, lat, lon):
+    start = _utc(date.year, date.month, date.day)
+    return max(rc.solar_elevation(start + 60.0 * i, lat, lon) for i in range(rc.MINUTES_PER_DAY))
+
+def test_noon_elevation_at_solstice_in_warsaw():
+    # 90° - szerokość + nachylenie ekliptyki
+    assert _max_elevation(datetime.date(2024, 6, 21), 52.23, 21.01) == pytest.approx(61.2, abs=0.3)
+    assert _max_elevation(datetime.date(2024, 12, 21), 52.23, 21.01) == pytest.approx(14.3, abs=0.3)
+
+def test_sun_overhead_at_equator_on_equinox():
+    assert _max_elevation(datetime.date(2024, 3, 20), 0.0, 0.0) == pytest.approx(90.0, abs=0.5)
+
+def test_midnight_and_polar_night():
+    assert rc.solar_elevation(_utc(2024, 6, 21, 22, 36), 52.23, 21.01) < -10
+    assert _max_elevation(datetime.date(2024, 12, 21), 80.0, 15.0) < 0
+
+def test_solar_elevation_day_matches_single_samples():
+    date = datetime.date(2024, 6, 21)
+    elevations = rc.solar_elevation_day(52.23, 21.01, date)
+    start = rc._local_midnight_timestamp(date)
+    assert len(elevations) == rc.MINUTES_PER_DAY
+    for minute in (0, 361, 720, 1439):
+        assert elevations[minute] == pytest.approx(rc.solar_elevation(start + 60.0 * minute, 52.23, 21.01), abs=1e-6)
+
+def test_transition_curve_day_night_and_twilight():
+    curve = rc.transition_curve([30.0, rc.ELEVATION_NIGHT - 1, (rc.ELEVATION_DAY + rc.ELEVATION_NIGHT) / 2],
+                                6500, 4500, 1.0, 0.8)
+    assert curve == [(6500, 1.0), (4500, 0.8), (5500, 0.9)]
+
+def _write_config(path, gamma):
+    path.write_text(f"[redshift]\ntemp-day=6500\ntemp-night=3500\ngamma={gamma}\n", encoding="utf-8")
+
+@pytest.mark.parametrize("gamma, expected", [
+    ("0.8:0.9:1.0", (0.8, 0.9, 1.0)),
+    ("0.9", (0.9, 0.9, 0.9)),
+    ("a:b", (1.0, 1.0, 1.0)),
+])
+def test_configured_gamma(tmp_path, gamma, expected):
+    _write_config(tmp_path / "redshift.conf", gamma)
+    logic = rc.RedshiftLogic(config_path=str(tmp_path / "redshift.conf"), gamma_backend=None,
+                             state_path=str(tmp_path / "state.json"))
+    assert logic.configured_gamma() == expected
+
+def test_auto_schedule_uses_day_curve_and_configured_gamma(tmp_path):
+    pytest.importorskip("gi")
+    _write_config(tmp_path / "redshift.conf", "0.8:0.9:1.0")
+    backend = rc.NullGammaBackend()
+    logic = rc.RedshiftLogic(config_path=str(tmp_path / "redshift.conf"), gamma_backend=backend,
+                             state_path=str(tmp_path / "state.json"), resident=True)
+    params = (52.23, 21.01, 6500, 3500, 1.0, 0.8)
+    scheduler = logic.start_auto_schedule(*params)
+    try:
+        now = datetime.datetime.now()
+        temps, brights = rc.day_curve(52.23, 21.01, now.date(), 6500, 3500, 1.0, 0.8)
+        idx = now.hour * 60 + now.minute
+        assert scheduler.current == (int(temps[idx]), float(brights[idx]))
+        assert backend.ramps[0] == rc.compute_gamma_ramps(*scheduler.current, (0.8, 0.9, 1.0))
+        # przejście do trybu auto kończy się dokładnie na stanie harmonogramu
+        assert logic.auto_state_now(*params) == (*scheduler.current, (0.8, 0.9, 1.0))
+    finally:
+        logic.stop_auto_schedule()
+
+class RecordingTimer:
+    def __init__(self):
+        self.deadlines = []
+
+    def arm(self, timestamp):
+        self.deadlines.append(timestamp)
+
+@pytest.mark.parametrize("vectorized", [False, True])
+def test_next_deadline_is_first_perceptible_change(monkeypatch, vectorized):
+    if vectorized:
+        pytest.importorskip("numpy")
+    else:
+        monkeypatch.setattr(rc, "_numpy", lambda: None)
+    rc.day_curve.cache_clear()
+    rc.solar_elevation_day.cache_clear()
+    date = datetime.date.today() + datetime.timedelta(days=2)
+    scheduler = rc.AutoScheduler(None, 52.23, 21.01, 6500, 3500, 1.0, 0.8)
+    scheduler._timer = RecordingTimer()
+    temps, brights = scheduler.curve_for(date)
+    scheduler.current = (int(temps[0]), float(brights[0]))
+    now = datetime.datetime.combine(date, datetime.time())
+    scheduler._arm_next(now, (temps, brights), 0)
+    minute = next(i for i in range(1, rc.MINUTES_PER_DAY)
+                  if abs(temps[i] - temps[0]) >= rc.TEMP_PERCEPTIBLE
+                  or abs(brights[i] - brights[0]) >= rc.BRIGHT_PERCEPTIBLE)
+    expected = now + datetime.timedelta(minutes=minute)
+    assert scheduler._timer.deadlines == [expected.timestamp()]
+    rc.day_curve.cache_clear()
+    rc.solar_elevation_day.cache_clear()
@@ -0,0 +1,189 @@
+# -*- coding: utf-8 -*-
+#
+#  test_supervisor.py - Testy nadzoru procesów redshift: zatrzymywanie, wznawianie i procesy sesji
+#
+#  Copyright (C) 2025  Wasz Informatyk
+#
+#  Ten program jest wolnym oprogramowaniem; możesz go rozprowadzać dalej i/lub
+#  modyfikować na warunkach Powszechnej Licencji Publicznej GNU, wydanej przez
+#  Fundację Wolnego Oprogramowania; według wersji 3 tej Licencji lub (według
+#  twojego wyboru) którejkolwiek późniejszej wersji.
+
+import os
+import signal
+import subprocess
+import time
+
+import pytest
+
+import redshift_control as rc
+
+# Proces ignorujący SIGTERM (ignorowanie przechodzi przez exec) - zatrzyma go dopiero SIGKILL
+IGNORES_TERM = ["sh", "-c", "trap '' TERM; exec sleep 30"]
+
+def _wait_glib(seconds):
+    """
+    Obraca pętlę GLib przez podany czas (budziki i zakończenia dzieci).
+    """
+    context = rc.GLib.MainContext.default()
+    deadline = time.monotonic() + seconds
+    while time.monotonic() < deadline:
+        context.iteration(False)
+        time.sleep(0.005)
+
+@pytest.fixture
+def supervisor(run_glib):
+    supervisor = rc.RedshiftSupervisor(stop_timeout=0.3, backoff_initial=0.05, backoff_max=0.2)
+    yield supervisor
+    supervisor.stop_all_sync()
+
+def _stop(supervisor, run_glib, sig=signal.SIGTERM):
+    started = time.monotonic()
+    run_glib(lambda done: supervisor.stop_all(lambda: done(None), sig), timeout=5)
+    return time.monotonic() - started
+
+def test_stop_escalates_to_sigkill(supervisor, run_glib):
+    exits = []
+    pid, error = supervisor.start(IGNORES_TERM, on_exit=lambda success, err: exits.append(success))
+    assert error is None
+    _wait_glib(0.2)  # sh musi zdążyć zignorować SIGTERM
+    elapsed = _stop(supervisor, run_glib)
+    assert elapsed >= supervisor.stop_timeout
+    assert exits == [False]
+    assert rc.process_start_time(pid) is None
+    assert supervisor.entries == {}
+
+def test_stop_without_escalation(supervisor, run_glib):
+    pid, _error = supervisor.start(["sleep", "30"])
+    elapsed = _stop(supervisor, run_glib)
+    assert elapsed < supervisor.stop_timeout
+    assert rc.process_start_time(pid) is None
+
+def test_restart_backoff_doubles_up_to_limit(supervisor, run_glib, monkeypatch):
+    starts = []
+    start = supervisor.start
+
+    def recording_start(cmd, restart=False, on_exit=None, backoff=None):
+        starts.append((time.monotonic(), backoff))
+        if len(starts) == 4:
+            rc.GLib.idle_add(lambda: finished(None) or False)
+        return start(cmd, restart, on_exit, backoff)
+
+    monkeypatch.setattr(supervisor, "start", recording_start)
+
+    def begin(done):
+        nonlocal finished
+        finished = done
+        supervisor.start(["sh", "-c", "exit 1"], restart=True)
+
+    finished = None
+    run_glib(begin, timeout=5)
+    assert [backoff for _at, backoff in starts] == [None, 0.1, 0.2, 0.2]
+    # kolejne uruchomienie następuje po opóźnieniu poprzedniego wpisu
+    gaps = [b[0] - a[0] for a, b in zip(starts, starts[1:])]
+    assert all(gap >= delay * 0.9 for gap, delay in zip(gaps, (0.05, 0.1, 0.2)))
+
+def test_clean_exit_is_not_restarted(supervisor, run_glib):
+    exits = []
+    supervisor.start(["sh", "-c", "exit 0"], restart=True,
+                     on_exit=lambda success, err: exits.append(success))
+    _wait_glib(0.5)
+    assert exits == [True]
+    assert supervisor.entries == {} and not supervisor._restart_timers
+
+def test_external_sigterm_is_not_restarted_but_sigkill_is(supervisor, stub_redshift, monkeypatch):
+    monkeypatch.setenv("STUB_HANG", "1")
+    exits = []
+    pid, _error = supervisor.start(["redshift", "-l", "52:21"], restart=True,
+                                   on_exit=lambda success, err: exits.append(success))
+    _wait_glib(0.2)
+    # atrapa kończy się czysto po SIGTERM - zatrzymanie z zewnątrz nie jest awarią
+    os.kill(pid, signal.SIGTERM)
+    _wait_glib(0.5)
+    assert exits == [True]
+    assert supervisor.entries == {}
+
+    pid, _error = supervisor.start(["redshift", "-l", "52:21"], restart=True,
+                                   on_exit=lambda success, err: exits.append(success))
+    _wait_glib(0.2)
+    os.kill(pid, signal.SIGKILL)
+    _wait_glib(0.3)
+    assert exits == [True, False]
+    assert len(supervisor.entries) == 1 and pid not in supervisor.entries
+
+# --- Procesy sesji zapisane w migawce stanu ---
+
+def _logic(tmp_path):
+    return rc.RedshiftLogic(config_path=str(tmp_path / "redshift.conf"), gamma_backend=None,
+                            state_path=str(tmp_path / "state.json"))
+
+@pytest.fixture
+def detached_redshift(stub_redshift, monkeypatch):
+    """
+    Uruchamia atrapę redshift w tle (jak CLI); zwraca funkcję spawn(display) -> PID.
+    """
+    monkeypatch.setenv("STUB_HANG", "1")
+    children = []
+
+    def spawn(display=None):
+        env = dict(os.environ)
+        env.pop("DISPLAY", None)
+        if display is not None:
+            env["DISPLAY"] = display
+        child = subprocess.Popen(["redshift", "-l", "52:21"], env=env)
+        children.append(child)
+        deadline = time.monotonic() + 5
+        while time.monotonic() < deadline:  # czekamy, aż wykonany zostanie skrypt atrapy
+            with open(f"/proc/{child.pid}/cmdline", "rb") as f:
+                if b"redshift" in f.read():
+                    break
+            time.sleep(0.01)
+        return child.pid
+
+    yield spawn
+    for child in children:
+        child.kill()
+        child.wait()
+
+def _record(tmp_path, pids):
+    writer = _logic(tmp_path)
+    writer.detached_pids.update(pids)
+    assert writer.write_state_snapshot() == (True, None)
+
+def test_session_pids_match_missing_display(tmp_path, detached_redshift, monkeypatch):
+    monkeypatch.delenv("DISPLAY", raising=False)
+    same = detached_redshift(None)
+    empty = detached_redshift("")
+    other = detached_redshift(":5")
+    _record(tmp_path, [same, empty, other])
+    logic = _logic(tmp_path)
+    logic.status_monitor.processes = logic.status_monitor.scan()
+    assert sorted(logic.session_pids()) == sorted([same, empty])
+
+    monkeypatch.setenv("DISPLAY", ":5")
+    assert logic.session_pids() == [other]
+
+def test_session_pids_ignore_mismatched_start_time(tmp_path, detached_redshift, monkeypatch):
+    monkeypatch.setenv("DISPLAY", ":1")
+    pid = detached_redshift(":1")
+    writer = _logic(tmp_path)
+    writer.detached_pids.add(pid)
+    snapshot = writer.state_snapshot()
+    snapshot["pids"] = [[pid, rc.process_start_time(pid) + 1]]
+    (tmp_path / "state.json").write_text(rc.json.dumps(snapshot), encoding="utf-8")
+    logic = _logic(tmp_path)
+    logic.status_monitor.processes = logic.status_monitor.scan()
+    assert pid in logic.status_monitor.processes
+    assert logic.session_pids() == []
+    assert logic.state_snapshot()["pids"] == []
+
+def test_snapshot_keeps_running_recorded_pids(tmp_path, detached_redshift, monkeypatch):
+    monkeypatch.setenv("DISPLAY", ":1")
+    ours = detached_redshift(":1")
+    theirs = detached_redshift(":5")  # inna sesja - nie jest zatrzymywana
+    _record(tmp_path, [ours, theirs])
+    logic = _logic(tmp_path)
+    expected = {pid: rc.process_start_time(pid) for pid in (ours, theirs)}
+    assert logic.state_snapshot()["pids"] == sorted([pid, start] for pid, start in expected.items())
+    logic.stop_session_processes(timeout=1.0)
+    assert logic.state_snapshot()["pids"] == [[theirs, expected[theirs]]]
@@ -0,0 +1,103 @@
+# -*- coding: utf-8 -*-
+#
+#  test_transition.py - Testy płynnych przejść: interpolacja, powrót do kolorów neutralnych, zmiana trybu
+#
+#  Copyright (C) 2025  Wasz Informatyk
+#
+#  Ten program jest wolnym oprogramowaniem; możesz go rozprowadzać dalej i/lub
+#  modyfikować na warunkach Powszechnej Licencji Publicznej GNU, wydanej przez
+#  Fundację Wolnego Oprogramowania; według wersji 3 tej Licencji lub (według
+#  twojego wyboru) którejkolwiek późniejszej wersji.
+
+import pytest
+
+import redshift_control as rc
+
+IDENTITY = [[i * 256 for i in range(256)]] * 3
+
+class RecordingBackend(rc.NullGammaBackend):
+    """
+    Zapisuje kolejno ustawiane rampy (jako listy liczb).
+    """
+    def __init__(self):
+        super().__init__()
+        self.history = []
+
+    def set_ramps(self, crtc, red, green, blue):
+        super().set_ramps(crtc, red, green, blue)
+        self.history.append([list(map(int, ramp)) for ramp in (red, green, blue)])
+
+def _logic(tmp_path, backend):
+    return rc.RedshiftLogic(config_path=str(tmp_path / "redshift.conf"), gamma_backend=backend,
+                            state_path=str(tmp_path / "state.json"))
+
+def test_interpolate_numeric_temperatures():
+    state = rc.interpolate_state((6500, 1.0, (1.0, 1.0, 1.0)), (3500, 0.8, (0.8, 1.0, 1.0)), 0.5)
+    assert state == (5000, 0.9, (0.9, 1.0, 1.0))
+
+def test_interpolate_towards_neutral_uses_whitepoint():
+    start = (3500, 0.8, (1.0, 1.0, 1.0))
+    assert rc.interpolate_state(start, rc.NEUTRAL_STATE, 0.0)[0] == pytest.approx(rc.whitepoint(3500), abs=1e-4)
+    middle = rc.interpolate_state(start, rc.NEUTRAL_STATE, 0.5)
+    expected = [(w + 1.0) / 2 for w in rc.whitepoint(3500)]
+    assert middle[0] == pytest.approx(expected, abs=1e-4) and middle[1] == 0.9
+    assert rc.interpolate_state(start, rc.NEUTRAL_STATE, 1.0)[0] == (1.0, 1.0, 1.0)
+    # przejście przerwane w połowie może wrócić do temperatury
+    back = rc.interpolate_state(middle, start, 1.0)
+    assert back[0] == pytest.approx(rc.whitepoint(3500), abs=1e-4)
+
+def test_nearest_temperature():
+    assert rc.nearest_temperature(rc.whitepoint(4500)) == 4500
+    assert rc.nearest_temperature((1.0, 1.0, 1.0)) == rc.NEUTRAL_TEMP
+
+def test_fade_reset_ends_on_identity_ramps(tmp_path, run_glib):
+    backend = RecordingBackend()
+    logic = _logic(tmp_path, backend)
+    assert logic.apply_manual(3500, 0.8, (1.0, 1.0, 1.0)) == (True, None)
+    result = run_glib(lambda done: logic.fade_reset_async(0.3, lambda *r: done(r)), timeout=5)
+    assert result == (True, None)
+    assert logic.mode == "off"
+    assert len(backend.history) > 3
+    assert backend.history[-1] == IDENTITY
+    # klatki pośrednie: kanał niebieski rośnie od 3500 K do pełnej bieli
+    # (z dokładnością do kwantyzacji punktu bieli w pamięci podręcznej ramp)
+    blues = [ramps[2][255] for ramps in backend.history]
+    assert all(b >= a - 8 for a, b in zip(blues, blues[1:]))
+    assert blues[0] < blues[len(blues) // 2] < blues[-1]
+
+def test_frames_through_redshift(tmp_path, stub_redshift, run_glib, monkeypatch):
+    monkeypatch.setenv("DISPLAY", ":0")
+    logic = _logic(tmp_path, None)
+    for state in (rc.NEUTRAL_STATE, (rc.whitepoint(4500), 0.9, (1.0, 1.0, 1.0)), (None, 0.7, (1.0, 1.0, 1.0))):
+        assert run_glib(lambda done: logic._apply_frame(state, lambda *r: done(r))) == (True, None)
+    assert stub_redshift.read_text().splitlines() == [
+        ":0 -x",
+        ":0 -P -O 4500 -b 0.9 -g 1.0:1.0:1.0",
+        ":0 -P -O 6500 -b 0.7 -g 1.0:1.0:1.0",
+    ]
+
+def test_switch_mode_stops_with_sigterm_and_restores_start(tmp_path, stub_redshift, run_glib, monkeypatch):
+    monkeypatch.setenv("STUB_HANG", "1")
+    backend = RecordingBackend()
+    logic = _logic(tmp_path, backend)
+    assert logic.apply_manual(3500, 0.8, (1.0, 1.0, 1.0)) == (True, None)
+    start_ramps = backend.history[-1]
+    exits = []
+    _pid, error = logic.supervisor.start(["redshift", "-l", "52:21"], restart=True,
+                                         on_exit=lambda success, err: exits.append(success))
+    assert error is None
+
+    def begin(done):
+        # atrapa musi zdążyć ustawić obsługę SIGTERM
+        rc.GLib.timeout_add(200, lambda: logic.switch_mode_async("off", None, 0.3,
+                                                                   lambda *r: done(r)) and False)
+
+    assert run_glib(begin, timeout=5) == (True, None)
+    # SIGTERM pozwala redshift zakończyć się czysto (bez SIGKILL i bez wznowienia)
+    assert exits == [True]
+    assert logic.supervisor.entries == {}
+    # pierwsza klatka po zatrzymaniu przywraca stan startowy, ostatnia to rampa tożsamościowa
+    after_stop = backend.history[1:]
+    assert after_stop[0] == start_ramps
+    assert after_stop[-1] == IDENTITY
+    assert logic.mode == "off"